@@ -51,13 +51,34 @@ if run_btn:
         st.error("langgraph_agent.run_agent() not available.")
         st.stop()
 
+    # Show generated code live as it streams from the LLM (redrawn per line, not per token).
+    # Steps stream concurrently, so each gets its own box.
+    streamed_code = {}
+    code_boxes = {}
+
+    def show_code_token(step, token):
+        streamed_code[step] = streamed_code.get(step, "") + token
+        if step not in code_boxes:
+            st.caption(f"💻 Generating code for `{step}`…")
+            code_boxes[step] = st.empty()
+        if "\n" in token:
+            code_boxes[step].code(streamed_code[step], language="python")
+
     with st.spinner("Running LangGraph agent… this will plan, generate code, execute, and compile a report."):
         try:
-            final_state = run_agent()
-            st.success("Run complete!")
+            final_state = run_agent(on_code_token=show_code_token)
+            agent_error = None
         except Exception as e:
-            st.error(f"Agent crashed: {e}")
-            st.stop()
+            agent_error = e
+
+    # The last chunk of a step often has no newline, so draw each step's complete code once
+    for step, box in code_boxes.items():
+        box.code(streamed_code[step], language="python")
+
+    if agent_error is not None:
+        st.error(f"Agent crashed: {agent_error}")
+        st.stop()
+    st.success("Run complete!")
 
     # Show summary from final_state if available
     with st.expander("Final State (debug)", expanded=False):
@@ -9,7 +9,7 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 SRC_DIR = PROJECT_ROOT / "src"
 sys.path.append(str(SRC_DIR))
 
-from lib.storage import list_runs, load_run, list_crawls  # save_crawl not needed here
+from lib.storage import list_runs, load_run, list_crawls, load_crawl  # save_crawl not needed here
 
 st.title("🗂 Saved Items")
 
@@ -89,12 +89,10 @@ with tab2:
         } for c in crawls])
         st.dataframe(df, use_container_width=True, hide_index=True)
 
-        crawls_dir = PROJECT_ROOT / "outputs" / "crawls"
         for c in crawls:
             with st.expander(f"{c['id']}  •  {c.get('title') or '(no title)'}"):
-                p = crawls_dir / f"{c['id']}.json"
-                if p.exists():
-                    data = json.loads(p.read_text(encoding="utf-8"))
+                data = load_crawl(c["id"])
+                if data is not None:
                     st.json({
                         "url": data.get("url"),
                         "title": data.get("title"),
@@ -9,6 +9,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
 # Import data manager and UI components
 from data_manager import data_manager
+from utils import count_missing, estimate_memory_usage
 try:
     from ui_components import load_css, hero, metric_card, info_card, section, success_message, error_message
     _HAS_UI = True
@@ -84,8 +85,8 @@ def process_question(question, df, features_df):
 - **Total Records:** {len(df):,}
 - **Data Columns:** {len(df.columns)}
 - **Column Types:** {len(numeric_cols)} numeric, {len(text_cols)} text, {len(date_cols)} date
-- **Data Quality:** {df.isnull().sum().sum()} missing values
-- **Memory Usage:** {df.memory_usage(deep=True).sum() / 1024**2:.1f} MB
+- **Data Quality:** {count_missing(df)} missing values
+- **Memory Usage:** {estimate_memory_usage(df) / 1024**2:.1f} MB
 
 **Available Columns:** {', '.join(df.columns[:8])}{'...' if len(df.columns) > 8 else ''}"""
         
@@ -330,7 +331,7 @@ def main():
         numeric_cols = len(large_df.select_dtypes(include=[np.number]).columns)
         st.metric("🔢 Numeric Columns", numeric_cols)
     with col4:
-        missing_count = large_df.isnull().sum().sum()
+        missing_count = count_missing(large_df)
         st.metric("⚠️ Missing Values", f"{missing_count:,}")
 
     # Show dataset type info
@@ -1,29 +1,189 @@
 """
 Advanced caching system for performance optimization.
 """
+import atexit
 import pickle
 import hashlib
 import json
+import sqlite3
+import threading
 import time
 import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, Optional, Union, Callable
+from typing import Any, Dict, Iterator, NamedTuple, Optional, Tuple, Union, Callable
+import numpy as np
 import pandas as pd
 import logging
 from functools import wraps
 
 from config import Config
 
+try:
+    import xxhash  # Optional dependency
+    XXHASH_AVAILABLE = True
+except Exception:
+    xxhash = None
+    XXHASH_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Write buffer for cache payloads; the 8 KiB default means many syscalls per entry
+_FILE_BUFFER_SIZE = 256 * 1024
+
+# Memory-map array payloads on reload; Windows cannot replace or unlink a mapped file
+_MMAP_ARRAYS = os.name != "nt"
+
+# Only these payloads are kept in the in-process LRU: handing the same object to
+# every caller is safe only if nobody can mutate it (others are re-read from disk)
+_IMMUTABLE_TYPES = (bytes, str, int, float, complex, bool, type(None))
+
+# Bumped whenever the index layout changes; older indexes are discarded on open
+_SCHEMA_VERSION = 2
+
+class CacheMeta(NamedTuple):
+    """Metadata record stored in the cache index for every entry."""
+    created_at: float
+    expires_at: float
+    last_accessed: float
+    ttl: int
+    size_bytes: int
+    # Sizes of the out-of-band pickle buffers appended after the pickle stream
+    buffer_sizes: Tuple[int, ...] = ()
+    # How the payload is encoded: "pickle", "npy" for arrays, or "raw" bytes from set_bytes()
+    codec: str = "pickle"
+
+def _read_payload(path: Path) -> bytearray:
+    """Read a whole file into a writable buffer without intermediate copies."""
+    with open(path, 'rb', buffering=0) as f:
+        payload = bytearray(os.fstat(f.fileno()).st_size)
+        view = memoryview(payload)
+        while view:
+            n_read = f.readinto(view)
+            if not n_read:
+                raise EOFError(f"Unexpected end of cache file: {path}")
+            view = view[n_read:]
+    return payload
+
+def _new_hasher():
+    """Return an incremental content hasher (xxh3-128 when available)."""
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_128()
+    # Same 32-hex-digit output as MD5, but faster and free of FIPS restrictions
+    return hashlib.blake2b(digest_size=16)
+
+def _content_hash(data: Union[bytes, memoryview]) -> str:
+    """Hash raw bytes into a 32-character hex digest."""
+    hasher = _new_hasher()
+    hasher.update(data)
+    return hasher.hexdigest()
+
+# Key components that are already canonical and can be passed through as is
+_KEY_SCALARS = frozenset({type(None), bool, int, float, str, bytes})
+
+def _canonicalize(obj: Any) -> Any:
+    """
+    Convert cache key data into a nested tuple whose repr is stable.
+    
+    Dicts become key-sorted pairs, sequences become tuples, and arrays and
+    DataFrames are reduced to their shape, dtype and a content hash.
+    """
+    obj_type = type(obj)
+    if obj_type in _KEY_SCALARS:
+        return obj
+    if obj_type is dict:
+        items = [
+            (k if type(k) in _KEY_SCALARS else _canonicalize(k),
+             v if type(v) in _KEY_SCALARS else _canonicalize(v))
+            for k, v in obj.items()
+        ]
+        try:
+            items.sort()
+        except TypeError:
+            items.sort(key=repr)
+        return ("dict", tuple(items))
+    if obj_type is tuple or obj_type is list:
+        return tuple(item if type(item) in _KEY_SCALARS else _canonicalize(item) for item in obj)
+    if isinstance(obj, (bool, int, float, str, bytes)):
+        return obj
+    if isinstance(obj, dict):
+        return _canonicalize(dict(obj))
+    if isinstance(obj, (list, tuple)):
+        return tuple(_canonicalize(item) for item in obj)
+    if isinstance(obj, (set, frozenset)):
+        return ("set", tuple(sorted((_canonicalize(item) for item in obj), key=repr)))
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.hasobject:
+            return ("ndarray", obj.shape, _canonicalize(obj.tolist()))
+        return ("ndarray", obj.shape, obj.dtype.str, _content_hash(np.ascontiguousarray(obj).view(np.uint8)))
+    if isinstance(obj, pd.DataFrame):
+        return ("dataframe", obj.shape, tuple(map(str, obj.columns)), _dataframe_fingerprint(obj))
+    if isinstance(obj, pd.Series):
+        return ("series", obj.shape, str(obj.dtype), _dataframe_fingerprint(obj.to_frame()))
+    # Same fallback as the JSON encoder used for keys previously
+    return str(obj)
+
+# Rows sampled from each end of a DataFrame, plus a fixed random sample, for fingerprints
+_FINGERPRINT_EDGE_ROWS = 32
+_FINGERPRINT_SAMPLE_ROWS = 64
+
+def _dataframe_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Cheap content fingerprint of a DataFrame.
+    
+    Hashes the head, the tail and a fixed pseudo-random sample of rows, so the
+    cost does not grow with the number of rows. Use a full hash when every
+    cell must be covered.
+    """
+    n_rows = len(df)
+    edge = min(n_rows, _FINGERPRINT_EDGE_ROWS)
+    sample = np.random.default_rng(0).choice(n_rows, min(n_rows, _FINGERPRINT_SAMPLE_ROWS), replace=False)
+    positions = np.unique(np.concatenate([np.arange(edge), np.arange(n_rows - edge, n_rows), sample]))
+    return _content_hash(pd.util.hash_pandas_object(df.iloc[positions]).to_numpy())
+
+def _dataframe_content_hash(df: pd.DataFrame) -> str:
+    """
+    Hash every cell of a DataFrame.
+    
+    Fixed-width columns are fed to the hasher straight from their buffers, so
+    no per-row hash array is allocated; object and extension columns fall
+    back to pandas' hashing.
+    """
+    hasher = _new_hasher()
+    if isinstance(df.index, pd.RangeIndex):
+        hasher.update(repr((df.index.start, df.index.stop, df.index.step)).encode())
+    else:
+        hasher.update(pd.util.hash_pandas_object(df.index).to_numpy())
+    
+    for _, column in df.items():
+        values = column.to_numpy()
+        hasher.update(str(values.dtype).encode())
+        if values.dtype.kind in "biufcmM":
+            hasher.update(np.ascontiguousarray(values).view(np.uint8))
+        else:
+            hasher.update(pd.util.hash_pandas_object(column, index=False).to_numpy())
+    
+    return hasher.hexdigest()
+
 class CacheManager:
     """Advanced caching system with TTL, compression, and smart invalidation."""
     
-    def __init__(self, cache_dir: Optional[Path] = None, default_ttl: int = None):
+    def __init__(self, cache_dir: Optional[Path] = None, default_ttl: int = None,
+                 legacy_key_hash: bool = False, memory_cache_size: int = 128):
         self.cache_dir = cache_dir or Config.CACHE_DIR
         self.default_ttl = default_ttl or Config.CACHE_TTL_SECONDS
+        # MD5 keys keep compatibility with caches written by older versions
+        self.legacy_key_hash = legacy_key_hash
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         
+        # Metadata index shared by all threads of this process
+        self.db_path = self.cache_dir / "cache.db"
+        self._db_lock = threading.Lock()
+        self._db = self._connect()
+        
         # Cache statistics
         self.stats = {
             "hits": 0,
@@ -32,24 +192,95 @@ class CacheManager:
             "deletes": 0,
             "size_bytes": 0
         }
+        
+        # Access times are tracked in memory and written back lazily
+        self._access_times: Dict[str, float] = {}
+        self._dirty_meta: set[str] = set()
+        atexit.register(self.flush_access_times)
+        
+        # In-process LRU of recently read immutable values: key -> (expires_at, value)
+        self._mem: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._mem_max = memory_cache_size
+        self._mem_lock = threading.RLock()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open the metadata index, creating the schema if needed."""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        
+        if conn.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+            # Entries written with an older layout cannot be read back; start over
+            self._remove_files((".cache", ".meta", ".tmp"))
+            conn.execute("DROP TABLE IF EXISTS cache")
+            conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, created_at REAL, expires_at REAL, "
+            "last_accessed REAL, ttl INTEGER, size_bytes INTEGER, buffer_sizes TEXT, codec TEXT)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_expires_at ON cache (expires_at)")
+        return conn
+    
+    def _remove_files(self, suffixes: Tuple[str, ...]) -> int:
+        """Unlink every file in the cache directory ending with one of the suffixes."""
+        removed = 0
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(suffixes):
+                    try:
+                        os.unlink(entry.path)
+                        removed += 1
+                    except FileNotFoundError:
+                        pass
+        return removed
+    
+    def _unlink(self, key: str) -> None:
+        """Remove the payload file for a cache key if it still exists."""
+        try:
+            os.unlink(self._get_cache_path(key))
+        except FileNotFoundError:
+            pass
+    
+    def _execute(self, sql: str, params: tuple = ()) -> list:
+        """Run a statement against the metadata index and return all rows."""
+        with self._db_lock:
+            return self._db.execute(sql, params).fetchall()
+    
+    def _load_meta(self, key: str) -> Optional[CacheMeta]:
+        """Load the metadata record for a cache key."""
+        rows = self._execute(
+            "SELECT created_at, expires_at, last_accessed, ttl, size_bytes, buffer_sizes, codec "
+            "FROM cache WHERE key = ?",
+            (key,)
+        )
+        if not rows:
+            return None
+        
+        *fields, buffer_sizes, codec = rows[0]
+        buffer_sizes = tuple(int(n) for n in buffer_sizes.split(",")) if buffer_sizes else ()
+        return CacheMeta(*fields, buffer_sizes, codec)
     
     def _generate_key(self, key_data: Any) -> str:
         """Generate a unique cache key from data."""
-        if isinstance(key_data, str):
-            key_str = key_data
-        else:
-            key_str = json.dumps(key_data, sort_keys=True, default=str)
+        if self.legacy_key_hash:
+            if isinstance(key_data, str):
+                key_str = key_data
+            else:
+                key_str = json.dumps(key_data, sort_keys=True, default=str)
+            return hashlib.md5(key_str.encode(), usedforsecurity=False).hexdigest()
         
-        return hashlib.md5(key_str.encode()).hexdigest()
+        if isinstance(key_data, str):
+            return _content_hash(key_data.encode())
+        # repr() of the canonical tuple is deterministic; pickle output is not,
+        # since its memo depends on object identity
+        return _content_hash(repr(_canonicalize(key_data)).encode())
     
     def _get_cache_path(self, key: str) -> Path:
         """Get the file path for a cache key."""
         return self.cache_dir / f"{key}.cache"
     
-    def _get_meta_path(self, key: str) -> Path:
-        """Get the metadata file path for a cache key."""
-        return self.cache_dir / f"{key}.meta"
-    
     def get(self, key_data: Any) -> Optional[Any]:
         """
         Retrieve data from cache.
@@ -62,32 +293,50 @@ class CacheManager:
         """
         key = self._generate_key(key_data)
         cache_path = self._get_cache_path(key)
-        meta_path = self._get_meta_path(key)
         
-        # Check if cache file exists
-        if not cache_path.exists() or not meta_path.exists():
-            self.stats["misses"] += 1
-            return None
+        # Serve repeat hits from memory without touching disk
+        with self._mem_lock:
+            entry = self._mem.get(key)
+            if entry is not None and time.time() <= entry[0]:
+                self._mem.move_to_end(key)
+                self._access_times[key] = time.time()
+                self._dirty_meta.add(key)
+                self.stats["hits"] += 1
+                return entry[1]
         
         try:
             # Load metadata
-            with open(meta_path, 'r') as f:
-                metadata = json.load(f)
+            metadata = self._load_meta(key)
+            if metadata is None:
+                self.stats["misses"] += 1
+                return None
             
             # Check if cache has expired
-            if time.time() > metadata['expires_at']:
+            if time.time() > metadata.expires_at:
                 self.delete(key_data)
                 self.stats["misses"] += 1
                 return None
             
-            # Load cached data
-            with open(cache_path, 'rb') as f:
-                data = pickle.load(f)
-            
-            # Update access time
-            metadata['last_accessed'] = time.time()
-            with open(meta_path, 'w') as f:
-                json.dump(metadata, f)
+            if metadata.codec == "raw":
+                data = cache_path.read_bytes()
+            elif metadata.codec == "npy":
+                # Copy-on-write mapping: pages load lazily and writes never reach the file
+                data = np.load(cache_path, mmap_mode="c" if _MMAP_ARRAYS else None, allow_pickle=False)
+            else:
+                # Load cached data in a single read; out-of-band buffers follow the pickle stream
+                payload = memoryview(_read_payload(cache_path))
+                pickle_end = offset = len(payload) - sum(metadata.buffer_sizes)
+                buffers = []
+                for size in metadata.buffer_sizes:
+                    buffers.append(payload[offset:offset + size])
+                    offset += size
+                data = pickle.loads(payload[:pickle_end], buffers=buffers)
+            self._remember(key, metadata.expires_at, data)
+            
+            # Record access time in memory; flushed by flush_access_times()
+            with self._mem_lock:
+                self._access_times[key] = time.time()
+                self._dirty_meta.add(key)
             
             self.stats["hits"] += 1
             logger.debug(f"Cache hit for key: {key}")
@@ -99,6 +348,24 @@ class CacheManager:
             self.stats["misses"] += 1
             return None
     
+    def _remember(self, key: str, expires_at: float, value: Any):
+        """Keep an immutable value in the in-process LRU, evicting the oldest entries."""
+        if self._mem_max <= 0:
+            return
+        if not (isinstance(value, _IMMUTABLE_TYPES)
+                or (isinstance(value, np.ndarray) and not value.flags.writeable)):
+            return
+        with self._mem_lock:
+            self._mem[key] = (expires_at, value)
+            self._mem.move_to_end(key)
+            while len(self._mem) > self._mem_max:
+                self._mem.popitem(last=False)
+    
+    def _forget(self, key: str):
+        """Drop a value from the in-process LRU."""
+        with self._mem_lock:
+            self._mem.pop(key, None)
+    
     def set(self, key_data: Any, value: Any, ttl: Optional[int] = None) -> bool:
         """
         Store data in cache.
@@ -111,37 +378,91 @@ class CacheManager:
         Returns:
             True if successful, False otherwise
         """
+        if type(value) is np.ndarray and not value.dtype.hasobject:
+            def write_array(f) -> Tuple[int, ...]:
+                np.save(f, value, allow_pickle=False)
+                return ()
+            
+            return self._store(key_data, write_array, ttl, codec="npy")
+        
+        def write(f) -> Tuple[int, ...]:
+            # Large array buffers are written raw after the pickle stream
+            buffers = []
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL, buffer_callback=buffers.append)
+            buffer_sizes = []
+            for buffer in buffers:
+                raw = buffer.raw()
+                f.write(raw)
+                buffer_sizes.append(raw.nbytes)
+            return tuple(buffer_sizes)
+        
+        return self._store(key_data, write, ttl, codec="pickle")
+    
+    def set_bytes(self, key_data: Any, data: bytes, ttl: Optional[int] = None) -> bool:
+        """
+        Store an already-serialized payload (e.g. JSON) without pickling it.
+        
+        Args:
+            key_data: Data to generate cache key from
+            data: Bytes to cache
+            ttl: Time to live in seconds (uses default if None)
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        def write(f) -> Tuple[int, ...]:
+            f.write(data)
+            return ()
+        
+        return self._store(key_data, write, ttl, codec="raw")
+    
+    def get_bytes(self, key_data: Any) -> Optional[bytes]:
+        """Retrieve a payload stored with set_bytes(), or None if not cached."""
+        data = self.get(key_data)
+        return data if isinstance(data, bytes) else None
+    
+    def _store(self, key_data: Any, write: Callable, ttl: Optional[int], codec: str) -> bool:
+        """Write a payload with the given writer and record its metadata."""
         key = self._generate_key(key_data)
         cache_path = self._get_cache_path(key)
-        meta_path = self._get_meta_path(key)
+        self._forget(key)
         
         try:
             # Calculate expiration time
             ttl = ttl or self.default_ttl
-            expires_at = time.time() + ttl
-            
-            # Create metadata
-            metadata = {
-                'created_at': time.time(),
-                'expires_at': expires_at,
-                'last_accessed': time.time(),
-                'ttl': ttl,
-                'size_bytes': 0  # Will be updated after saving
-            }
-            
-            # Save data
-            with open(cache_path, 'wb') as f:
-                pickle.dump(value, f)
-            
-            # Update metadata with actual file size
-            metadata['size_bytes'] = cache_path.stat().st_size
-            
-            # Save metadata
-            with open(meta_path, 'w') as f:
-                json.dump(metadata, f)
+            now = time.time()
+            
+            # Save data to a writer-private temp file, then rename it into place so
+            # readers never see a partially written payload
+            tmp_path = cache_path.with_name(f"{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+            try:
+                with open(tmp_path, 'wb', buffering=_FILE_BUFFER_SIZE) as f:
+                    buffer_sizes = write(f)
+                    size_bytes = f.tell()
+                os.replace(tmp_path, cache_path)
+            except BaseException:
+                tmp_path.unlink(missing_ok=True)
+                raise
+            
+            # Save metadata with actual file size
+            metadata = CacheMeta(
+                created_at=now,
+                expires_at=now + ttl,
+                last_accessed=now,
+                ttl=ttl,
+                size_bytes=size_bytes,
+                buffer_sizes=buffer_sizes,
+                codec=codec
+            )
+            self._execute(
+                "INSERT OR REPLACE INTO cache "
+                "(key, created_at, expires_at, last_accessed, ttl, size_bytes, buffer_sizes, codec) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, *metadata[:5], ",".join(map(str, buffer_sizes)), codec)
+            )
             
             self.stats["sets"] += 1
-            self.stats["size_bytes"] += metadata['size_bytes']
+            self.stats["size_bytes"] += metadata.size_bytes
             logger.debug(f"Cached data for key: {key}")
             return True
             
@@ -161,17 +482,19 @@ class CacheManager:
         """
         key = self._generate_key(key_data)
         cache_path = self._get_cache_path(key)
-        meta_path = self._get_meta_path(key)
+        
+        with self._mem_lock:
+            self._access_times.pop(key, None)
+            self._dirty_meta.discard(key)
+            self._mem.pop(key, None)
         
         try:
-            # Get file size before deletion
-            if cache_path.exists():
-                file_size = cache_path.stat().st_size
-                cache_path.unlink()
-                self.stats["size_bytes"] -= file_size
+            metadata = self._load_meta(key)
+            if metadata is not None:
+                self._execute("DELETE FROM cache WHERE key = ?", (key,))
+                self.stats["size_bytes"] -= metadata.size_bytes
             
-            if meta_path.exists():
-                meta_path.unlink()
+            cache_path.unlink(missing_ok=True)
             
             self.stats["deletes"] += 1
             logger.debug(f"Deleted cache for key: {key}")
@@ -191,13 +514,16 @@ class CacheManager:
         deleted_count = 0
         
         try:
-            for cache_file in self.cache_dir.glob("*.cache"):
-                cache_file.unlink()
-                deleted_count += 1
+            # Also sweeps payloads orphaned by interrupted writes and legacy .meta files
+            deleted_count = self._remove_files((".cache",))
+            self._remove_files((".meta", ".tmp"))
             
-            for meta_file in self.cache_dir.glob("*.meta"):
-                meta_file.unlink()
+            self._execute("DELETE FROM cache")
             
+            with self._mem_lock:
+                self._mem.clear()
+                self._access_times.clear()
+                self._dirty_meta.clear()
             self.stats = {
                 "hits": 0,
                 "misses": 0,
@@ -221,29 +547,29 @@ class CacheManager:
             Number of expired entries removed
         """
         removed_count = 0
+        self.flush_access_times()
         
         try:
             current_time = time.time()
-            
-            for meta_file in self.cache_dir.glob("*.meta"):
-                try:
-                    with open(meta_file, 'r') as f:
-                        metadata = json.load(f)
-                    
-                    if current_time > metadata['expires_at']:
-                        # Remove both meta and cache files
-                        cache_file = self._get_cache_path(meta_file.stem)
-                        
-                        if cache_file.exists():
-                            file_size = cache_file.stat().st_size
-                            cache_file.unlink()
-                            self.stats["size_bytes"] -= file_size
-                        
-                        meta_file.unlink()
-                        removed_count += 1
-                        
-                except Exception as e:
-                    logger.error(f"Error processing cache file {meta_file}: {e}")
+            expired = self._execute(
+                "SELECT key, size_bytes FROM cache WHERE expires_at < ? ORDER BY key",
+                (current_time,)
+            )
+            if not expired:
+                return 0
+            
+            for key, _ in expired:
+                self._forget(key)
+            
+            # unlink is latency-bound, so overlap the syscalls across a small pool
+            keys = [key for key, _ in expired]
+            with ThreadPoolExecutor(max_workers=min(32, len(keys))) as executor:
+                list(executor.map(self._unlink, keys))
+            
+            with self._db_lock:
+                self._db.executemany("DELETE FROM cache WHERE key = ?", [(key,) for key in keys])
+            self.stats["size_bytes"] -= sum(size_bytes for _, size_bytes in expired)
+            removed_count = len(expired)
             
             logger.info(f"Cleaned up {removed_count} expired cache entries")
             
@@ -252,47 +578,102 @@ class CacheManager:
         
         return removed_count
     
+    def flush_access_times(self) -> int:
+        """
+        Write pending last-access times back to the metadata index.
+        
+        Returns:
+            Number of metadata records updated
+        """
+        updates = []
+        with self._mem_lock:
+            while self._dirty_meta:
+                key = self._dirty_meta.pop()
+                accessed_at = self._access_times.pop(key, None)
+                if accessed_at is not None:
+                    updates.append((accessed_at, key))
+        
+        if not updates:
+            return 0
+        
+        try:
+            with self._db_lock:
+                self._db.executemany("UPDATE cache SET last_accessed = ? WHERE key = ?", updates)
+        except Exception as e:
+            logger.error(f"Error flushing cache access times: {e}")
+            return 0
+        
+        return len(updates)
+    
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
         hit_rate = 0
         if self.stats["hits"] + self.stats["misses"] > 0:
             hit_rate = self.stats["hits"] / (self.stats["hits"] + self.stats["misses"])
         
+        cache_files = self._execute("SELECT COUNT(*) FROM cache")[0][0]
+        
         return {
             **self.stats,
             "hit_rate": hit_rate,
             "cache_dir": str(self.cache_dir),
-            "cache_files": len(list(self.cache_dir.glob("*.cache"))),
+            "cache_files": cache_files,
             "size_mb": self.stats["size_bytes"] / (1024 * 1024)
         }
     
-    def get_cache_info(self) -> Dict[str, Any]:
-        """Get detailed cache information."""
-        cache_files = list(self.cache_dir.glob("*.cache"))
-        total_size = sum(f.stat().st_size for f in cache_files)
-        
-        # Analyze cache entries
-        entries = []
-        for cache_file in cache_files:
-            meta_file = self._get_meta_path(cache_file.stem)
-            if meta_file.exists():
-                try:
-                    with open(meta_file, 'r') as f:
-                        metadata = json.load(f)
-                    entries.append({
-                        "key": cache_file.stem,
-                        "created_at": metadata.get('created_at', 0),
-                        "expires_at": metadata.get('expires_at', 0),
-                        "size_bytes": metadata.get('size_bytes', 0),
-                        "is_expired": time.time() > metadata.get('expires_at', 0)
-                    })
-                except:
-                    pass
+    def iter_entries(self, expired_only: bool = False, limit: Optional[int] = None,
+                     batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily yield cache entries ordered by expiry time.
+        
+        Args:
+            expired_only: Only yield entries that have already expired
+            limit: Maximum number of entries to yield (all if None)
+            batch_size: Number of index rows fetched per query
+        
+        Yields:
+            Dictionaries describing each cache entry
+        """
+        now = time.time()
+        remaining = limit if limit is not None else float("inf")
+        # Keyset pagination keeps memory bounded and releases the lock between batches
+        last = (float("-inf"), "")
+        while remaining > 0:
+            sql = (
+                "SELECT key, created_at, expires_at, size_bytes FROM cache "
+                "WHERE (expires_at, key) > (?, ?)"
+                + (" AND expires_at < ?" if expired_only else "")
+                + " ORDER BY expires_at, key LIMIT ?"
+            )
+            params = (*last, now) if expired_only else last
+            rows = self._execute(sql, (*params, int(min(batch_size, remaining))))
+            if not rows:
+                return
+            
+            for key, created_at, expires_at, size_bytes in rows:
+                yield {
+                    "key": key,
+                    "created_at": created_at,
+                    "expires_at": expires_at,
+                    "size_bytes": size_bytes,
+                    "is_expired": now > expires_at
+                }
+            remaining -= len(rows)
+            last = (rows[-1][2], rows[-1][0])
+    
+    def get_cache_info(self, limit: Optional[int] = 1000) -> Dict[str, Any]:
+        """
+        Get detailed cache information.
+        
+        Args:
+            limit: Maximum number of entries to list (all if None)
+        """
+        total_files, total_size = self._execute("SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM cache")[0]
         
         return {
-            "total_files": len(cache_files),
+            "total_files": total_files,
             "total_size_mb": total_size / (1024 * 1024),
-            "entries": entries,
+            "entries": list(self.iter_entries(limit=limit)),
             "stats": self.get_stats()
         }
 
@@ -319,11 +700,7 @@ def cached(ttl: Optional[int] = None, key_func: Optional[Callable] = None):
             if key_func:
                 cache_key = key_func(*args, **kwargs)
             else:
-                cache_key = {
-                    "function": func.__name__,
-                    "args": args,
-                    "kwargs": kwargs
-                }
+                cache_key = (func.__name__, args, kwargs)
             
             # Try to get from cache
             cached_result = cache_manager.get(cache_key)
@@ -345,7 +722,8 @@ def cached_dataframe(ttl: Optional[int] = None, include_shape: bool = True):
     
     Args:
         ttl: Time to live in seconds
-        include_shape: Whether to include DataFrame shape in cache key
+        include_shape: Whether to include DataFrame shape in cache key. When
+            False, the key hashes every cell instead of a sampled fingerprint.
     
     Example:
         @cached_dataframe(ttl=1800)  # Cache for 30 minutes
@@ -356,24 +734,19 @@ def cached_dataframe(ttl: Optional[int] = None, include_shape: bool = True):
         @wraps(func)
         def wrapper(*args, **kwargs):
             # Generate cache key including DataFrame info
-            cache_key = {
-                "function": func.__name__,
-                "args": []
-            }
-            
-            # Process arguments
+            key_args = []
             for arg in args:
                 if isinstance(arg, pd.DataFrame):
-                    cache_key["args"].append({
-                        "type": "dataframe",
-                        "shape": arg.shape if include_shape else None,
-                        "columns": list(arg.columns),
-                        "hash": pd.util.hash_pandas_object(arg).sum() if not include_shape else None
-                    })
+                    key_args.append((
+                        "dataframe",
+                        arg.shape if include_shape else None,
+                        tuple(map(str, arg.columns)),
+                        _dataframe_fingerprint(arg) if include_shape else _dataframe_content_hash(arg)
+                    ))
                 else:
-                    cache_key["args"].append(arg)
+                    key_args.append(arg)
             
-            cache_key["kwargs"] = kwargs
+            cache_key = (func.__name__, tuple(key_args), kwargs)
             
             # Try to get from cache
             cached_result = cache_manager.get(cache_key)
@@ -392,8 +765,15 @@ def cached_dataframe(ttl: Optional[int] = None, include_shape: bool = True):
 class DataFrameCache:
     """Specialized cache for DataFrame operations with smart invalidation."""
     
-    def __init__(self, cache_manager: CacheManager = None):
-        self.cache_manager = cache_manager or cache_manager
+    def __init__(self, cache_manager: CacheManager = None, full_hash: bool = False):
+        # The parameter shadows the module-level instance, so look that up explicitly
+        self.cache_manager = cache_manager or globals()["cache_manager"]
+        # Hash every cell instead of a sampled fingerprint (O(rows) per lookup)
+        self.full_hash = full_hash
+    
+    def analysis_key(self, df: pd.DataFrame, analysis_type: str, **params) -> Dict:
+        """Cache key for an analysis of df; build it once to reuse across get()/set() calls."""
+        return self._generate_analysis_key(df, analysis_type, params)
     
     def get_analysis_cache(self, df: pd.DataFrame, analysis_type: str, **params) -> Optional[Any]:
         """Get cached analysis result for a DataFrame."""
@@ -415,5 +795,5 @@ class DataFrameCache:
             "columns": list(df.columns),
             "dtypes": {col: str(dtype) for col, dtype in df.dtypes.items()},
             "params": params,
-            "data_hash": pd.util.hash_pandas_object(df).sum()
+            "data_hash": _dataframe_content_hash(df) if self.full_hash else _dataframe_fingerprint(df)
         }
@@ -6,6 +6,7 @@ import time
 from datetime import datetime
 import numpy as np
 import pandas as pd
+import pyarrow.csv as pacsv
 import plotly.express as px
 import streamlit as st
 from sklearn.cluster import KMeans
@@ -37,6 +38,35 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# ------------------- CACHED STAGES -------------------
+def read_csv(source):
+    """Read a CSV with PyArrow's multithreaded reader; low-cardinality strings become categoricals."""
+    convert_options = pacsv.ConvertOptions(auto_dict_encode=True, auto_dict_max_cardinality=256)
+    return pacsv.read_csv(source, convert_options=convert_options).to_pandas()
+
+@st.cache_data(show_spinner=False)
+def apply_filters(df, chosen_segment, age_range, purch_range):
+    """Apply the sidebar filters; cached so reruns with unchanged filters skip the work."""
+    # Build one combined mask and index once instead of copying per filter
+    mask = np.ones(len(df), dtype=bool)
+    if "segment" in df and chosen_segment:
+        mask &= df["segment"].isin(chosen_segment).to_numpy()
+    if "age" in df and age_range:
+        ages = df["age"].to_numpy()
+        mask &= (ages >= age_range[0]) & (ages <= age_range[1])
+    if "total_purchases" in df and purch_range:
+        purchases = df["total_purchases"].to_numpy()
+        mask &= (purchases >= purch_range[0]) & (purchases <= purch_range[1])
+    return df.iloc[mask]
+
+@st.cache_resource(show_spinner=False)
+def fit_kmeans(features_bytes, shape):
+    """Fit scaler + K-Means once per feature matrix (keyed by its raw bytes)."""
+    X = np.frombuffer(features_bytes, dtype=np.float64).reshape(shape)
+    scaler = StandardScaler().fit(X)
+    kmeans = KMeans(n_clusters=4, random_state=42, n_init=10).fit(scaler.transform(X))
+    return scaler, kmeans
+
 # ------------------- SIDEBAR -------------------
 st.sidebar.title("⚙️ Control Panel")
 mode = st.sidebar.radio("Select Analysis Mode", ["LangGraph Agent", "Enhanced Agent"])
@@ -46,10 +76,10 @@ use_demo = st.sidebar.button("Use Demo Dataset")
 # ------------------- LOAD DATA -------------------
 if use_demo:
     sample = os.path.join(os.path.dirname(__file__), "..", "data", "large_dataset.csv")
-    df = pd.read_csv(sample)
+    df = read_csv(sample)
     st.toast("✅ Demo dataset loaded")
 elif uploaded:
-    df = pd.read_csv(uploaded)
+    df = read_csv(uploaded)
 else:
     df = None
 
@@ -80,13 +110,7 @@ with col3:
     else:
         purch_range = None
 
-filtered = df.copy()
-if "segment" in filtered and chosen_segment:
-    filtered = filtered[filtered["segment"].isin(chosen_segment)]
-if "age" in filtered and age_range:
-    filtered = filtered[(filtered["age"] >= age_range[0]) & (filtered["age"] <= age_range[1])]
-if "total_purchases" in filtered and purch_range:
-    filtered = filtered[(filtered["total_purchases"] >= purch_range[0]) & (filtered["total_purchases"] <= purch_range[1])]
+filtered = apply_filters(df, tuple(chosen_segment), age_range, purch_range)
 
 st.caption(f"📊 Showing {len(filtered):,} / {len(df):,} rows after filtering")
 
@@ -102,10 +126,9 @@ col4.metric("Avg Session Time", f"{filtered['browsing_time_minutes'].mean():.1f}
 if set(["age", "total_purchases", "browsing_time_minutes"]).issubset(filtered.columns):
     st.markdown("### 🎯 Smart Segmentation (K-Means Clusters)")
     try:
-        features = filtered[["age", "total_purchases", "browsing_time_minutes"]].fillna(0)
-        X = StandardScaler().fit_transform(features)
-        kmeans = KMeans(n_clusters=4, random_state=42, n_init=10)
-        filtered["cluster"] = kmeans.fit_predict(X)
+        features = filtered[["age", "total_purchases", "browsing_time_minutes"]].fillna(0).to_numpy(dtype=np.float64)
+        _, kmeans = fit_kmeans(features.tobytes(), features.shape)
+        filtered["cluster"] = kmeans.labels_
         fig = px.scatter_3d(
             filtered,
             x="age", y="total_purchases", z="browsing_time_minutes",
@@ -122,7 +145,7 @@ tab1, tab2, tab3 = st.tabs(["Purchasing Patterns", "Time & Engagement", "Correla
 
 with tab1:
     if "segment" in filtered.columns and "total_purchases" in filtered.columns:
-        avg_purch = filtered.groupby("segment")["total_purchases"].mean().sort_values(ascending=False)
+        avg_purch = filtered.groupby("segment", observed=True)["total_purchases"].mean().sort_values(ascending=False)
         fig1 = px.bar(avg_purch, x=avg_purch.index, y=avg_purch.values, color=avg_purch.index,
                       title="Average Purchases by Segment", text_auto=".2f")
         st.plotly_chart(fig1, use_container_width=True)
@@ -157,7 +180,8 @@ summary = {
     "avg_purchases": float(filtered['total_purchases'].mean()) if 'total_purchases' in filtered else None,
     "avg_ltv": float(filtered['customer_lifetime_value'].mean()) if 'customer_lifetime_value' in filtered else None,
 }
+summary_json = json.dumps(summary, indent=2)
 with open(results_path, "w", encoding="utf-8") as f:
-    json.dump(summary, f, indent=2)
+    f.write(summary_json)
 st.success(f"Results saved → {results_path}")
-st.download_button("⬇️ Download Summary JSON", json.dumps(summary, indent=2), file_name=f"results-{ts}.json")
+st.download_button("⬇️ Download Summary JSON", summary_json, file_name=f"results-{ts}.json")
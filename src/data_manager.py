@@ -42,9 +42,15 @@ class DataManager:
         # Generate unique ID
         dataset_id = f"{int(datetime.now().timestamp())}_{name.replace(' ', '_')}"
         
-        # Save the dataframe
-        data_file = self.data_dir / f"{dataset_id}.pkl"
-        df.to_pickle(data_file)
+        # Save the dataframe as zstd-compressed parquet
+        data_file = self.data_dir / f"{dataset_id}.parquet"
+        try:
+            df.to_parquet(data_file, engine="pyarrow", compression="zstd")
+        except Exception:
+            # Mixed-type object columns cannot be written as parquet; keep them pickled
+            data_file.unlink(missing_ok=True)
+            data_file = self.data_dir / f"{dataset_id}.pkl"
+            df.to_pickle(data_file)
         
         # Save metadata
         self.metadata[dataset_id] = {
@@ -62,14 +68,20 @@ class DataManager:
         self._save_metadata()
         return dataset_id
     
-    def load_dataset(self, dataset_id):
-        """Load a dataset by ID"""
+    def load_dataset(self, dataset_id, columns=None):
+        """Load a dataset by ID, optionally reading only the given columns"""
         if dataset_id not in self.metadata:
             return None, "Dataset not found"
         
         try:
-            file_path = self.metadata[dataset_id]["file_path"]
-            df = pd.read_pickle(file_path)
+            file_path = Path(self.metadata[dataset_id]["file_path"])
+            if file_path.suffix == ".parquet":
+                df = pd.read_parquet(file_path, engine="pyarrow", columns=columns)
+            else:
+                # Datasets saved by older versions (or with mixed-type columns) are pickled
+                df = pd.read_pickle(file_path)
+                if columns is not None:
+                    df = df[columns]
             return df, None
         except Exception as e:
             return None, f"Error loading dataset: {e}"
@@ -2,19 +2,87 @@
 import os
 import io
 import base64
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 from datetime import datetime
 from typing import Optional, Dict, Any
 from dotenv import load_dotenv
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 
 # Import new modules
 from utils import handle_errors, validate_dataframe, PerformanceTimer, ProjectError
 from cache_manager import cached_dataframe, DataFrameCache
 from advanced_analytics import AdvancedAnalytics
 
+__all__ = ["EnhancedLangGraphAgent", "create_openai_llm"]
+
 # Load env (OPENAI_API_KEY, OPENAI_MODEL, etc.)
 load_dotenv()
 
+# ---- Optional Arrow-backed strings for object columns ----
+try:
+    import pyarrow  # noqa: F401  (enables the "string[pyarrow]" dtype)
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# ---- Optional Polars backend for large-frame aggregations ----
+try:
+    import polars as pl
+    POLARS_AVAILABLE = True
+except ImportError:
+    pl = None
+    POLARS_AVAILABLE = False
+
+# Below this many rows the pandas -> Arrow conversion costs more than Polars saves
+POLARS_MIN_ROWS = 200_000
+
+# ---- Optional Numba kernels for the key-metric reductions ----
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    njit = prange = None
+    NUMBA_AVAILABLE = False
+
+# Smaller frames stay on NumPy so a first run never waits on JIT compilation
+NUMBA_MIN_ROWS = 50_000
+
+# Scatter plots draw every point; beyond this a fixed sample looks the same and renders far faster
+SCATTER_MAX_POINTS = 2000
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, cache=True)
+    def _key_reductions(clv, aov, browse, login_days):
+        """One parallel pass: CLV sum, AOV/browse means and the count of logins within 7 days."""
+        revenue = 0.0
+        for i in prange(clv.size):
+            if not np.isnan(clv[i]):
+                revenue += clv[i]
+        aov_sum = 0.0
+        aov_n = 0
+        for i in prange(aov.size):
+            if not np.isnan(aov[i]):
+                aov_sum += aov[i]
+                aov_n += 1
+        browse_sum = 0.0
+        browse_n = 0
+        for i in prange(browse.size):
+            if not np.isnan(browse[i]):
+                browse_sum += browse[i]
+                browse_n += 1
+        active = 0
+        for i in prange(login_days.size):
+            if login_days[i] <= 7:
+                active += 1
+        aov_mean = aov_sum / aov_n if aov_n else np.nan
+        browse_mean = browse_sum / browse_n if browse_n else np.nan
+        return revenue, aov_mean, browse_mean, active
+
 # ---- Optional LLM (graceful fallback if missing) ----
 try:
     from langchain_openai import ChatOpenAI
@@ -51,66 +119,211 @@ class EnhancedLangGraphAgent:
     def __init__(self):
         self.llm = create_openai_llm()
         self.advanced_analytics = AdvancedAnalytics()
-        self.dataframe_cache = DataFrameCache()
+        # Whole analyses are memoized, so key on every cell rather than a sampled fingerprint
+        self.dataframe_cache = DataFrameCache(full_hash=True)
+        # (id(df), df.columns, {lowered: col}, [(lowered, col), ...]) for the last frame seen
+        self._col_index = None
+        # One Agg figure reused for every chart; the lock guards agents shared across threads
+        self._fig = Figure(figsize=(10, 6))
+        self._canvas = FigureCanvasAgg(self._fig)
+        self._fig_lock = threading.Lock()
 
     # ---------- Helpers ----------
-    def _find_col(self, df, candidates: list[str]):
+    def _column_index(self, df):
+        """Lower-cased column lookups for df, rebuilt only when the frame or its columns change."""
+        cached = self._col_index
+        if cached is None or cached[0] != id(df) or cached[1] is not df.columns:
+            lowered = [(str(col).lower(), col) for col in df.columns]
+            exact = {}
+            for low, col in lowered:
+                exact.setdefault(low, col)
+            cached = self._col_index = (id(df), df.columns, exact, lowered)
+        return cached[2], cached[3]
+
+    def _find_col(self, df, candidates: list[str], substring: bool = True):
         """Return the first matching column by exact (case-insensitive) or substring match."""
+        exact, lowered = self._column_index(df)
         # exact match
         for name in candidates:
-            for col in df.columns:
-                if col.lower() == name.lower():
-                    return col
+            col = exact.get(name.lower())
+            if col is not None:
+                return col
         # substring match
-        for name in candidates:
-            for col in df.columns:
-                if name.lower() in col.lower():
-                    return col
+        if substring:
+            for name in candidates:
+                name = name.lower()
+                for low, col in lowered:
+                    if name in low:
+                        return col
         return None
 
+    def _float_values(self, df: pd.DataFrame, col, col_values: Optional[dict] = None) -> np.ndarray:
+        """df[col] as float64 with NaN for missing; col_values ({col: array} for df) shares it between helpers."""
+        if col_values is None:
+            return df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        values = col_values.get(col)
+        if values is None:
+            values = col_values[col] = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        return values
+
+    def _use_polars(self, df: pd.DataFrame) -> bool:
+        """Whether aggregations over df should run on the multi-threaded Polars engine."""
+        return POLARS_AVAILABLE and len(df) >= POLARS_MIN_ROWS
+
+    def _polars_frame(self, df: pd.DataFrame, columns):
+        """Lazy Polars frame over the given columns (NaN becomes null, as pandas skips it)."""
+        return pl.from_pandas(df[list(dict.fromkeys(columns))], nan_to_null=True).lazy()
+
+    def _key_metric_values_polars(self, df, clv_col, aov_col, browse_col, login_col, segment_col):
+        """Key-metric reductions as one fused Polars query; None if the columns don't convert."""
+        try:
+            exprs = [pl.len().alias("rows")]
+            if clv_col:
+                exprs.append(pl.col(clv_col).cast(pl.Float64).sum().alias("revenue"))
+            if aov_col:
+                exprs.append(pl.col(aov_col).mean().alias("aov"))
+            if browse_col:
+                exprs.append(pl.col(browse_col).mean().alias("browse"))
+            if login_col:
+                exprs.append((pl.col(login_col) <= 7).fill_null(False).mean().alias("active"))
+            if segment_col:
+                is_vip = pl.col(segment_col).cast(pl.String).str.to_lowercase() == "vip"
+                exprs.append(is_vip.fill_null(False).mean().alias("vip"))
+            columns = [c for c in (clv_col, aov_col, browse_col, login_col, segment_col) if c]
+            row = self._polars_frame(df, columns).select(exprs).collect().row(0, named=True)
+        except Exception:
+            return None
+
+        def value(name, scale=1):
+            result = row.get(name)
+            return 0 if result is None else result * scale
+
+        return (value("revenue"), value("aov"), value("browse"),
+                value("active", 100), value("vip", 100))
+
+    def _segment_stats_polars(self, df, segment_col, value_cols):
+        """Segment sizes and means in one parallel Polars group-by; None if unsupported."""
+        segments = df[segment_col]
+        if not (pd.api.types.is_string_dtype(segments) or isinstance(segments.dtype, pd.CategoricalDtype)):
+            return None  # str() of other dtypes differs between pandas and Polars
+        try:
+            key = pl.col(segment_col).cast(pl.String).fill_null("nan").alias("__segment__")
+            table = (
+                self._polars_frame(df, [segment_col, *value_cols])
+                .group_by(key, maintain_order=True)
+                .agg([pl.len().alias("__count__"), *[pl.col(c).mean() for c in value_cols]])
+                .sort("__count__", descending=True, maintain_order=True)
+                .collect()
+                .to_pandas()
+                .set_index("__segment__")
+            )
+        except Exception:
+            return None
+        return table["__count__"], table[value_cols] if value_cols else None
+
+    def _with_arrow_strings(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Return df with pure-string object columns stored as Arrow strings.
+
+        Later .astype(str) calls and string comparisons then run on Arrow kernels
+        instead of per-row Python objects. The caller's frame is not modified, and
+        mixed-type object columns are left alone so their values keep their types.
+        """
+        if not PYARROW_AVAILABLE:
+            return df
+        string_cols = {
+            col: "string[pyarrow]"
+            for col in df.select_dtypes(include="object").columns
+            if pd.api.types.infer_dtype(df[col], skipna=True) == "string"
+        }
+        return df.astype(string_cols) if string_cols else df
+
     def plot_to_base64(self):
-        import matplotlib.pyplot as plt
+        """Render the shared figure to a PNG data URI and clear it for the next chart."""
         buf = io.BytesIO()
-        plt.tight_layout()
-        plt.savefig(buf, format="png")
-        plt.close()
-        buf.seek(0)
-        b64 = base64.b64encode(buf.read()).decode("utf-8")
+        self._fig.tight_layout()
+        # 90 dpi keeps charts legible at ~25% fewer PNG (and base64) bytes than the default
+        self._fig.savefig(buf, format="png", dpi=90)
+        self._fig.clear()
+        # Encode straight from the buffer's memory instead of copying it out first
+        with buf.getbuffer() as data:
+            b64 = base64.b64encode(data).decode("ascii")
         return f"data:image/png;base64,{b64}"
 
-    def _make_text_summary(self, df: pd.DataFrame) -> str:
-        """Compact textual summary for LLM prompt."""
+    def _make_text_summary(self, df: pd.DataFrame, cache_key: Optional[dict] = None) -> str:
+        """Compact textual summary for LLM prompt (cached per DataFrame content, or under cache_key)."""
+        if cache_key is None:
+            cache_key = self.dataframe_cache.analysis_key(df, "text_summary")
+        cache_manager = self.dataframe_cache.cache_manager
+        cached = cache_manager.get(cache_key)
+        if cached is not None:
+            return cached
+
         head_str = df.head(10).to_string(index=False)
         try:
-            desc_str = df.describe(include="all").transpose().to_string()
+            # describe(include="all") is slow on wide frames; describe numbers only and
+            # summarize the remaining columns from a single value_counts each
+            numeric = df.select_dtypes(include=np.number)
+            desc_lines = [numeric.describe().transpose().to_string()] if numeric.shape[1] else []
+            for col in df.columns.difference(numeric.columns, sort=False):
+                counts = df[col].value_counts()
+                top, freq = (counts.index[0], counts.iloc[0]) if len(counts) else (None, 0)
+                desc_lines.append(
+                    f"{col}: count={df[col].count()}, unique={len(counts)}, top={top}, freq={freq}"
+                )
+            desc_str = "\n".join(desc_lines)
         except Exception:
             desc_str = "(describe failed)"
-        return (
+        summary = (
             f"Columns: {list(df.columns)}\n"
             f"Rows: {len(df)}\n\n"
             f"HEAD(10):\n{head_str}\n\n"
             f"DESCRIBE:\n{desc_str}"
         )
+        cache_manager.set(cache_key, summary)
+        return summary
 
     # ---------- Main Analysis ----------
     def analyze_large_dataset(self, df: pd.DataFrame):
         """Perform analysis using flexible column detection (never KeyError)."""
         try:
-            results = {
-                "key_metrics": self.calculate_key_metrics(df),
-                "customer_segments": self.analyze_customer_segments(df),
-                "business_insights": self.generate_business_insights(df),
-                "visualizations": self.create_visualizations(df),
-                "performance_metrics": {
-                    "records_processed": len(df),
-                    "columns_detected": list(df.columns),
-                    "timestamp": datetime.now().isoformat(timespec="seconds"),
-                },
-            }
+            # The local analysis is deterministic for a given frame; reuse it when cached.
+            # The source frame is hashed once, and the text summary (derived from the same
+            # content) is keyed off the same hash
+            cache_manager = self.dataframe_cache.cache_manager
+            cache_key = self.dataframe_cache.analysis_key(df, "large_dataset_analysis")
+            cached = cache_manager.get(cache_key)
+            df = self._with_arrow_strings(df)
+
+            # Start the LLM request first so its latency overlaps the local analysis
+            llm_future = None
+            if self.llm is not None:
+                summary = self._make_text_summary(df, cache_key={**cache_key, "analysis": "text_summary"})
+                executor = ThreadPoolExecutor(max_workers=1)
+                llm_future = executor.submit(self.generate_llm_report, summary)
+                executor.shutdown(wait=False)
+
+            if cached is not None:
+                # Shallow copy so callers adding keys don't alter the cached entry
+                results = dict(cached)
+            else:
+                # Helpers reading the same column share one extracted array for this call
+                col_values = {}
+                results = {
+                    "key_metrics": self.calculate_key_metrics(df, col_values),
+                    "customer_segments": self.analyze_customer_segments(df, col_values),
+                    "business_insights": self.generate_business_insights(df),
+                    "visualizations": self.create_visualizations(df, col_values),
+                    "performance_metrics": {
+                        "records_processed": len(df),
+                        "columns_detected": list(df.columns),
+                        "timestamp": datetime.now().isoformat(timespec="seconds"),
+                    },
+                }
+                cache_manager.set(cache_key, dict(results), ttl=3600)
 
             # ---- Optional: LLM-written insights/report snippet ----
-            df_summary = self._make_text_summary(df)
-            llm_md = self.generate_llm_report(df_summary)
+            llm_md = llm_future.result() if llm_future is not None else None
             if llm_md and not llm_md.startswith("❌"):
                 results["llm_report"] = llm_md
             else:
@@ -122,15 +335,11 @@ class EnhancedLangGraphAgent:
             return {"error": f"Analysis failed: {e}"}
 
     # ---------- Key Metrics ----------
-    def calculate_key_metrics(self, df: pd.DataFrame):
+    def calculate_key_metrics(self, df: pd.DataFrame, col_values: Optional[dict] = None):
         """Calculate business key metrics with flexible column detection."""
 
         def find_col(possible_names):
-            for name in possible_names:
-                for col in df.columns:
-                    if col.lower() == name.lower():
-                        return col
-            return None
+            return self._find_col(df, possible_names, substring=False)
 
         clv_col = find_col(["customer_lifetime_value", "lifetime_value", "clv", "value"])
         aov_col = find_col(["avg_order_value", "average_order_value", "order_value", "aov"])
@@ -138,19 +347,46 @@ class EnhancedLangGraphAgent:
         login_col = find_col(["last_login_days", "days_since_login", "login_days"])
         segment_col = find_col(["customer_segment", "segment", "group"])
 
-        total_revenue = df[clv_col].sum() if clv_col else 0
-        avg_order_value = df[aov_col].mean() if aov_col else 0
-        avg_browse_time = df[browse_col].mean() if browse_col else 0
+        metric_values = None
+        if self._use_polars(df):
+            metric_values = self._key_metric_values_polars(
+                df, clv_col, aov_col, browse_col, login_col, segment_col
+            )
 
-        if login_col:
-            active_users_ratio = (len(df[df[login_col] <= 7]) / len(df)) * 100
+        if metric_values is not None:
+            total_revenue, avg_order_value, avg_browse_time, active_users_ratio, vip_ratio = metric_values
         else:
-            active_users_ratio = 0
+            # Extract each column once and reduce with NumPy; no filtered frames are built
+            def values(col):
+                return self._float_values(df, col, col_values)
+
+            def pct(mask):
+                # count_nonzero counts set bytes directly; mean() would cast the mask to float64
+                return np.count_nonzero(mask) / mask.size * 100 if mask.size else 0
+
+            if NUMBA_AVAILABLE and len(df) >= NUMBA_MIN_ROWS:
+                empty = np.empty(0, dtype=np.float64)
+                revenue, aov_mean, browse_mean, active = _key_reductions(
+                    *(values(col) if col else empty for col in (clv_col, aov_col, browse_col, login_col))
+                )
+                total_revenue = revenue if clv_col else 0
+                avg_order_value = aov_mean if aov_col else 0
+                avg_browse_time = browse_mean if browse_col else 0
+                active_users_ratio = active / len(df) * 100 if login_col else 0
+            else:
+                total_revenue = np.nansum(values(clv_col)) if clv_col else 0
+                avg_order_value = df[aov_col].mean() if aov_col else 0
+                avg_browse_time = df[browse_col].mean() if browse_col else 0
+                active_users_ratio = pct(values(login_col) <= 7) if login_col else 0
 
-        if segment_col:
-            vip_ratio = (len(df[df[segment_col].astype(str).str.lower() == "vip"]) / len(df)) * 100
-        else:
-            vip_ratio = 0
+            if segment_col:
+                # Compare the few distinct labels, then match rows by category code
+                segments = df[segment_col].astype("category")
+                labels = segments.cat.categories.astype(str).str.lower()
+                vip_codes = np.flatnonzero(labels == "vip")
+                vip_ratio = pct(np.isin(segments.cat.codes.to_numpy(), vip_codes))
+            else:
+                vip_ratio = 0
 
         return {
             "total_revenue_potential": f"${total_revenue:,.2f}",
@@ -161,7 +397,7 @@ class EnhancedLangGraphAgent:
         }
 
     # ---------- Customer Segments ----------
-    def analyze_customer_segments(self, df: pd.DataFrame):
+    def analyze_customer_segments(self, df: pd.DataFrame, col_values: Optional[dict] = None):
         """Segment analysis robust to missing/variant column names."""
         segment_col = self._find_col(df, ["customer_segment", "segment", "user_segment", "group"])
         clv_col = self._find_col(df, ["customer_lifetime_value", "lifetime_value", "clv", "value"])
@@ -171,23 +407,40 @@ class EnhancedLangGraphAgent:
         if not segment_col:
             return {}
 
-        vc = df[segment_col].astype(str).value_counts(dropna=False)
+        value_cols = list(dict.fromkeys(c for c in (clv_col, purchases_col, browse_col) if c))
+        stats = self._segment_stats_polars(df, segment_col, value_cols) if self._use_polars(df) else None
+        if stats is not None:
+            counts, means = stats
+        else:
+            # Segment codes in order of first appearance, then weighted bincounts per column
+            codes, labels = pd.factorize(df[segment_col].astype(str), sort=False, use_na_sentinel=False)
+            counts = pd.Series(np.bincount(codes, minlength=len(labels)), index=labels)
+            counts = counts.sort_values(ascending=False, kind="stable")
+            means = None
+            if value_cols:
+                means = {}
+                for col in value_cols:
+                    values = self._float_values(df, col, col_values)
+                    present = ~np.isnan(values)
+                    sums = np.bincount(codes, weights=np.where(present, values, 0.0), minlength=len(labels))
+                    sizes = np.bincount(codes, weights=present, minlength=len(labels))
+                    with np.errstate(invalid="ignore", divide="ignore"):
+                        means[col] = sums / sizes
+                means = pd.DataFrame(means, index=labels)
         segment_analysis = {}
 
-        for segment in vc.index:
-            seg_mask = df[segment_col].astype(str) == str(segment)
-            seg_df = df[seg_mask]
-
-            segment_analysis[str(segment)] = {
-                "count": int(seg_mask.sum()),
-                "percentage": f"{(seg_mask.mean()) * 100:.1f}%",
+        for segment, count in counts.items():
+            seg_stats = {
+                "count": int(count),
+                "percentage": f"{count / len(df) * 100:.1f}%",
             }
-            if clv_col and not seg_df[clv_col].empty:
-                segment_analysis[str(segment)]["avg_lifetime_value"] = f"${seg_df[clv_col].mean():.2f}"
-            if purchases_col and not seg_df[purchases_col].empty:
-                segment_analysis[str(segment)]["avg_purchases"] = float(seg_df[purchases_col].mean())
-            if browse_col and not seg_df[browse_col].empty:
-                segment_analysis[str(segment)]["avg_browsing_time"] = f"{seg_df[browse_col].mean():.1f} min"
+            if clv_col:
+                seg_stats["avg_lifetime_value"] = f"${means.at[segment, clv_col]:.2f}"
+            if purchases_col:
+                seg_stats["avg_purchases"] = float(means.at[segment, purchases_col])
+            if browse_col:
+                seg_stats["avg_browsing_time"] = f"{means.at[segment, browse_col]:.1f} min"
+            segment_analysis[str(segment)] = seg_stats
 
         return segment_analysis
 
@@ -200,55 +453,70 @@ class EnhancedLangGraphAgent:
             insights.append(f"Average customer age: {avg_age:.1f}")
         clv_col = self._find_col(df, ["customer_lifetime_value", "clv", "value"])
         if clv_col:
-            top_clv = df[clv_col].nlargest(min(3, len(df))).values
+            values = df[clv_col].to_numpy()
+            if values.dtype.kind in "iuf":
+                # Partial selection (O(n)) instead of nlargest's sort; NaNs are skipped like nlargest
+                if values.dtype.kind == "f":
+                    values = values[~np.isnan(values)]
+                k = min(3, len(df), values.size)
+                top_clv = np.sort(np.partition(values, values.size - k)[values.size - k:])[::-1] if k else values[:0]
+            else:
+                top_clv = df[clv_col].nlargest(min(3, len(df))).values
             insights.append(f"Top {min(3, len(df))} lifetime values: {top_clv}")
         insights.append("VIP users contribute disproportionately to revenue potential.")
         return insights
 
     # ---------- Visualizations ----------
-    def create_visualizations(self, df: pd.DataFrame):
+    def create_visualizations(self, df: pd.DataFrame, col_values: Optional[dict] = None):
         """Create visualizations using matplotlib; skip gracefully if columns are missing."""
         charts = {}
         try:
-            import matplotlib.pyplot as plt
-
             segment_col = self._find_col(df, ["customer_segment", "segment", "user_segment", "group"])
             purchases_col = self._find_col(df, ["total_purchases", "purchases", "orders_count", "order_count"])
             browse_col = self._find_col(df, ["browsing_time_minutes", "browse_time", "session_time", "time_spent"])
             clv_col = self._find_col(df, ["customer_lifetime_value", "lifetime_value", "clv", "value"])
 
-            # 1) Segment distribution
-            if segment_col:
-                plt.figure(figsize=(10, 6))
-                vc = df[segment_col].astype(str).value_counts()
-                plt.pie(vc.values, labels=vc.index, autopct="%1.1f%%")
-                plt.title("Customer Segmentation Distribution")
-                charts["segmentation_pie"] = self.plot_to_base64()
-
-            # 2) Purchases histogram
-            if purchases_col and pd.api.types.is_numeric_dtype(df[purchases_col]):
-                plt.figure(figsize=(10, 6))
-                plt.hist(df[purchases_col].dropna(), bins=20, alpha=0.7)
-                plt.xlabel(purchases_col)
-                plt.ylabel("Number of Users")
-                plt.title(f"Distribution of {purchases_col}")
-                charts["purchase_histogram"] = self.plot_to_base64()
-
-            # 3) Scatter: engagement vs value
-            if browse_col and clv_col and \
-               pd.api.types.is_numeric_dtype(df[browse_col]) and pd.api.types.is_numeric_dtype(df[clv_col]):
-                plt.figure(figsize=(10, 6))
+            with self._fig_lock:
+                self._fig.clear()
+
+                # 1) Segment distribution
                 if segment_col:
-                    for seg in df[segment_col].astype(str).unique():
-                        part = df[df[segment_col].astype(str) == seg]
-                        plt.scatter(part[browse_col], part[clv_col], alpha=0.6, label=str(seg))
-                    plt.legend(title=segment_col)
-                else:
-                    plt.scatter(df[browse_col], df[clv_col], alpha=0.6)
-                plt.xlabel(browse_col)
-                plt.ylabel(clv_col)
-                plt.title("Customer Value vs Engagement Time")
-                charts["value_engagement"] = self.plot_to_base64()
+                    ax = self._fig.add_subplot()
+                    vc = df[segment_col].astype(str).value_counts()
+                    ax.pie(vc.values, labels=vc.index, autopct="%1.1f%%")
+                    ax.set_title("Customer Segmentation Distribution")
+                    charts["segmentation_pie"] = self.plot_to_base64()
+
+                # 2) Purchases histogram
+                if purchases_col and pd.api.types.is_numeric_dtype(df[purchases_col]):
+                    ax = self._fig.add_subplot()
+                    values = self._float_values(df, purchases_col, col_values)
+                    counts, edges = np.histogram(values[~np.isnan(values)], bins=20)
+                    ax.bar(edges[:-1], counts, width=np.diff(edges), align="edge", alpha=0.7)
+                    ax.set_xlabel(purchases_col)
+                    ax.set_ylabel("Number of Users")
+                    ax.set_title(f"Distribution of {purchases_col}")
+                    charts["purchase_histogram"] = self.plot_to_base64()
+
+                # 3) Scatter: engagement vs value
+                if browse_col and clv_col and \
+                   pd.api.types.is_numeric_dtype(df[browse_col]) and pd.api.types.is_numeric_dtype(df[clv_col]):
+                    ax = self._fig.add_subplot()
+                    # Only the drawing is sampled; metrics and segments above use every row
+                    plot_df = df.sample(SCATTER_MAX_POINTS, random_state=42) if len(df) > SCATTER_MAX_POINTS else df
+                    if segment_col:
+                        # Positions per segment from one grouping pass, in order of first appearance
+                        x, y = plot_df[browse_col].to_numpy(), plot_df[clv_col].to_numpy()
+                        groups = plot_df.groupby(plot_df[segment_col].astype(str), sort=False, dropna=False).indices
+                        for seg, idx in groups.items():
+                            ax.scatter(x[idx], y[idx], alpha=0.6, label=str(seg))
+                        ax.legend(title=segment_col)
+                    else:
+                        ax.scatter(plot_df[browse_col], plot_df[clv_col], alpha=0.6)
+                    ax.set_xlabel(browse_col)
+                    ax.set_ylabel(clv_col)
+                    ax.set_title("Customer Value vs Engagement Time")
+                    charts["value_engagement"] = self.plot_to_base64()
 
         except Exception as e:
             charts = {"error": f"Visualization failed: {e}"}
@@ -256,11 +524,9 @@ class EnhancedLangGraphAgent:
         return charts
 
     # ---------- LLM: Markdown Insights ----------
-    def generate_llm_report(self, df_summary: str) -> Optional[str]:
-        """Use OpenAI model to write a concise markdown insights block (fallback to None)."""
-        if self.llm is None or HumanMessage is None:
-            return None
-        prompt = f"""
+    def _llm_report_prompt(self, df_summary: str) -> str:
+        """Prompt asking the LLM for a markdown insights section."""
+        return f"""
 You are a professional data analyst. Based on the dataset snapshot below, write a concise markdown section with:
 - Key patterns or trends
 - Likely customer segments or cohorts
@@ -269,39 +535,79 @@ You are a professional data analyst. Based on the dataset snapshot below, write
 DATASET SNAPSHOT:
 {df_summary}
 """
+
+    def _llm_cache_key(self, prompt: str) -> tuple:
+        """Cache key for an LLM response: model name plus a digest of the prompt."""
+        model = getattr(self.llm, "model_name", None)
+        return ("llm_report", model, hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest())
+
+    def _cached_llm_report(self, key) -> Optional[str]:
+        """Previously generated report for this prompt, if still cached."""
+        cached = self.dataframe_cache.cache_manager.get_bytes(key)
+        return cached.decode() if cached is not None else None
+
+    def _store_llm_report(self, key, report: str):
+        """Cache a successful report as raw UTF-8 bytes."""
+        self.dataframe_cache.cache_manager.set_bytes(key, report.encode())
+
+    def generate_llm_report(self, df_summary: str) -> Optional[str]:
+        """Use OpenAI model to write a concise markdown insights block (fallback to None)."""
+        if self.llm is None or HumanMessage is None:
+            return None
+        prompt = self._llm_report_prompt(df_summary)
+        key = self._llm_cache_key(prompt)
+        cached = self._cached_llm_report(key)
+        if cached is not None:
+            return cached
         try:
             response = self.llm.invoke([HumanMessage(content=prompt)])
-            return response.content.strip()
+            report = response.content.strip()
+            self._store_llm_report(key, report)
+            return report
+        except Exception as e:
+            return f"❌ LLM generation error: {e}\n\n💡 **Tip:** To enable AI-generated insights, add your OpenAI API key to the environment variables."
+
+    async def agenerate_llm_report(self, df_summary: str) -> Optional[str]:
+        """Async variant of generate_llm_report, so several reports can be awaited together."""
+        if self.llm is None or HumanMessage is None:
+            return None
+        prompt = self._llm_report_prompt(df_summary)
+        key = self._llm_cache_key(prompt)
+        cached = self._cached_llm_report(key)
+        if cached is not None:
+            return cached
+        try:
+            response = await self.llm.ainvoke([HumanMessage(content=prompt)])
+            report = response.content.strip()
+            self._store_llm_report(key, report)
+            return report
         except Exception as e:
             return f"❌ LLM generation error: {e}\n\n💡 **Tip:** To enable AI-generated insights, add your OpenAI API key to the environment variables."
 
     # ---------- Static Professional Report ----------
     def generate_professional_report(self, results, df):
         """Generate Markdown report summary using local (non-LLM) results dictionary."""
-        report = "# 🧠 E-commerce Analytics Report\n\n"
+        parts = ["# 🧠 E-commerce Analytics Report\n\n"]
 
         km = results.get("key_metrics", {})
         if km:
-            report += "## Key Metrics\n"
-            for k, v in km.items():
-                report += f"- **{k.replace('_', ' ').title()}**: {v}\n"
+            parts.append("## Key Metrics\n")
+            parts.extend(f"- **{k.replace('_', ' ').title()}**: {v}\n" for k, v in km.items())
 
         segs = results.get("customer_segments", {})
         if segs:
-            report += "\n## Customer Segments\n"
+            parts.append("\n## Customer Segments\n")
             for seg, data in segs.items():
-                report += f"### {seg}\n"
-                for k, v in data.items():
-                    report += f"- {k.replace('_', ' ').title()}: {v}\n"
+                parts.append(f"### {seg}\n")
+                parts.extend(f"- {k.replace('_', ' ').title()}: {v}\n" for k, v in data.items())
 
         ins = results.get("business_insights", [])
         if ins:
-            report += "\n## Insights\n"
-            for i in ins:
-                report += f"- {i}\n"
+            parts.append("\n## Insights\n")
+            parts.extend(f"- {i}\n" for i in ins)
 
-        report += "\nGenerated automatically via **LangGraph-powered Agent**."
-        return report
+        parts.append("\nGenerated automatically via **LangGraph-powered Agent**.")
+        return "".join(parts)
     
     # ---------- Advanced Analytics Methods ----------
     @cached_dataframe(ttl=3600)  # Cache for 1 hour
@@ -12,24 +12,66 @@ Specialized analytics for retail e-commerce businesses including:
 
 import pandas as pd
 import numpy as np
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
-import matplotlib.pyplot as plt
 try:
-    import seaborn as sns  # Optional dependency
-    SEABORN_AVAILABLE = True
+    import polars as pl  # Optional multi-threaded group-by engine
+    POLARS_AVAILABLE = True
 except Exception:
-    SEABORN_AVAILABLE = False
+    pl = None
+    POLARS_AVAILABLE = False
+
+try:
+    import pyarrow  # noqa: F401  (enables the "string[pyarrow]" dtype)
+    PYARROW_AVAILABLE = True
+except Exception:
+    PYARROW_AVAILABLE = False
 try:
-    from sklearn.cluster import KMeans
-    from sklearn.preprocessing import StandardScaler
-    SKLEARN_AVAILABLE = True
+    from numba import njit  # Optional JIT for the per-product turnover pass
+    NUMBA_AVAILABLE = True
 except Exception:
-    KMeans = StandardScaler = None
-    SKLEARN_AVAILABLE = False
+    njit = None
+    NUMBA_AVAILABLE = False
+
+# Below this many rows the pandas -> Arrow conversion costs more than Polars saves
+POLARS_MIN_ROWS = 200_000
+# Smaller catalogs stay on NumPy so a first report never waits on JIT compilation
+NUMBA_MIN_PRODUCTS = 50_000
 
 from utils import handle_errors, PerformanceTimer, ProjectError
 
+if NUMBA_AVAILABLE:
+    @njit(cache=True, error_model='numpy')
+    def _turnover_kernel(qsum, qcnt):
+        """Turnover rates plus their NaN-skipping mean and high/low counts in one pass."""
+        rates = np.empty(qsum.size)
+        total = 0.0
+        n_valid = 0
+        n_high = 0
+        n_low = 0
+        for i in range(qsum.size):
+            rate = qsum[i] / qcnt[i]
+            rates[i] = rate
+            if not np.isnan(rate):
+                total += rate
+                n_valid += 1
+            if rate > 2.0:
+                n_high += 1
+            elif rate < 0.5:
+                n_low += 1
+        avg = total / n_valid if n_valid else np.nan
+        return rates, avg, n_high, n_low
+
+# Text columns the analyses group or count by
+STRING_KEY_COLUMNS = ('product_id', 'preferred_category', 'customer_segment', 'device_type')
+
+# Season by calendar month (index 0 is for missing dates)
+SEASON_LUT = np.array([
+    None, 'Winter', 'Winter', 'Spring', 'Spring', 'Spring', 'Summer',
+    'Summer', 'Summer', 'Fall', 'Fall', 'Fall', 'Winter'
+], dtype=object)
+
 class RetailAnalytics:
     """Retail-specific analytics engine."""
     
@@ -37,6 +79,39 @@ class RetailAnalytics:
         self.retail_metrics = {}
         self.seasonal_patterns = {}
         self.inventory_insights = {}
+        # (caller's df, working frame, {key: GroupBy}) shared by the analyses of one frame;
+        # see _analysis_scope
+        self._ctx = None
+    
+    @contextmanager
+    def _analysis_scope(self, df: pd.DataFrame):
+        """
+        Yield a working frame for df that analyses run inside this block share.
+        
+        The working frame is a shallow copy, so dtype normalization (parsed dates,
+        categorical keys) is reused across analyses without touching the caller's
+        frame. Nested scopes for the same df reuse the outer working frame and
+        its memoized group-bys.
+        """
+        if self._ctx is not None and self._ctx[0] is df:
+            yield self._ctx[1]
+            return
+        work = df.copy(deep=False)
+        self._ctx = (df, work, {})
+        try:
+            yield work
+        finally:
+            self._ctx = None
+    
+    def _groupby(self, df: pd.DataFrame, key: str):
+        """df.groupby(key), memoized within an analysis scope so its group codes are computed once."""
+        ctx = self._ctx
+        if ctx is None or ctx[1] is not df:
+            return df.groupby(key, observed=True)
+        grouped = ctx[2].get(key)
+        if grouped is None:
+            grouped = ctx[2][key] = df.groupby(key, observed=True)
+        return grouped
     
     @handle_errors
     def analyze_inventory_turnover(self, df: pd.DataFrame) -> Dict[str, Any]:
@@ -49,9 +124,13 @@ class RetailAnalytics:
         Returns:
             Dictionary with inventory turnover analysis
         """
-        with PerformanceTimer("Inventory Turnover Analysis"):
+        with PerformanceTimer("Inventory Turnover Analysis"), self._analysis_scope(df) as df:
+            self._ensure_arrow_strings(df)
             # Calculate inventory turnover metrics
             if 'product_id' in df.columns and 'quantity' in df.columns:
+                # Factorize the product key once; every product group-by below reuses the codes
+                self._ensure_category(df, 'product_id')
+                
                 turnover_analysis = self._calculate_turnover_metrics(df)
                 
                 # Identify slow-moving products
@@ -76,62 +155,125 @@ class RetailAnalytics:
     def _calculate_turnover_metrics(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Calculate inventory turnover metrics."""
         # Group by product and calculate turnover
-        product_metrics = df.groupby('product_id').agg({
-            'quantity': ['sum', 'count', 'mean'],
-            'total_purchases': 'sum' if 'total_purchases' in df.columns else lambda x: x.count()
-        }).round(2)
-        
-        # Calculate turnover rate
-        product_metrics['turnover_rate'] = product_metrics[('quantity', 'sum')] / product_metrics[('quantity', 'count')]
+        product_metrics = None
+        if POLARS_AVAILABLE and len(df) >= POLARS_MIN_ROWS:
+            product_metrics = self._product_metrics_polars(df)
+        if product_metrics is None:
+            # Named reducers only; a lambda anywhere in the spec drops the whole agg to a Python loop
+            agg_spec = {'quantity': ['sum', 'count', 'mean']}
+            if 'total_purchases' in df.columns:
+                agg_spec['total_purchases'] = 'sum'
+            product_metrics = self._groupby(df, 'product_id').agg(agg_spec)
+        product_metrics = product_metrics.round(2)
+        
+        # Calculate turnover rate and its summary on plain arrays
+        qsum = product_metrics[('quantity', 'sum')].to_numpy(dtype=np.float64)
+        qcnt = product_metrics[('quantity', 'count')].to_numpy(dtype=np.float64)
+        if NUMBA_AVAILABLE and qsum.size >= NUMBA_MIN_PRODUCTS:
+            rates, avg_rate, n_high, n_low = _turnover_kernel(qsum, qcnt)
+        else:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rates = qsum / qcnt
+            valid = rates[~np.isnan(rates)]
+            avg_rate = valid.mean() if valid.size else np.nan
+            n_high = np.count_nonzero(rates > 2.0)
+            n_low = np.count_nonzero(rates < 0.5)
+        product_metrics['turnover_rate'] = rates
         
         # Overall metrics
         overall_turnover = {
-            'avg_turnover_rate': product_metrics['turnover_rate'].mean(),
+            'avg_turnover_rate': np.float64(avg_rate),
             'total_products': len(product_metrics),
-            'high_turnover_products': len(product_metrics[product_metrics['turnover_rate'] > 2.0]),
-            'low_turnover_products': len(product_metrics[product_metrics['turnover_rate'] < 0.5])
+            'high_turnover_products': int(n_high),
+            'low_turnover_products': int(n_low)
         }
         
         return {
-            'product_level': product_metrics.to_dict('index'),
+            'product_level': self._to_index_dict(product_metrics),
             'overall_metrics': overall_turnover
         }
     
+    def _to_index_dict(self, frame: pd.DataFrame) -> Dict[Any, Dict[Any, Any]]:
+        """Same result as frame.to_dict('index'), built from whole-column tolist() calls instead of per-cell boxing."""
+        columns = frame.columns.tolist()
+        values = [frame.iloc[:, i].tolist() for i in range(len(columns))]
+        return {key: dict(zip(columns, row)) for key, row in zip(frame.index.tolist(), zip(*values))}
+    
+    def _product_metrics_polars(self, df: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """Per-product aggregates from one parallel Polars group-by; None if the columns don't convert."""
+        labels = [('quantity', 'sum'), ('quantity', 'count'), ('quantity', 'mean')]
+        aggs = [pl.col('quantity').sum(), pl.col('quantity').count(), pl.col('quantity').mean()]
+        if 'total_purchases' in df.columns:
+            labels.append(('total_purchases', 'sum'))
+            aggs.append(pl.col('total_purchases').sum())
+        try:
+            table = (
+                pl.from_pandas(df[list(dict.fromkeys(['product_id', *(col for col, _ in labels)]))], nan_to_null=True)
+                .lazy()
+                .drop_nulls('product_id')
+                .group_by('product_id')
+                .agg([agg.alias(f'{col}_{stat}') for agg, (col, stat) in zip(aggs, labels)])
+                .sort('product_id')
+                .collect()
+                .to_pandas()
+                .set_index('product_id')
+            )
+        except Exception:
+            return None
+        # Same column labels as the pandas agg, so product_level keys don't depend on the engine
+        table.columns = pd.MultiIndex.from_tuples(labels)
+        return table
+    
     def _identify_slow_moving_products(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
         """Identify slow-moving products."""
-        product_sales = df.groupby('product_id')['quantity'].sum().sort_values()
+        product_sales = self._groupby(df, 'product_id')['quantity'].sum()
+        sales = product_sales.to_numpy()
         
-        # Bottom 20% of products by sales
-        slow_moving_threshold = product_sales.quantile(0.2)
-        slow_moving_products = product_sales[product_sales <= slow_moving_threshold]
+        # Bottom 20% of products by sales; the quantile is found by partitioning,
+        # so only the slow-moving subset gets sorted
+        if sales.size == 0:
+            return []
+        slow = np.flatnonzero(sales <= np.quantile(sales, 0.2))
+        slow = slow[np.argsort(sales[slow], kind='stable')]
         
+        recommendation = 'Consider discounting or bundling'
         return [
-            {
-                'product_id': product_id,
-                'total_sales': sales,
-                'recommendation': 'Consider discounting or bundling'
-            }
-            for product_id, sales in slow_moving_products.items()
+            {'product_id': product_id, 'total_sales': total, 'recommendation': recommendation}
+            for product_id, total in zip(product_sales.index[slow].tolist(), sales[slow].tolist())
         ]
     
+    def _ensure_datetime(self, df: pd.DataFrame, col: str) -> pd.Series:
+        """Parse df[col] to datetime in place unless an earlier analysis already did."""
+        if df[col].dtype.kind != 'M':
+            df[col] = pd.to_datetime(df[col], cache=True)
+        return df[col]
+    
+    def _ensure_arrow_strings(self, df: pd.DataFrame) -> None:
+        """Store object key columns holding only strings as Arrow strings in place; mixed columns are left alone."""
+        if not PYARROW_AVAILABLE:
+            return
+        for col in STRING_KEY_COLUMNS:
+            if col in df.columns and df[col].dtype == object and pd.api.types.infer_dtype(df[col], skipna=True) == 'string':
+                df[col] = df[col].astype('string[pyarrow]')
+    
+    def _ensure_category(self, df: pd.DataFrame, col: str) -> None:
+        """Store a string key column as categorical in place so repeated group-bys skip hashing it."""
+        if col in df.columns and pd.api.types.is_string_dtype(df[col]):
+            df[col] = df[col].astype('category')
+    
     def _analyze_seasonal_patterns(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Analyze seasonal sales patterns."""
-        if 'signup_date' in df.columns or 'timestamp' in df.columns:
+        cols = frozenset(df.columns)
+        if 'signup_date' in cols or 'timestamp' in cols:
             # Convert to datetime
-            date_col = 'signup_date' if 'signup_date' in df.columns else 'timestamp'
-            df[date_col] = pd.to_datetime(df[date_col])
+            date_col = 'signup_date' if 'signup_date' in cols else 'timestamp'
+            dates = self._ensure_datetime(df, date_col)
             
-            # Extract month and season
-            df['month'] = df[date_col].dt.month
-            df['season'] = df['month'].map({
-                12: 'Winter', 1: 'Winter', 2: 'Winter',
-                3: 'Spring', 4: 'Spring', 5: 'Spring',
-                6: 'Summer', 7: 'Summer', 8: 'Summer',
-                9: 'Fall', 10: 'Fall', 11: 'Fall'
-            })
+            # Season per row as a local array; the frame itself gets no derived columns
+            season = SEASON_LUT[dates.dt.month.fillna(0).to_numpy(dtype=np.intp)]
             
             # Seasonal sales analysis
-            seasonal_sales = df.groupby('season')['quantity'].sum() if 'quantity' in df.columns else df.groupby('season').size()
+            seasonal_sales = df['quantity'].groupby(season).sum() if 'quantity' in cols else df.groupby(season).size()
             
             return {
                 'seasonal_distribution': seasonal_sales.to_dict(),
@@ -172,7 +314,8 @@ class RetailAnalytics:
         Returns:
             Dictionary with customer journey analysis
         """
-        with PerformanceTimer("Customer Journey Analysis"):
+        with PerformanceTimer("Customer Journey Analysis"), self._analysis_scope(df) as df:
+            self._ensure_arrow_strings(df)
             journey_analysis = {}
             
             # Customer lifecycle stages
@@ -195,36 +338,38 @@ class RetailAnalytics:
     
     def _identify_lifecycle_stages(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Identify customer lifecycle stages."""
-        if 'total_purchases' in df.columns and 'signup_date' in df.columns:
+        cols = frozenset(df.columns)
+        if 'total_purchases' in cols and 'signup_date' in cols:
             # Calculate days since signup
-            df['signup_date'] = pd.to_datetime(df['signup_date'])
-            df['days_since_signup'] = (datetime.now() - df['signup_date']).dt.days
+            self._ensure_datetime(df, 'signup_date')
+            # Whole days as integer arithmetic on datetime64 values (floored, like Timedelta.days)
+            signup = df['signup_date'].to_numpy(dtype='datetime64[ns]')
+            with np.errstate(invalid='ignore'):  # NaT rows are masked below
+                days = (np.datetime64(datetime.now(), 'ns') - signup) // np.timedelta64(1, 'D')
+            missing = np.isnat(signup)
+            days_since_signup = np.where(missing, np.nan, days) if missing.any() else days.astype(np.int32)
             
-            # Define lifecycle stages
-            def categorize_stage(row):
-                if row['total_purchases'] == 0:
-                    return 'Prospect'
-                elif row['total_purchases'] == 1:
-                    return 'New Customer'
-                elif row['total_purchases'] <= 5:
-                    return 'Developing'
-                elif row['total_purchases'] <= 20:
-                    return 'Established'
-                else:
-                    return 'VIP'
+            # Define lifecycle stages; conditions are checked in order, like an if/elif chain
+            tp = df['total_purchases'].to_numpy()
+            lifecycle_stage = np.select(
+                [tp == 0, tp == 1, tp <= 5, tp <= 20],
+                ['Prospect', 'New Customer', 'Developing', 'Established'],
+                default='VIP'
+            )
             
-            df['lifecycle_stage'] = df.apply(categorize_stage, axis=1)
-            
-            stage_distribution = df['lifecycle_stage'].value_counts().to_dict()
+            # Stage sizes and average tenure from one grouped pass over the local arrays
+            stage_stats = pd.Series(days_since_signup).groupby(lifecycle_stage, sort=False).agg(['size', 'mean'])
+            stage_distribution = stage_stats['size'].sort_values(ascending=False, kind='stable').to_dict()
+            avg_days = stage_stats['mean'].to_dict()
             
             return {
                 'stage_distribution': stage_distribution,
                 'stage_characteristics': {
                     'Prospect': {'avg_days': 0, 'conversion_potential': 'High'},
-                    'New Customer': {'avg_days': df[df['lifecycle_stage'] == 'New Customer']['days_since_signup'].mean(), 'conversion_potential': 'Very High'},
-                    'Developing': {'avg_days': df[df['lifecycle_stage'] == 'Developing']['days_since_signup'].mean(), 'conversion_potential': 'High'},
-                    'Established': {'avg_days': df[df['lifecycle_stage'] == 'Established']['days_since_signup'].mean(), 'conversion_potential': 'Medium'},
-                    'VIP': {'avg_days': df[df['lifecycle_stage'] == 'VIP']['days_since_signup'].mean(), 'conversion_potential': 'Maintain'}
+                    'New Customer': {'avg_days': avg_days.get('New Customer', np.nan), 'conversion_potential': 'Very High'},
+                    'Developing': {'avg_days': avg_days.get('Developing', np.nan), 'conversion_potential': 'High'},
+                    'Established': {'avg_days': avg_days.get('Established', np.nan), 'conversion_potential': 'Medium'},
+                    'VIP': {'avg_days': avg_days.get('VIP', np.nan), 'conversion_potential': 'Maintain'}
                 }
             }
         
@@ -232,15 +377,24 @@ class RetailAnalytics:
     
     def _analyze_purchase_funnel(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Analyze purchase funnel metrics."""
+        cols = frozenset(df.columns)
         total_customers = len(df)
         
+        # Count buyer tiers straight from the purchases array instead of filtering the frame
+        first_time = repeat = vip = 0
+        if 'total_purchases' in cols:
+            tp = df['total_purchases'].to_numpy(dtype=np.float64, na_value=np.nan)
+            first_time = int(np.count_nonzero(tp == 1))
+            repeat = int(np.count_nonzero(tp > 1))
+            vip = int(np.count_nonzero(tp > 20))
+        
         # Calculate funnel metrics
         funnel_metrics = {
             'total_visitors': total_customers,
-            'registered_users': len(df[df['user_id'].notna()]) if 'user_id' in df.columns else total_customers,
-            'first_time_buyers': len(df[df['total_purchases'] == 1]) if 'total_purchases' in df.columns else 0,
-            'repeat_buyers': len(df[df['total_purchases'] > 1]) if 'total_purchases' in df.columns else 0,
-            'vip_customers': len(df[df['total_purchases'] > 20]) if 'total_purchases' in df.columns else 0
+            'registered_users': int(df['user_id'].count()) if 'user_id' in cols else total_customers,
+            'first_time_buyers': first_time,
+            'repeat_buyers': repeat,
+            'vip_customers': vip
         }
         
         # Calculate conversion rates
@@ -258,17 +412,22 @@ class RetailAnalytics:
     
     def _analyze_touchpoints(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Analyze customer touchpoints."""
+        cols = frozenset(df.columns)
         touchpoint_analysis = {}
         
-        if 'device_type' in df.columns:
+        if 'device_type' in cols:
             device_distribution = df['device_type'].value_counts().to_dict()
             touchpoint_analysis['device_preferences'] = device_distribution
         
-        if 'browsing_time_minutes' in df.columns:
+        if 'browsing_time_minutes' in cols:
+            # Drop missing values once, then take both thresholds from a single percentile call
+            browsing = df['browsing_time_minutes'].to_numpy(dtype=np.float64, na_value=np.nan)
+            browsing = browsing[~np.isnan(browsing)]
+            low, high = np.percentile(browsing, [20, 80]) if browsing.size else (np.nan, np.nan)
             touchpoint_analysis['engagement_metrics'] = {
-                'avg_browsing_time': df['browsing_time_minutes'].mean(),
-                'high_engagement_threshold': df['browsing_time_minutes'].quantile(0.8),
-                'low_engagement_threshold': df['browsing_time_minutes'].quantile(0.2)
+                'avg_browsing_time': browsing.mean() if browsing.size else np.nan,
+                'high_engagement_threshold': high,
+                'low_engagement_threshold': low
             }
         
         return touchpoint_analysis
@@ -307,8 +466,13 @@ class RetailAnalytics:
         Returns:
             Dictionary with product performance analysis
         """
-        with PerformanceTimer("Product Performance Analysis"):
+        with PerformanceTimer("Product Performance Analysis"), self._analysis_scope(df) as df:
+            self._ensure_arrow_strings(df)
             if 'preferred_category' in df.columns:
+                # Factorize the grouping keys once; every group-by below reuses the codes
+                self._ensure_category(df, 'preferred_category')
+                self._ensure_category(df, 'customer_segment')
+                
                 # Category performance
                 category_analysis = self._analyze_category_performance(df)
                 
@@ -329,49 +493,52 @@ class RetailAnalytics:
     
     def _analyze_category_performance(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Analyze category performance."""
-        category_metrics = df.groupby('preferred_category').agg({
-            'total_purchases': 'mean' if 'total_purchases' in df.columns else 'count',
-            'customer_lifetime_value': 'mean' if 'customer_lifetime_value' in df.columns else lambda x: 0,
-            'user_id': 'count'
-        }).round(2)
-        
-        category_metrics.columns = ['avg_purchases', 'avg_clv', 'customer_count']
-        
-        # Calculate category scores
-        category_metrics['performance_score'] = (
-            category_metrics['avg_purchases'] * 0.4 +
-            category_metrics['avg_clv'] * 0.4 +
-            category_metrics['customer_count'] * 0.2
-        )
+        cols = frozenset(df.columns)
+        # Named reducers only, so the whole agg stays on the Cython group kernels
+        named_aggs = {
+            'avg_purchases': ('total_purchases', 'mean') if 'total_purchases' in cols else ('user_id', 'size'),
+            'customer_count': ('user_id', 'count')
+        }
+        if 'customer_lifetime_value' in cols:
+            named_aggs['avg_clv'] = ('customer_lifetime_value', 'mean')
+        category_metrics = self._groupby(df, 'preferred_category').agg(**named_aggs)
+        if 'avg_clv' not in category_metrics.columns:
+            category_metrics['avg_clv'] = 0
+        category_metrics = category_metrics[['avg_purchases', 'avg_clv', 'customer_count']].round(2)
+        
+        # Calculate category scores, accumulating in place into one array
+        score = category_metrics['avg_purchases'].to_numpy(dtype=np.float64) * 0.4
+        score += category_metrics['avg_clv'].to_numpy(dtype=np.float64) * 0.4
+        score += category_metrics['customer_count'].to_numpy(dtype=np.float64) * 0.2
+        category_metrics['performance_score'] = score
         
         return {
-            'category_metrics': category_metrics.to_dict('index'),
-            'top_performing_category': category_metrics['performance_score'].idxmax(),
-            'bottom_performing_category': category_metrics['performance_score'].idxmin()
+            'category_metrics': self._to_index_dict(category_metrics),
+            'top_performing_category': category_metrics.index[np.nanargmax(score)],
+            'bottom_performing_category': category_metrics.index[np.nanargmin(score)]
         }
     
     def _generate_product_recommendations(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
         """Generate product recommendations."""
-        if 'preferred_category' in df.columns and 'total_purchases' in df.columns:
+        cols = frozenset(df.columns)
+        if 'preferred_category' in cols and 'total_purchases' in cols:
             # Find high-value customers by category
-            category_customers = df.groupby('preferred_category').agg({
-                'total_purchases': 'mean',
-                'customer_lifetime_value': 'mean'
-            })
+            category_purchases = self._groupby(df, 'preferred_category')['total_purchases'].mean()
+            low_threshold, high_threshold = df['total_purchases'].quantile([0.3, 0.7])
             
             recommendations = []
-            for category, metrics in category_customers.iterrows():
-                if metrics['total_purchases'] > df['total_purchases'].quantile(0.7):
+            for category, avg_purchases in category_purchases.items():
+                if avg_purchases > high_threshold:
                     recommendations.append({
                         'category': category,
                         'recommendation': 'Expand product range',
-                        'reason': f'High-performing category with {metrics["total_purchases"]:.1f} avg purchases'
+                        'reason': f'High-performing category with {avg_purchases:.1f} avg purchases'
                     })
-                elif metrics['total_purchases'] < df['total_purchases'].quantile(0.3):
+                elif avg_purchases < low_threshold:
                     recommendations.append({
                         'category': category,
                         'recommendation': 'Review and optimize',
-                        'reason': f'Low-performing category with {metrics["total_purchases"]:.1f} avg purchases'
+                        'reason': f'Low-performing category with {avg_purchases:.1f} avg purchases'
                     })
             
             return recommendations
@@ -380,9 +547,10 @@ class RetailAnalytics:
     
     def _analyze_market_basket(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Analyze market basket patterns."""
+        cols = frozenset(df.columns)
         # Simple market basket analysis based on customer segments
-        if 'preferred_category' in df.columns and 'customer_segment' in df.columns:
-            basket_patterns = df.groupby(['customer_segment', 'preferred_category']).size().unstack(fill_value=0)
+        if 'preferred_category' in cols and 'customer_segment' in cols:
+            basket_patterns = df.groupby(['customer_segment', 'preferred_category'], observed=True).size().unstack(fill_value=0)
             
             return {
                 'segment_category_preferences': basket_patterns.to_dict('index'),
@@ -394,19 +562,20 @@ class RetailAnalytics:
     def _identify_cross_category_opportunities(self, basket_patterns: pd.DataFrame) -> List[Dict[str, Any]]:
         """Identify cross-category selling opportunities."""
         opportunities = []
-        
-        # Find categories that are popular together
-        for segment in basket_patterns.index:
-            segment_data = basket_patterns.loc[segment]
-            top_categories = segment_data.nlargest(2).index.tolist()
-            
-            if len(top_categories) >= 2:
-                opportunities.append({
-                    'segment': segment,
-                    'primary_category': top_categories[0],
-                    'secondary_category': top_categories[1],
-                    'opportunity': 'Bundle these categories for this segment'
-                })
+        if basket_patterns.shape[1] < 2:
+            return opportunities
+        
+        # Find categories that are popular together: top two columns of every row at once.
+        # A stable sort keeps nlargest's tie order (earlier column first).
+        top_two = np.argsort(-basket_patterns.to_numpy(), axis=1, kind='stable')[:, :2]
+        categories = basket_patterns.columns
+        for segment, (primary, secondary) in zip(basket_patterns.index, top_two):
+            opportunities.append({
+                'segment': segment,
+                'primary_category': categories[primary],
+                'secondary_category': categories[secondary],
+                'opportunity': 'Bundle these categories for this segment'
+            })
         
         return opportunities
     
@@ -414,35 +583,37 @@ class RetailAnalytics:
         """Generate comprehensive retail analytics report."""
         report = "# Retail Analytics Report\n\n"
         
-        # Inventory analysis
-        try:
-            inventory_analysis = self.analyze_inventory_turnover(df)
-            report += "## Inventory Turnover Analysis\n"
-            report += f"- Average turnover rate: {inventory_analysis['turnover_metrics']['overall_metrics']['avg_turnover_rate']:.2f}\n"
-            report += f"- High turnover products: {inventory_analysis['turnover_metrics']['overall_metrics']['high_turnover_products']}\n"
-            report += f"- Slow moving products: {len(inventory_analysis['slow_moving_products'])}\n\n"
-        except Exception as e:
-            report += f"## Inventory Analysis\n- Error: {str(e)}\n\n"
-        
-        # Customer journey analysis
-        try:
-            journey_analysis = self.analyze_customer_journey(df)
-            report += "## Customer Journey Analysis\n"
-            report += f"- Lifecycle stages identified: {len(journey_analysis.get('lifecycle_stages', {}).get('stage_distribution', {}))}\n"
-            report += f"- Funnel conversion rates calculated\n"
-            report += f"- Touchpoint analysis completed\n\n"
-        except Exception as e:
-            report += f"## Customer Journey Analysis\n- Error: {str(e)}\n\n"
-        
-        # Product performance analysis
-        try:
-            product_analysis = self.analyze_product_performance(df)
-            report += "## Product Performance Analysis\n"
-            report += f"- Categories analyzed: {len(product_analysis.get('category_performance', {}).get('category_metrics', {}))}\n"
-            report += f"- Product recommendations generated\n"
-            report += f"- Market basket analysis completed\n\n"
-        except Exception as e:
-            report += f"## Product Performance Analysis\n- Error: {str(e)}\n\n"
+        # One scope for all three analyses, so they share group-bys of df
+        with self._analysis_scope(df):
+            # Inventory analysis
+            try:
+                inventory_analysis = self.analyze_inventory_turnover(df)
+                report += "## Inventory Turnover Analysis\n"
+                report += f"- Average turnover rate: {inventory_analysis['turnover_metrics']['overall_metrics']['avg_turnover_rate']:.2f}\n"
+                report += f"- High turnover products: {inventory_analysis['turnover_metrics']['overall_metrics']['high_turnover_products']}\n"
+                report += f"- Slow moving products: {len(inventory_analysis['slow_moving_products'])}\n\n"
+            except Exception as e:
+                report += f"## Inventory Analysis\n- Error: {str(e)}\n\n"
+        
+            # Customer journey analysis
+            try:
+                journey_analysis = self.analyze_customer_journey(df)
+                report += "## Customer Journey Analysis\n"
+                report += f"- Lifecycle stages identified: {len(journey_analysis.get('lifecycle_stages', {}).get('stage_distribution', {}))}\n"
+                report += f"- Funnel conversion rates calculated\n"
+                report += f"- Touchpoint analysis completed\n\n"
+            except Exception as e:
+                report += f"## Customer Journey Analysis\n- Error: {str(e)}\n\n"
+        
+            # Product performance analysis
+            try:
+                product_analysis = self.analyze_product_performance(df)
+                report += "## Product Performance Analysis\n"
+                report += f"- Categories analyzed: {len(product_analysis.get('category_performance', {}).get('category_metrics', {}))}\n"
+                report += f"- Product recommendations generated\n"
+                report += f"- Market basket analysis completed\n\n"
+            except Exception as e:
+                report += f"## Product Performance Analysis\n- Error: {str(e)}\n\n"
         
         report += f"**Report generated on:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
         report += "**Analysis powered by:** LangGraph AI Retail Analytics\n"
@@ -11,33 +11,35 @@ class CompleteBusinessIntelligence:
         """Analyze competitor products with AI"""
         print(f"🔍 Analyzing market for: {search_term}")
         
-        # Create realistic demo competitor data
-        demo_products = []
+        # Create realistic demo competitor data, one RNG call per column
         competitors = ['Amazon', 'eBay', 'Walmart', 'Target', 'BestBuy', 'Newegg']
+        n = len(competitors)
+        rank = np.arange(n)
         
-        for i, competitor in enumerate(competitors):
-            demo_products.append({
-                'competitor': competitor,
-                'product_name': f"{search_term} Pro Model {i+1}",
-                'price': round(80 + (i * 15) + np.random.randint(-10, 10), 2),
-                'rating': round(4.0 + (i * 0.1) + np.random.uniform(-0.3, 0.3), 1),
-                'review_count': np.random.randint(50, 2000),
-                'shipping_time': np.random.randint(1, 7),
-                'in_stock': True,
-                'market_share': round(np.random.uniform(0.1, 0.25), 2)
-            })
-        
-        df = pd.DataFrame(demo_products)
+        df = pd.DataFrame({
+            'competitor': competitors,
+            'product_name': [f"{search_term} Pro Model {i+1}" for i in range(n)],
+            'price': 80 + rank * 15 + np.random.randint(-10, 10, size=n),
+            'rating': np.round(4.0 + rank * 0.1 + np.random.uniform(-0.3, 0.3, size=n), 1),
+            'review_count': np.random.randint(50, 2000, size=n),
+            'shipping_time': np.random.randint(1, 7, size=n),
+            'in_stock': True,
+            'market_share': np.round(np.random.uniform(0.1, 0.25, size=n), 2)
+        })
         analysis = self.analyst.analyze_large_dataset(df)
         
+        # One describe() covers the price range, average and quartiles
+        price = df['price'].describe()
+        leader = df['rating'].idxmax()
+        
         return {
             'crawled_data': df,
             'ai_analysis': analysis,
             'competitive_insights': [
-                f"💰 **Price Analysis**: Market range ${df['price'].min()} - ${df['price'].max()} (Avg: ${df['price'].mean():.2f})",
-                f"⭐ **Quality Leaders**: {df.loc[df['rating'].idxmax()]['competitor']} has highest rating ({df['rating'].max()} stars)",
+                f"💰 **Price Analysis**: Market range ${price['min']:g} - ${price['max']:g} (Avg: ${price['mean']:.2f})",
+                f"⭐ **Quality Leaders**: {df.at[leader, 'competitor']} has highest rating ({df.at[leader, 'rating']} stars)",
                 f"🏪 **Market Coverage**: {len(df)} major competitors analyzed",
                 f"📦 **Shipping**: Average {df['shipping_time'].mean():.1f} days delivery",
-                f"🎯 **Opportunity**: Price gap between ${df['price'].quantile(0.25):.2f}-${df['price'].quantile(0.75):.2f} has less competition"
+                f"🎯 **Opportunity**: Price gap between ${price['25%']:.2f}-${price['75%']:.2f} has less competition"
             ]
-        }
\ No newline at end of file
+        }
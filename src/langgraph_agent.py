@@ -1,32 +1,61 @@
 import os
+import io
+import re
+import signal
+import asyncio
+import threading
+import traceback
+import contextlib
 import subprocess
 import tempfile
 import json
-from typing import Dict, Any, List, Optional
+import logging
+import operator
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Callable, Annotated
 from typing_extensions import TypedDict
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-from langgraph.graph import StateGraph, END
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage
 from dotenv import load_dotenv
 
+# matplotlib, langgraph and LangChain are imported where they are used, so importing this
+# module (e.g. from main.py) doesn't pay their ~1s cold start before any work begins
+
+# ---- Optional multi-threaded Arrow CSV parsing ----
+try:
+    import pyarrow  # noqa: F401  (enables engine="pyarrow" / dtype_backend="pyarrow")
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
 # Load environment variables
 env_path = os.path.join(os.path.dirname(__file__), '..', '.env')
 load_dotenv(env_path)
 
-# Define the state for true LLM-driven analysis
+# Responses are keyed by model settings + prompt, so repeated plans/code for the same dataset are free
+LLM_CACHE_PATH = os.path.join(os.path.dirname(__file__), '..', 'cache', 'langchain_llm_cache.db')
+
+# Define the state for true LLM-driven analysis.
+# Annotated fields carry a LangGraph reducer: agents return only the new entries
+# and the graph merges them, instead of each step re-copying the accumulated dict/list.
 class AnalysisState(TypedDict):
     dataset: Optional[pd.DataFrame]
     dataset_path: str
     analysis_plan: List[str]
     current_step: str
-    completed_steps: List[str]
+    completed_steps: Annotated[List[str], operator.add]
     generated_code: Dict[str, str]  # This should be a dictionary
-    execution_results: Dict[str, Any]
-    current_insights: Dict[str, Any]
+    pregenerated_code: Dict[str, str]  # Step -> code from bulk_code_generator
+    direct_step_kind: Optional[str]  # Set when generated_code is a fallback template (see DIRECT_STEPS)
+    dataset_info_str: str  # Shape/columns/dtypes summary, computed once in run_agent
+    sample_str: str  # head(3) of the dataset, computed once in run_agent
+    execution_results: Annotated[Dict[str, Any], operator.ior]
+    current_insights: Annotated[Dict[str, Any], operator.ior]
     final_report: Optional[str]
-    error_log: List[str]
+    error_log: Annotated[List[str], operator.add]
+    on_code_token: Optional[Callable[[str, str], None]]  # (step, token) hook for streamed code; per run
 
 def create_llm():
     """Create LLM client"""
@@ -34,6 +63,7 @@ def create_llm():
     api_key = os.getenv("PROXY_API_KEY")
     
     if base_url and api_key:
+        from langchain_openai import ChatOpenAI
         return ChatOpenAI(
             base_url=base_url,
             api_key=api_key,
@@ -43,8 +73,41 @@ def create_llm():
     else:
         return None
 
+# Whether the LangChain response cache is currently installed (None: never configured)
+_LLM_CACHE_ENABLED: Optional[bool] = None
+
+def enable_llm_cache(enabled: bool = True):
+    """Install (or remove) the global LangChain response cache used by every llm.invoke;
+    a no-op when it is already in the requested state, so runs share one cache instance"""
+    global _LLM_CACHE_ENABLED
+    if _LLM_CACHE_ENABLED == enabled:
+        return
+    from langchain_core.globals import set_llm_cache
+    if not enabled:
+        set_llm_cache(None)
+        _LLM_CACHE_ENABLED = False
+        return
+    
+    # Optional persistent cache (falls back to in-process memory)
+    try:
+        from langchain_community.cache import SQLiteCache
+    except ImportError:
+        from langchain_core.caches import InMemoryCache
+        set_llm_cache(InMemoryCache())
+    else:
+        os.makedirs(os.path.dirname(LLM_CACHE_PATH), exist_ok=True)
+        set_llm_cache(SQLiteCache(database_path=LLM_CACHE_PATH))
+    _LLM_CACHE_ENABLED = True
+
 llm = create_llm()
 
+# Upper bound on simultaneous code-generation requests, to respect provider rate limits
+MAX_CONCURRENT_LLM_CALLS = 10
+# Seconds a generated analysis step may run
+EXECUTION_TIMEOUT = 30
+# Columns the fallback analyses read; PROJECT_SLIM=1 drops other non-numeric columns (and down-casts) at load
+KNOWN_ANALYTIC_COLUMNS = ('age', 'total_purchases', 'browsing_time_minutes')
+
 def setup_environment():
     """Setup visualization directory"""
     os.makedirs("../outputs/plots", exist_ok=True)
@@ -72,8 +135,8 @@ def planning_agent(state: AnalysisState) -> Dict[str, Any]:
         return {"analysis_plan": fallback_plan}
     
     # Let LLM analyze the dataset and create a plan
-    sample_data = state['dataset'].head(3).to_string()
-    dataset_info = f"Shape: {state['dataset'].shape}, Columns: {list(state['dataset'].columns)}"
+    sample_data = state['sample_str']
+    dataset_info = state['dataset_info_str']
     
     prompt = f"""
     You are a data analysis expert. Analyze this e-commerce user behavior dataset and create a step-by-step analysis plan.
@@ -91,6 +154,7 @@ def planning_agent(state: AnalysisState) -> Dict[str, Any]:
     """
     
     try:
+        from langchain_core.messages import HumanMessage
         response = llm.invoke([HumanMessage(content=prompt)])
         content = response.content.strip()
         
@@ -115,34 +179,13 @@ def planning_agent(state: AnalysisState) -> Dict[str, Any]:
         ]
         return {"analysis_plan": fallback_plan, "error_log": [f"Planning failed: {e}"]}
 
-def code_generation_agent(state: AnalysisState) -> Dict[str, Any]:
-    """LLM generates Python code for the current analysis step"""
-    if not state['analysis_plan']:
-        return {"final_report": "No analysis steps planned"}
-    
-    current_step = state['analysis_plan'][0]
-    print(f"💻 LLM Code Generation Agent: Creating code for '{current_step}'")
-    
-    # Fix Windows path for Python code
-    fixed_path = fix_windows_path(state['dataset_path'])
-    
-    if llm is None:
-        # Fallback: use pre-written code templates
-        return generate_fallback_code(state, current_step, fixed_path)
-    
-    # Get dataset information for context
-    df = state['dataset']
-    dataset_info = f"""
-    Dataset shape: {df.shape}
-    Columns: {list(df.columns)}
-    Data types: {dict(df.dtypes)}
-    """
-    
-    prompt = f"""
+def build_code_prompt(state: AnalysisState, current_step: str, fixed_path: str) -> str:
+    """Prompt asking the LLM for analysis code for one step"""
+    return f"""
     You are a Python data analysis expert. Generate Python code to perform: {current_step}
     
     CONTEXT:
-    {dataset_info}
+    {state['dataset_info_str']}
     
     REQUIREMENTS:
     1. Load the dataset from: '{fixed_path}' (use raw string)
@@ -159,27 +202,127 @@ def code_generation_agent(state: AnalysisState) -> Dict[str, Any]:
     Return ONLY the Python code without any explanations or markdown formatting.
     Use raw strings for file paths: r'path\\\\to\\\\file.csv'
     """
+
+def build_batch_code_prompt(state: AnalysisState, steps: List[str], fixed_path: str) -> str:
+    """Prompt asking the LLM for analysis code for every planned step at once"""
+    return f"""
+    You are a Python data analysis expert. Generate Python code for each of these analysis steps: {json.dumps(steps)}
+    
+    CONTEXT:
+    {state['dataset_info_str']}
+    
+    REQUIREMENTS (for each step's code):
+    1. Load the dataset from: '{fixed_path}' (use raw string)
+    2. Perform analysis for that step only
+    3. Generate insights and visualizations if appropriate
+    4. Save results to a variable called `analysis_results`
+    5. Include proper error handling
+    
+    The code should:
+    - Use pandas for data manipulation
+    - Use matplotlib for visualizations (save to ../outputs/plots/)
+    - Return a dictionary with insights, statistics, and visualization paths
     
+    Return ONLY a JSON object mapping each step name to its Python code as a string, like:
+    {{"step1": "import pandas as pd\\n...", "step2": "..."}}
+    Use raw strings for file paths: r'path\\to\\file.csv'
+    """
+
+def batch_code_generation(state: AnalysisState, steps: List[str]) -> Dict[str, str]:
+    """One LLM round-trip for all steps; returns code for the steps the response covered"""
+    from langchain_core.messages import HumanMessage
+    fixed_path = fix_windows_path(state['dataset_path'])
     try:
-        response = llm.invoke([HumanMessage(content=prompt)])
-        generated_code = response.content.strip()
-        
-        # Clean the code response
-        if generated_code.startswith('```python'):
-            generated_code = generated_code[9:-3]
-        elif generated_code.startswith('```'):
-            generated_code = generated_code[3:-3]
+        # JSON mode guarantees a parseable object (only for this call; other prompts return code/arrays)
+        json_llm = llm.bind(response_format={"type": "json_object"})
+        response = json_llm.invoke([HumanMessage(content=build_batch_code_prompt(state, steps, fixed_path))])
+        codes = json.loads(response.content)
+        if not isinstance(codes, dict):
+            raise ValueError(f"expected a JSON object, got {type(codes).__name__}")
+    except Exception as e:
+        print(f"⚠️ Batched code generation failed: {e}")
+        return {}
+    return {step: clean_generated_code(codes[step]) for step in steps
+            if isinstance(codes.get(step), str) and codes[step].strip()}
+
+def clean_generated_code(content: str) -> str:
+    """Strip markdown fences from an LLM code response"""
+    generated_code = content.strip()
+    if generated_code.startswith('```python'):
+        generated_code = generated_code[9:-3]
+    elif generated_code.startswith('```'):
+        generated_code = generated_code[3:-3]
+    return generated_code
+
+def stream_code(prompt: str, step: str, on_token: Optional[Callable[[str, str], None]]) -> str:
+    """LLM response for prompt; streamed and forwarded token by token to on_token(step, token) if given"""
+    from langchain_core.messages import HumanMessage
+    messages = [HumanMessage(content=prompt)]
+    if on_token is None:
+        return llm.invoke(messages).content
+    chunks = []
+    for chunk in llm.stream(messages):
+        chunks.append(chunk.content)
+        on_token(step, chunk.content)
+    return "".join(chunks)
+
+async def astream_code(prompt: str, step: str, on_token: Optional[Callable[[str, str], None]]) -> str:
+    """Async stream_code, for the concurrent per-step requests"""
+    from langchain_core.messages import HumanMessage
+    messages = [HumanMessage(content=prompt)]
+    if on_token is None:
+        return (await llm.ainvoke(messages)).content
+    chunks = []
+    async for chunk in llm.astream(messages):
+        chunks.append(chunk.content)
+        on_token(step, chunk.content)
+    return "".join(chunks)
+
+def code_generation_agent(state: AnalysisState) -> Dict[str, Any]:
+    """LLM generates Python code for the current analysis step"""
+    if not state['analysis_plan']:
+        return {"final_report": "No analysis steps planned"}
+    
+    current_step = state['analysis_plan'][0]
+    
+    # FIX: Ensure generated_code_history is properly handled
+    current_generated_code = state.get('generated_code', {})
+    if not isinstance(current_generated_code, dict):
+        current_generated_code = {}
+    
+    # Code already produced by the bulk generator needs no further LLM round-trip
+    pregenerated = state.get('pregenerated_code') or {}
+    if current_step in pregenerated:
+        print(f"💻 LLM Code Generation Agent: Using pre-generated code for '{current_step}'")
+        generated_code = pregenerated[current_step]
+        return {
+            "current_step": current_step,
+            "generated_code": generated_code,
+            "direct_step_kind": None,
+            "generated_code_history": {**current_generated_code, current_step: generated_code}
+        }
+    
+    print(f"💻 LLM Code Generation Agent: Creating code for '{current_step}'")
+    
+    # Fix Windows path for Python code
+    fixed_path = fix_windows_path(state['dataset_path'])
+    
+    if llm is None:
+        # Fallback: use pre-written code templates
+        return generate_fallback_code(state, current_step, fixed_path)
+    
+    prompt = build_code_prompt(state, current_step, fixed_path)
+    
+    try:
+        # Fences are stripped once the full stream has arrived
+        generated_code = clean_generated_code(stream_code(prompt, current_step, state.get('on_code_token')))
         
         print(f"✅ Generated code for {current_step}")
         
-        # FIX: Ensure generated_code_history is properly handled
-        current_generated_code = state.get('generated_code', {})
-        if not isinstance(current_generated_code, dict):
-            current_generated_code = {}
-        
         return {
             "current_step": current_step,
             "generated_code": generated_code,
+            "direct_step_kind": None,
             "generated_code_history": {**current_generated_code, current_step: generated_code}
         }
         
@@ -187,13 +330,89 @@ def code_generation_agent(state: AnalysisState) -> Dict[str, Any]:
         print(f"❌ Code generation failed: {e}")
         return generate_fallback_code(state, current_step, fixed_path)
 
+async def code_generation_agent_async(state: AnalysisState, step: str, semaphore: asyncio.Semaphore) -> str:
+    """Generate code for one planned step (streamed to on_code_token if set); falls back to the template on failure"""
+    fixed_path = fix_windows_path(state['dataset_path'])
+    try:
+        async with semaphore:
+            content = await astream_code(build_code_prompt(state, step, fixed_path), step, state.get('on_code_token'))
+        print(f"✅ Generated code for {step}")
+        return clean_generated_code(content)
+    except Exception as e:
+        print(f"❌ Code generation failed for {step}: {e}")
+        return generate_fallback_code(state, step, fixed_path)["generated_code"]
+
+async def _generate_all_code(state: AnalysisState, steps: List[str]) -> Dict[str, str]:
+    """Request code for every step concurrently, at most MAX_CONCURRENT_LLM_CALLS at a time"""
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_LLM_CALLS)
+    codes = await asyncio.gather(*[code_generation_agent_async(state, step, semaphore) for step in steps])
+    return dict(zip(steps, codes))
+
+def bulk_code_generator(state: AnalysisState) -> Dict[str, Any]:
+    """Generate code for all planned steps up front: one batched prompt, then concurrent
+    per-step requests for any steps the batch response missed. With an on_code_token hook
+    the batch is skipped (its tokens are JSON, not code) and every step streams on its own."""
+    steps = list(dict.fromkeys(state.get('analysis_plan', [])))
+    if llm is None or not steps:
+        return {}
+    
+    if state.get('on_code_token') is None:
+        print(f"💻 Bulk Code Generator: Requesting code for {len(steps)} steps in one call...")
+        pregenerated = batch_code_generation(state, steps)
+    else:
+        pregenerated = {}
+    missing = [step for step in steps if step not in pregenerated]
+    if not missing:
+        return {"pregenerated_code": pregenerated}
+    
+    print(f"💻 Bulk Code Generator: Requesting code for {len(missing)} remaining steps concurrently...")
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pregenerated.update(asyncio.run(_generate_all_code(state, missing)))
+    else:
+        # asyncio.run() can't nest inside a running loop: leave the rest to the per-step agent
+        print("⚠️ Concurrent code generation skipped: already inside a running event loop")
+    return {"pregenerated_code": pregenerated}
+
 def generate_fallback_code(state: AnalysisState, current_step: str, fixed_path: str) -> Dict[str, Any]:
     """Fallback code templates when LLM is not available"""
-    df = state['dataset']
+    code_template = _fallback_template(current_step, fixed_path)
+    
+    # FIX: Properly handle the generated_code dictionary
+    current_generated_code = state.get('generated_code', {})
+    if not isinstance(current_generated_code, dict):
+        current_generated_code = {}
     
+    return {
+        "current_step": current_step,
+        "generated_code": code_template,
+        # The executor computes template steps natively instead of exec'ing the source
+        "direct_step_kind": fallback_step_kind(current_step),
+        "generated_code_history": {**current_generated_code, current_step: code_template}
+    }
+
+def fallback_step_kind(current_step: str) -> str:
+    """Which fallback template serves a step: quality, behavior, purchase, viz or generic"""
+    step = current_step.lower()
+    if "quality" in step:
+        return "quality"
+    if "behavior" in step:
+        return "behavior"
+    if "purchase" in step:
+        return "purchase"
+    if "visualization" in step:
+        return "viz"
+    return "generic"
+
+@lru_cache(maxsize=64)
+def _fallback_template(current_step: str, fixed_path: str) -> str:
+    """Template source for a step; depends only on the step name and dataset path"""
     # Use raw string for Windows path
     code_template = f"""
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 import numpy as np
 import os
@@ -206,7 +425,8 @@ df = pd.read_csv(r'{fixed_path}')
 
 """
     
-    if "quality" in current_step.lower() or "data_quality" in current_step.lower():
+    step_kind = fallback_step_kind(current_step)
+    if step_kind == "quality":
         code_template += """
 # Data quality analysis
 analysis_results = {
@@ -221,7 +441,7 @@ analysis_results = {
 print("Data quality analysis completed")
 """
     
-    elif "behavior" in current_step.lower():
+    elif step_kind == "behavior":
         code_template += """
 # User behavior analysis
 analysis_results = {
@@ -233,21 +453,22 @@ analysis_results = {
     'visualizations': []
 }
 
-# Create basic visualization
+# Create basic visualization (hexbin stays cheap and readable for dense data)
 if 'total_purchases' in df.columns and 'browsing_time_minutes' in df.columns:
     plt.figure(figsize=(10, 6))
-    plt.scatter(df['total_purchases'], df['browsing_time_minutes'])
+    plt.hexbin(df['total_purchases'], df['browsing_time_minutes'], gridsize=40, cmap='viridis', mincnt=1)
+    plt.colorbar(label='Users')
     plt.xlabel('Total Purchases')
     plt.ylabel('Browsing Time (minutes)')
     plt.title('User Behavior: Purchases vs Browsing Time')
-    plt.savefig('../outputs/plots/behavior_analysis.png', dpi=300, bbox_inches='tight')
+    plt.savefig('../outputs/plots/behavior_analysis.png', dpi=150, bbox_inches='tight')
     plt.close()
     analysis_results['visualizations'].append('plots/behavior_analysis.png')
 
 print("User behavior analysis completed")
 """
     
-    elif "purchase" in current_step.lower():
+    elif step_kind == "purchase":
         code_template += """
 # Purchase pattern analysis
 analysis_results = {
@@ -261,7 +482,7 @@ analysis_results = {
 print("Purchase pattern analysis completed")
 """
     
-    elif "visualization" in current_step.lower():
+    elif step_kind == "viz":
         code_template += """
 # Visualization generation
 analysis_results = {
@@ -269,26 +490,27 @@ analysis_results = {
     'visualizations': []
 }
 
-# Create multiple visualizations
+# Create multiple visualizations (dashboard-grade resolution) on one reused figure
+plt.rcParams['path.simplify_threshold'] = 1.0
+fig, ax = plt.subplots(figsize=(8, 6))
 if 'age' in df.columns:
-    plt.figure(figsize=(8, 6))
-    plt.hist(df['age'], bins=10, alpha=0.7, color='skyblue')
-    plt.xlabel('Age')
-    plt.ylabel('Frequency')
-    plt.title('User Age Distribution')
-    plt.savefig('../outputs/plots/age_distribution.png', dpi=300, bbox_inches='tight')
-    plt.close()
+    ax.clear()
+    ax.hist(df['age'], bins=10, alpha=0.7, color='skyblue')
+    ax.set_xlabel('Age')
+    ax.set_ylabel('Frequency')
+    ax.set_title('User Age Distribution')
+    fig.savefig('../outputs/plots/age_distribution.png', dpi=150, bbox_inches='tight')
     analysis_results['visualizations'].append('plots/age_distribution.png')
 
 if 'total_purchases' in df.columns:
-    plt.figure(figsize=(8, 6))
-    plt.bar(range(len(df)), df['total_purchases'], color='lightgreen', alpha=0.7)
-    plt.xlabel('User Index')
-    plt.ylabel('Total Purchases')
-    plt.title('Purchase Distribution')
-    plt.savefig('../outputs/plots/purchase_distribution.png', dpi=300, bbox_inches='tight')
-    plt.close()
+    ax.clear()
+    ax.hist(df['total_purchases'].dropna(), bins=50, color='lightgreen', alpha=0.7)
+    ax.set_xlabel('Total Purchases')
+    ax.set_ylabel('User Count')
+    ax.set_title('Purchase Distribution')
+    fig.savefig('../outputs/plots/purchase_distribution.png', dpi=150, bbox_inches='tight')
     analysis_results['visualizations'].append('plots/purchase_distribution.png')
+plt.close(fig)
 
 print("Visualization generation completed")
 """
@@ -309,76 +531,251 @@ analysis_results = {{
 print("Analysis step completed")
 """
     
-    # FIX: Properly handle the generated_code dictionary
-    current_generated_code = state.get('generated_code', {})
-    if not isinstance(current_generated_code, dict):
-        current_generated_code = {}
-    
+    return code_template
+
+# ---- Native equivalents of the fallback templates (same analysis_results, no exec) ----
+PLOTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'outputs', 'plots')
+
+def _direct_quality(df: pd.DataFrame, current_step: str) -> Dict[str, Any]:
+    from lib.fast_stats import describe
+    basic_statistics = {col: describe(df[col]) for col in df.select_dtypes(include='number').columns}
     return {
-        "current_step": current_step,
-        "generated_code": code_template,
-        "generated_code_history": {**current_generated_code, current_step: code_template}
+        'step': 'data_quality_analysis',
+        'dataset_shape': df.shape,
+        'missing_values': {
+            col: int(len(df) - basic_statistics[col]['count']) if col in basic_statistics else int(df[col].isnull().sum())
+            for col in df.columns
+        },
+        'data_types': dict(df.dtypes),
+        'basic_statistics': basic_statistics,
+        'visualizations': []
     }
 
-def code_execution_agent(state: AnalysisState) -> Dict[str, Any]:
-    """Execute the generated Python code safely"""
-    current_step = state['current_step']
-    generated_code = state['generated_code']
+def _direct_behavior(df: pd.DataFrame, current_step: str) -> Dict[str, Any]:
+    from lib.fast_stats import summarize
+    analysis_results = {
+        'step': 'user_behavior_analysis',
+        'total_users': len(df),
+        'average_age': summarize(df['age'])['mean'] if 'age' in df.columns else None,
+        'average_purchases': summarize(df['total_purchases'])['mean'] if 'total_purchases' in df.columns else None,
+        'average_browsing_time': summarize(df['browsing_time_minutes'])['mean'] if 'browsing_time_minutes' in df.columns else None,
+        'visualizations': []
+    }
+    if 'total_purchases' in df.columns and 'browsing_time_minutes' in df.columns:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        os.makedirs(PLOTS_DIR, exist_ok=True)
+        plt.figure(figsize=(10, 6))
+        plt.hexbin(df['total_purchases'], df['browsing_time_minutes'], gridsize=40, cmap='viridis', mincnt=1)
+        plt.colorbar(label='Users')
+        plt.xlabel('Total Purchases')
+        plt.ylabel('Browsing Time (minutes)')
+        plt.title('User Behavior: Purchases vs Browsing Time')
+        plt.savefig(os.path.join(PLOTS_DIR, 'behavior_analysis.png'), dpi=150, bbox_inches='tight')
+        plt.close()
+        analysis_results['visualizations'].append('plots/behavior_analysis.png')
+    return analysis_results
+
+def _direct_purchase(df: pd.DataFrame, current_step: str) -> Dict[str, Any]:
+    from lib.fast_stats import summarize, describe
+    purchase_stats = describe(df['total_purchases']) if 'total_purchases' in df.columns else None
+    return {
+        'step': 'purchase_pattern_analysis',
+        'total_purchases': summarize(df['total_purchases'])['sum'] if purchase_stats else None,
+        'max_purchases': purchase_stats['max'] if purchase_stats else None,
+        'purchase_distribution': purchase_stats,
+        'visualizations': []
+    }
+
+def _direct_viz(df: pd.DataFrame, current_step: str) -> Dict[str, Any]:
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    analysis_results = {'step': 'visualization_generation', 'visualizations': []}
+    os.makedirs(PLOTS_DIR, exist_ok=True)
+    # One figure reused for every chart: a single canvas instead of one per plot
+    with plt.rc_context({'path.simplify_threshold': 1.0}):
+        fig, ax = plt.subplots(figsize=(8, 6))
+        try:
+            if 'age' in df.columns:
+                ax.clear()
+                ax.hist(df['age'], bins=10, alpha=0.7, color='skyblue')
+                ax.set_xlabel('Age')
+                ax.set_ylabel('Frequency')
+                ax.set_title('User Age Distribution')
+                fig.savefig(os.path.join(PLOTS_DIR, 'age_distribution.png'), dpi=150, bbox_inches='tight')
+                analysis_results['visualizations'].append('plots/age_distribution.png')
+            
+            if 'total_purchases' in df.columns:
+                ax.clear()
+                ax.hist(df['total_purchases'].dropna(), bins=50, color='lightgreen', alpha=0.7)
+                ax.set_xlabel('Total Purchases')
+                ax.set_ylabel('User Count')
+                ax.set_title('Purchase Distribution')
+                fig.savefig(os.path.join(PLOTS_DIR, 'purchase_distribution.png'), dpi=150, bbox_inches='tight')
+                analysis_results['visualizations'].append('plots/purchase_distribution.png')
+        finally:
+            plt.close(fig)
+    return analysis_results
+
+def _direct_generic(df: pd.DataFrame, current_step: str) -> Dict[str, Any]:
+    return {
+        'step': current_step,
+        'summary': f'Analysis completed for {current_step}',
+        'insights': {
+            'total_users': len(df),
+            'columns_analyzed': list(df.columns)
+        },
+        'visualizations': []
+    }
+
+DIRECT_STEPS = {
+    "quality": _direct_quality,
+    "behavior": _direct_behavior,
+    "purchase": _direct_purchase,
+    "viz": _direct_viz,
+    "generic": _direct_generic,
+}
+
+def can_execute_in_process() -> bool:
+    """In-process execution needs SIGALRM for its timeout, which only the main thread on POSIX can use.
+    Streamlit runs scripts in ScriptRunner threads, so the app always takes the subprocess path;
+    only the CLI (run_agent from __main__) executes in-process."""
+    return hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread()
+
+def strip_dataset_reads(code: str, dataset_path: str) -> str:
+    """Replace `x = pd.read_csv(<dataset>)` lines with the sandbox's (already copied) df"""
+    dataset_name = re.escape(os.path.basename(dataset_path))
+    pattern = re.compile(rf"^(\s*)(\w+)\s*=\s*pd\.read_csv\(.*{dataset_name}.*\)\s*$", re.MULTILINE)
+    return pattern.sub(r"\1\2 = df", code)
+
+# Relative path literals ('../outputs/...', './x') in generated code
+_RELATIVE_PATH_LITERAL = re.compile(r"""(?<![\w'"])([rR]?['"])(\.\.?/)""")
+
+def anchor_relative_paths(code: str) -> str:
+    """Point relative path literals at src/, where the subprocess path runs generated code"""
+    src_dir = os.path.dirname(os.path.abspath(__file__)).replace('\\', '/')
+    return _RELATIVE_PATH_LITERAL.sub(lambda m: f"{m.group(1)}{src_dir}/{m.group(2)}", code)
+
+def execute_in_process(state: AnalysisState, code: str, step: str):
+    """exec generated code against the in-memory dataset; returns (stdout, analysis_results).
     
-    print(f"⚡ Code Execution Agent: Running code for '{current_step}'")
+    Main thread only (see can_execute_in_process): the SIGALRM timer and the stdout
+    redirect are process-wide. The working directory is left alone; relative paths in
+    the code are rewritten against src/ instead.
+    """
+    import matplotlib
+    matplotlib.use("Agg")  # plots are only ever written to files
+    import matplotlib.pyplot as plt
+    
+    sandbox = {
+        'pd': pd, 'plt': plt, 'np': np, 'os': os,
+        'df': state['dataset'].copy(),
+        '__name__': '__sandbox__'
+    }
+    stdout = io.StringIO()
+    
+    def on_timeout(signum, frame):
+        raise TimeoutError(f"Code execution timeout for {step}")
+    
+    code = anchor_relative_paths(strip_dataset_reads(code, state['dataset_path']))
+    previous_handler = signal.signal(signal.SIGALRM, on_timeout)
+    try:
+        signal.setitimer(signal.ITIMER_REAL, EXECUTION_TIMEOUT)
+        with contextlib.redirect_stdout(stdout):
+            exec(compile(code, f'<{step}>', 'exec'), sandbox)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+        plt.close('all')
+    return stdout.getvalue(), sandbox.get('analysis_results')
+
+def execute_in_subprocess(code: str):
+    """Run generated code in a fresh interpreter; returns (returncode, stdout, stderr)"""
+    # Create a temporary file with the generated code
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False, encoding='utf-8') as f:
+        f.write(code)
+        temp_file = f.name
     
     try:
-        # Create a temporary file with the generated code
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False, encoding='utf-8') as f:
-            f.write(generated_code)
-            temp_file = f.name
-        
-        # Execute the code in a subprocess
         result = subprocess.run(
             ['python', temp_file], 
             capture_output=True, 
             text=True, 
             cwd=os.path.dirname(__file__),
-            timeout=30
+            timeout=EXECUTION_TIMEOUT
         )
-        
+    finally:
         # Clean up temporary file
         os.unlink(temp_file)
+    return result.returncode, result.stdout, result.stderr
+
+def code_execution_agent(state: AnalysisState) -> Dict[str, Any]:
+    """Execute the generated Python code safely"""
+    current_step = state['current_step']
+    generated_code = state['generated_code']
+    
+    print(f"⚡ Code Execution Agent: Running code for '{current_step}'")
+    
+    analysis_results = None
+    direct_step = DIRECT_STEPS.get(state.get('direct_step_kind'))
+    try:
+        if direct_step is not None:
+            # Fallback template: compute its aggregates on the loaded frame, nothing to exec
+            try:
+                analysis_results = direct_step(state['dataset'], current_step)
+                returncode, output, stderr = 0, f"{current_step} computed directly\n", ""
+            except Exception:
+                returncode, output, stderr = 1, "", traceback.format_exc()
+        elif can_execute_in_process():
+            # No interpreter start-up, no re-imports and no CSV re-parse per step
+            try:
+                output, analysis_results = execute_in_process(state, generated_code, current_step)
+                returncode, stderr = 0, ""
+            except TimeoutError:
+                raise
+            except (Exception, SystemExit):
+                returncode, output, stderr = 1, "", traceback.format_exc()
+        else:
+            returncode, output, stderr = execute_in_subprocess(generated_code)
         
-        if result.returncode == 0:
+        if returncode == 0:
             print(f"✅ Code execution successful for {current_step}")
             
             execution_results = {
                 'step': current_step,
-                'output': result.stdout,
+                'output': output,
                 'status': 'success'
             }
+            if analysis_results is not None:
+                execution_results['analysis_results'] = analysis_results
             
             return {
-                "execution_results": {**state.get('execution_results', {}), current_step: execution_results},
-                "current_insights": {**state.get('current_insights', {}), current_step: execution_results}
+                "execution_results": {current_step: execution_results},
+                "current_insights": {current_step: execution_results}
             }
         else:
-            error_msg = f"Execution failed: {result.stderr}"
+            error_msg = f"Execution failed: {stderr}"
             print(f"❌ {error_msg}")
             return {
-                "error_log": state.get('error_log', []) + [error_msg],
-                "execution_results": {**state.get('execution_results', {}), current_step: {'status': 'failed', 'error': error_msg}}
+                "error_log": [error_msg],
+                "execution_results": {current_step: {'status': 'failed', 'error': error_msg}}
             }
             
-    except subprocess.TimeoutExpired:
+    except (subprocess.TimeoutExpired, TimeoutError):
         error_msg = f"Code execution timeout for {current_step}"
         print(f"❌ {error_msg}")
         return {
-            "error_log": state.get('error_log', []) + [error_msg],
-            "execution_results": {**state.get('execution_results', {}), current_step: {'status': 'timeout'}}
+            "error_log": [error_msg],
+            "execution_results": {current_step: {'status': 'timeout'}}
         }
     except Exception as e:
         error_msg = f"Execution error: {str(e)}"
         print(f"❌ {error_msg}")
         return {
-            "error_log": state.get('error_log', []) + [error_msg],
-            "execution_results": {**state.get('execution_results', {}), current_step: {'status': 'error'}}
+            "error_log": [error_msg],
+            "execution_results": {current_step: {'status': 'error'}}
         }
 
 def progress_tracker_agent(state: AnalysisState) -> Dict[str, Any]:
@@ -388,14 +785,14 @@ def progress_tracker_agent(state: AnalysisState) -> Dict[str, Any]:
     completed_steps = state.get('completed_steps', [])
     
     if current_step and current_step not in completed_steps:
-        # Mark current step as completed
-        new_completed = completed_steps + [current_step]
+        # Mark current step as completed (appended by the completed_steps reducer)
+        completed_count = len(completed_steps) + 1
         new_plan = analysis_plan[1:] if analysis_plan else []
         
-        print(f"📈 Progress: Completed {len(new_completed)}/{len(new_completed + new_plan)} steps")
+        print(f"📈 Progress: Completed {completed_count}/{completed_count + len(new_plan)} steps")
         
         return {
-            "completed_steps": new_completed,
+            "completed_steps": [current_step],
             "analysis_plan": new_plan,
             "current_step": ""  # Reset for next step
         }
@@ -466,57 +863,52 @@ def reporting_agent(state: AnalysisState) -> Dict[str, Any]:
 
 def should_continue(state: AnalysisState) -> str:
     """Conditional routing based on state"""
-    print(f"🔀 Checking next step... Plan: {state.get('analysis_plan', [])}, Completed: {state.get('completed_steps', [])}")
-    
     if state.get('final_report'):
-        print("➡️ Moving to END (final report ready)")
-        return "end"
-    
-    analysis_plan = state.get('analysis_plan', [])
-    
-    if analysis_plan:
-        if state.get('current_step'):
-            print("➡️ Moving to EXECUTE (code generated)")
-            return "execute"
-        else:
-            print("➡️ Moving to GENERATE_CODE (next step in plan)")
-            return "generate_code"
+        route = "end"
+    elif not state.get('analysis_plan'):
+        route = "report"
     else:
-        print("➡️ Moving to REPORT (analysis complete)")
-        return "report"
+        route = "execute" if state.get('current_step') else "generate_code"
+    logger.debug("Routing to %s (plan: %s)", route, state.get('analysis_plan'))
+    return route
 
-def run_agent():
-    """Main agent execution function"""
-    setup_environment()
-    
-    # Load dataset
-    data_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'user_personalized_features.csv')
-    try:
+def load_dataset(data_path: str) -> pd.DataFrame:
+    """Read the analysis CSV (Arrow parser and dtypes when pyarrow is installed), then slim it"""
+    if not PYARROW_AVAILABLE:
         data = pd.read_csv(data_path)
-        print(f"✅ Dataset loaded: {data.shape[0]} users, {data.shape[1]} attributes")
-    except Exception as e:
-        print(f"❌ Error loading dataset: {e}")
-        return
-    
-    # Initialize state with proper dictionary for generated_code
-    initial_state: AnalysisState = {
-        "dataset": data,
-        "dataset_path": data_path,
-        "analysis_plan": [],
-        "current_step": "",
-        "completed_steps": [],
-        "generated_code": {},  # Ensure this starts as a dictionary
-        "execution_results": {},
-        "current_insights": {},
-        "final_report": None,
-        "error_log": []
-    }
+    else:
+        read_kwargs = {'engine': 'pyarrow', 'dtype_backend': 'pyarrow'}
+        # A known schema next to the data skips type inference entirely
+        schema_path = os.path.join(os.path.dirname(data_path), 'schema.json')
+        if os.path.exists(schema_path):
+            with open(schema_path, 'r', encoding='utf-8') as f:
+                read_kwargs['dtype'] = json.load(f)
+        data = pd.read_csv(data_path, **read_kwargs)
+    return slim_dataset(data)
+
+def slim_dataset(data: pd.DataFrame) -> pd.DataFrame:
+    """With PROJECT_SLIM=1, drop string columns the fallback analyses never read and
+    down-cast numeric columns to the smallest dtype that holds them. Off by default:
+    generated code multiplies columns, and a down-cast int8 product overflows."""
+    if os.getenv("PROJECT_SLIM") != "1":
+        return data
+    numeric = set(data.select_dtypes(include='number').columns)
+    data = data[[col for col in data.columns if col in numeric or col in KNOWN_ANALYTIC_COLUMNS]]
+    for col in data.select_dtypes(include='integer').columns:
+        data[col] = pd.to_numeric(data[col], downcast='integer')
+    for col in data.select_dtypes(include='floating').columns:
+        data[col] = pd.to_numeric(data[col], downcast='float')
+    return data
+
+def _build_app():
+    """Build and compile the analysis graph"""
+    from langgraph.graph import StateGraph, END
     
-    # Build the true LLM-driven graph
     workflow = StateGraph(AnalysisState)
     
     # Add agents
     workflow.add_node("planner", planning_agent)
+    workflow.add_node("bulk_code_generator", bulk_code_generator)
     workflow.add_node("code_generator", code_generation_agent)
     workflow.add_node("executor", code_execution_agent)
     workflow.add_node("progress_tracker", progress_tracker_agent)
@@ -526,9 +918,20 @@ def run_agent():
     workflow.set_entry_point("planner")
     
     # Proper conditional edges configuration
+    # plan -> generate all code at once -> loop(generate/execute/progress) -> report
     workflow.add_conditional_edges(
         "planner",
         should_continue,
+        {
+            "generate_code": "bulk_code_generator",
+            "report": "reporter",
+            "end": END
+        }
+    )
+    
+    workflow.add_conditional_edges(
+        "bulk_code_generator",
+        should_continue,
         {
             "generate_code": "code_generator",
             "report": "reporter",
@@ -551,8 +954,61 @@ def run_agent():
     
     workflow.add_edge("reporter", END)
     
-    # Compile and run
-    app = workflow.compile()
+    return workflow.compile()
+
+_APP = None
+
+def get_app():
+    """Compiled graph, built on first use and reused by every run_agent call"""
+    global _APP
+    if _APP is None:
+        _APP = _build_app()
+    return _APP
+
+def describe_dataset(data: pd.DataFrame):
+    """Return (dataset_info_str, sample_str) for the agent prompts"""
+    # Sorted so the prompts (and their LLM cache keys) are stable
+    dtypes = sorted((str(col), str(dtype)) for col, dtype in data.dtypes.items())
+    dataset_info_str = f"Shape: {data.shape}, Columns: {[col for col, _ in dtypes]}, Dtypes: {dict(dtypes)}"
+    return dataset_info_str, data.head(3).to_string()
+
+def run_agent(use_cache: bool = True, on_code_token: Optional[Callable[[str, str], None]] = None):
+    """Main agent execution function (use_cache=False bypasses the LLM response cache;
+    on_code_token(step, token) receives code as it streams from the LLM)"""
+    setup_environment()
+    enable_llm_cache(use_cache)
+    
+    # Load dataset
+    data_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'user_personalized_features.csv')
+    try:
+        data = load_dataset(data_path)
+        print(f"✅ Dataset loaded: {data.shape[0]} users, {data.shape[1]} attributes")
+        dataset_info_str, sample_str = describe_dataset(data)
+    except Exception as e:
+        print(f"❌ Error loading dataset: {e}")
+        return
+    
+    # Initialize state with proper dictionary for generated_code
+    initial_state: AnalysisState = {
+        "dataset": data,
+        "dataset_path": data_path,
+        "analysis_plan": [],
+        "current_step": "",
+        "completed_steps": [],
+        "generated_code": {},  # Ensure this starts as a dictionary
+        "pregenerated_code": {},
+        "direct_step_kind": None,
+        "dataset_info_str": dataset_info_str,
+        "sample_str": sample_str,
+        "execution_results": {},
+        "current_insights": {},
+        "final_report": None,
+        "error_log": [],
+        "on_code_token": on_code_token
+    }
+    
+    # Run the shared compiled graph
+    app = get_app()
     
     print("🚀 Starting TRUE LLM-Powered LangGraph Agent...")
     print("💡 This system uses LLM to generate and execute Python code dynamically!")
@@ -1,18 +1,60 @@
 import sys
+import time
+import threading
+from collections import OrderedDict
 from pathlib import Path
 DESKTOP = Path.home() / "Desktop"
 if str(DESKTOP) not in sys.path:
     sys.path.insert(0, str(DESKTOP))
 
+from lib.storage import find_crawl, save_crawl
+
 try:
     from web_crawler_project.crawler import crawl_site as _crawl
 except Exception as e:
     _crawl, _ERR = None, e
 
-def crawl_url(url: str) -> dict:
+# Successful crawls are reused for an hour: in memory per process, then from outputs/crawls
+CACHE_TTL = 3600
+CACHE_MAXSIZE = 256
+_cache: "OrderedDict[str, tuple]" = OrderedDict()  # url -> (expires_at, result), LRU order
+_cache_lock = threading.Lock()  # Streamlit serves each session from its own thread
+
+def _cache_get(url: str):
+    with _cache_lock:
+        hit = _cache.get(url)
+        if hit is None:
+            return None
+        if hit[0] < time.monotonic():
+            del _cache[url]
+            return None
+        _cache.move_to_end(url)
+        return hit[1]
+
+def _cache_put(url: str, result: dict):
+    with _cache_lock:
+        _cache[url] = (time.monotonic() + CACHE_TTL, result)
+        _cache.move_to_end(url)
+        while len(_cache) > CACHE_MAXSIZE:
+            _cache.popitem(last=False)
+
+def crawl_url(url: str, force: bool = False) -> dict:
+    """Crawl url, reusing a recent result unless force=True."""
+    if not force:
+        cached = _cache_get(url)
+        if cached is None:
+            cached = find_crawl(url, max_age=CACHE_TTL)
+            if cached is not None:
+                _cache_put(url, cached)
+        if cached is not None:
+            return cached
     if _crawl is None:
         return {"status":"error","error": f"crawler not importable: {_ERR}"}
     try:
-        return _crawl(url)
+        result = _crawl(url)
     except Exception as e:
         return {"status":"error","error": str(e)}
+    if result.get("status") == "ok" or "title" in result:
+        save_crawl({**result, "requested_url": url})
+        _cache_put(url, result)
+    return result
@@ -0,0 +1,102 @@
+# src/lib/fast_stats.py
+"""Single-pass numeric summaries for the agent's native fallback analysis steps."""
+import importlib.util
+from functools import lru_cache
+from typing import Dict, Sequence
+
+import numpy as np
+
+# ---- Optional Numba kernels (NumPy fallback otherwise) ----
+# Only probed here: numba itself is imported, and the kernels compiled, the first time a
+# column reaches NUMBA_MIN_ROWS, so small datasets never pay the JIT start-up
+NUMBA_AVAILABLE = importlib.util.find_spec("numba") is not None
+
+# Smaller columns stay on NumPy; thread start-up costs more than the pass itself
+NUMBA_MIN_ROWS = 50_000
+
+DESCRIBE_PERCENTILES = (25.0, 50.0, 75.0)
+
+@lru_cache(maxsize=None)
+def _kernels():
+    """Build the parallel kernels on first use: (moments, sq_dev)."""
+    from numba import njit, prange
+    
+    # fastmath leaves out 'nnan' because the kernels test for NaN; cache=True keeps the
+    # compiled code on disk, so only the first process to use them pays for the JIT
+    fastmath = {'reassoc', 'contract', 'arcp'}
+    
+    @njit(parallel=True, cache=True, fastmath=fastmath)
+    def moments_kernel(arr):
+        """One parallel pass: non-NaN count, sum, min and max."""
+        count = 0
+        total = 0.0
+        lo = np.inf
+        hi = -np.inf
+        for i in prange(arr.size):
+            v = arr[i]
+            if not np.isnan(v):
+                count += 1
+                total += v
+                lo = min(lo, v)
+                hi = max(hi, v)
+        return count, total, lo, hi
+    
+    @njit(parallel=True, cache=True, fastmath=fastmath)
+    def sq_dev_kernel(arr, mean):
+        """Sum of squared deviations from mean, skipping NaN."""
+        acc = 0.0
+        for i in prange(arr.size):
+            v = arr[i]
+            if not np.isnan(v):
+                acc += (v - mean) * (v - mean)
+        return acc
+    
+    return moments_kernel, sq_dev_kernel
+
+def _as_float64(values) -> np.ndarray:
+    """Series/array -> float64 ndarray with NaN for missing (nullable and Arrow dtypes included)."""
+    if hasattr(values, "to_numpy"):
+        return values.to_numpy(dtype=np.float64, na_value=np.nan)
+    return np.asarray(values, dtype=np.float64)
+
+def _moments(arr: np.ndarray):
+    if NUMBA_AVAILABLE and arr.size >= NUMBA_MIN_ROWS:
+        return _kernels()[0](arr)
+    valid = arr[~np.isnan(arr)]
+    if valid.size == 0:
+        return 0, 0.0, np.inf, -np.inf
+    return valid.size, float(valid.sum()), float(valid.min()), float(valid.max())
+
+def _sq_dev(arr: np.ndarray, mean: float) -> float:
+    if NUMBA_AVAILABLE and arr.size >= NUMBA_MIN_ROWS:
+        return _kernels()[1](arr, mean)
+    valid = arr[~np.isnan(arr)]
+    return float(np.square(valid - mean).sum())
+
+def summarize(values) -> Dict[str, float]:
+    """count, nan_count, sum, mean, min, max of a numeric column (NaN-skipping)."""
+    arr = _as_float64(values)
+    count, total, lo, hi = _moments(arr)
+    if count == 0:
+        return {"count": 0, "nan_count": int(arr.size), "sum": 0.0,
+                "mean": np.nan, "min": np.nan, "max": np.nan}
+    return {"count": int(count), "nan_count": int(arr.size - count), "sum": float(total),
+            "mean": total / count, "min": float(lo), "max": float(hi)}
+
+def percentiles(values, qs: Sequence[float]) -> np.ndarray:
+    """Linear-interpolated percentiles (0-100) of the non-NaN values, all from one partition."""
+    arr = _as_float64(values)
+    valid = arr[~np.isnan(arr)]
+    if valid.size == 0:
+        return np.full(len(qs), np.nan)
+    return np.percentile(valid, qs)
+
+def describe(values) -> Dict[str, float]:
+    """Same keys and values as Series.describe() for a numeric column."""
+    arr = _as_float64(values)
+    stats = summarize(arr)
+    count = stats["count"]
+    std = np.sqrt(_sq_dev(arr, stats["mean"]) / (count - 1)) if count > 1 else np.nan
+    q25, q50, q75 = percentiles(arr, DESCRIBE_PERCENTILES)
+    return {"count": float(count), "mean": stats["mean"], "std": float(std), "min": stats["min"],
+            "25%": float(q25), "50%": float(q50), "75%": float(q75), "max": stats["max"]}
@@ -1,8 +1,55 @@
 # src/lib/storage.py
 from pathlib import Path
+import os
+import gzip
 import json
+import math
 from datetime import datetime, timezone
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable
+
+import numpy as np
+
+def _finite(obj: Any) -> Any:
+    """obj with non-finite floats spelled as the strings "NaN", "Infinity" and "-Infinity".
+
+    orjson would write them as null and json.dumps as bare tokens that aren't valid JSON,
+    so both writers go through this and produce the same strict JSON.
+    """
+    if isinstance(obj, dict):
+        return {k: _finite(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(v) for v in obj]
+    if isinstance(obj, (float, np.floating)):
+        if math.isfinite(obj):
+            return obj
+        return "NaN" if math.isnan(obj) else ("Infinity" if obj > 0 else "-Infinity")
+    if isinstance(obj, np.ndarray) and obj.dtype.kind == "f" and not np.isfinite(obj).all():
+        return _finite(obj.tolist())
+    return obj
+
+# ---- Optional fast JSON (de)serialization ----
+try:
+    import orjson
+    _loads = orjson.loads
+
+    def _dumps(obj: Any, pretty: bool = False) -> bytes:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(_finite(obj), option=option, default=str)
+except ImportError:
+    _loads = json.loads
+
+    def _default(obj: Any) -> Any:
+        # NumPy values as orjson's OPT_SERIALIZE_NUMPY writes them, anything else as str
+        if isinstance(obj, (np.ndarray, np.generic)):
+            return obj.tolist()
+        return str(obj)
+
+    def _dumps(obj: Any, pretty: bool = False) -> bytes:
+        return json.dumps(_finite(obj), indent=2 if pretty else None,
+                          separators=None if pretty else (",", ":"),
+                          default=_default, allow_nan=False).encode("utf-8")
 
 ROOT = Path(__file__).resolve().parents[2]  # .../langgraph_project
 RUNS = ROOT / "outputs" / "runs"
@@ -10,51 +57,133 @@ CRAWLS = ROOT / "outputs" / "crawls"
 RUNS.mkdir(parents=True, exist_ok=True)
 CRAWLS.mkdir(parents=True, exist_ok=True)
 
+# One JSON line per saved file ({"id": ..., "summary": {...}}), so listings don't open every file
+INDEX_NAME = "_index.jsonl"
+# Saved JSON larger than this is written gzipped as <id>.json.gz
+GZIP_MIN_BYTES = 1_000_000
+JSON_SUFFIXES = (".json", ".json.gz")
+
+def _parse(data: bytes) -> Any:
+    try:
+        return _loads(data)
+    except ValueError:
+        # json.dumps writes NaN/Infinity tokens (files saved before orjson), which orjson rejects
+        return json.loads(data)
+
+def _read_json(p: Path) -> Dict[str, Any]:
+    data = p.read_bytes()
+    if p.name.endswith(".gz"):
+        data = gzip.decompress(data)
+    return _parse(data)
+
+def _write_json(p: Path, data: Dict[str, Any], pretty: bool) -> Path:
+    payload = _dumps(data, pretty)
+    if len(payload) > GZIP_MIN_BYTES:
+        p = p.with_name(p.name + ".gz")
+        payload = gzip.compress(payload, compresslevel=6)
+    p.write_bytes(payload)
+    return p
+
+def _find_file(folder: Path, item_id: str) -> Optional[Path]:
+    for suffix in JSON_SUFFIXES:
+        p = folder / f"{item_id}{suffix}"
+        if p.exists():
+            return p
+    return None
+
+def _append_index(folder: Path, item_id: str, summary: Dict[str, Any]) -> None:
+    with open(folder / INDEX_NAME, "ab") as f:
+        f.write(_dumps({"id": item_id, "summary": summary}) + b"\n")
+
+def _read_index(folder: Path) -> Dict[str, Dict[str, Any]]:
+    index: Dict[str, Dict[str, Any]] = {}
+    try:
+        with open(folder / INDEX_NAME, "rb") as f:
+            for line in f:
+                try:
+                    entry = _parse(line)
+                    index[entry["id"]] = entry["summary"]
+                except Exception:
+                    continue  # torn/partial line
+    except FileNotFoundError:
+        pass
+    return index
+
+def _list_items(folder: Path, prefix: str,
+                summarize: Callable[[Dict[str, Any]], Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Newest-first listing; names embed a UTC timestamp, so name order is save order."""
+    with os.scandir(folder) as it:
+        names = sorted(e.name for e in it
+                       if e.name.startswith(prefix) and e.name.endswith(JSON_SUFFIXES) and e.is_file())
+    index = _read_index(folder)
+    items: List[Dict[str, Any]] = []
+    for name in reversed(names):
+        item_id = name[:name.rindex(".json")]
+        p = folder / name
+        summary = index.get(item_id)
+        if summary is None:
+            # Saved before the index existed (or written by hand)
+            try:
+                summary = summarize(_read_json(p))
+            except Exception:
+                summary = summarize({})
+        items.append({"id": item_id, "path": str(p), **summary})
+    return items
+
 # -------- Analysis runs --------
-def save_run(results: Dict[str, Any]) -> str:
+def _run_summary(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {"summary": data.get("key_metrics") or data.get("dataset_info") or {}}
+
+def save_run(results: Dict[str, Any], pretty: bool = False) -> str:
     ts = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
-    p = RUNS / f"run-{ts}.json"
-    p.write_text(json.dumps(results, indent=2, default=str), encoding="utf-8")
+    item_id = f"run-{ts}"
+    p = _write_json(RUNS / f"{item_id}.json", results, pretty)
+    _append_index(RUNS, item_id, _run_summary(results))
     return str(p)
 
 def list_runs() -> List[Dict[str, Any]]:
-    items: List[Dict[str, Any]] = []
-    for p in sorted(RUNS.glob("run-*.json")):
-        try:
-            data = json.loads(p.read_text(encoding="utf-8"))
-        except Exception:
-            data = {}
-        items.append({
-            "id": p.stem,
-            "path": str(p),
-            "summary": data.get("key_metrics") or data.get("dataset_info") or {}
-        })
-    return list(reversed(items))
+    return _list_items(RUNS, "run-", _run_summary)
 
 def load_run(run_id: str) -> Optional[Dict[str, Any]]:
-    p = RUNS / f"{run_id}.json"
-    return json.loads(p.read_text(encoding="utf-8")) if p.exists() else None
+    p = _find_file(RUNS, run_id)
+    return _read_json(p) if p is not None else None
 
 # -------- Crawls --------
-def save_crawl(data: Dict[str, Any]) -> str:
+def _crawl_summary(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "title": data.get("title"),
+        "url": data.get("url"),
+        "link_count": data.get("link_count", 0),
+        # URL that was asked for; "url" may be where the crawler ended up after redirects
+        "requested_url": data.get("requested_url", data.get("url")),
+    }
+
+def save_crawl(data: Dict[str, Any], pretty: bool = False) -> str:
     """Save a single crawl result as JSON and return its path."""
     ts = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
-    p = CRAWLS / f"crawl-{ts}.json"
-    p.write_text(json.dumps(data, indent=2, default=str), encoding="utf-8")
+    item_id = f"crawl-{ts}"
+    p = _write_json(CRAWLS / f"{item_id}.json", data, pretty)
+    _append_index(CRAWLS, item_id, _crawl_summary(data))
     return str(p)
 
 def list_crawls() -> List[Dict[str, Any]]:
-    items: List[Dict[str, Any]] = []
-    for p in sorted(CRAWLS.glob("crawl-*.json")):
+    return _list_items(CRAWLS, "crawl-", _crawl_summary)
+
+def load_crawl(crawl_id: str) -> Optional[Dict[str, Any]]:
+    p = _find_file(CRAWLS, crawl_id)
+    return _read_json(p) if p is not None else None
+
+def find_crawl(url: str, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """Most recent saved crawl of url, or None if there is none younger than max_age seconds."""
+    for item in list_crawls():
+        if item.get("requested_url", item["url"]) != url:
+            continue
+        if max_age is not None:
+            saved = datetime.strptime(item["id"][len("crawl-"):], "%Y%m%d-%H%M%S").replace(tzinfo=timezone.utc)
+            if (datetime.now(timezone.utc) - saved).total_seconds() > max_age:
+                return None  # newest first, so every older match is stale too
         try:
-            data = json.loads(p.read_text(encoding="utf-8"))
+            return _read_json(Path(item["path"]))
         except Exception:
-            data = {}
-        items.append({
-            "id": p.stem,
-            "path": str(p),
-            "title": data.get("title"),
-            "url": data.get("url"),
-            "link_count": data.get("link_count", 0),
-        })
-    return list(reversed(items))
+            return None
+    return None
@@ -12,14 +12,14 @@ Features:
 - Real-time alerts and notifications
 """
 
-import pandas as pd
 import numpy as np
 import time
 import threading
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, List, Any, Optional, Callable
 import json
 import queue
+from collections import deque
 from pathlib import Path
 import logging
 
@@ -28,6 +28,90 @@ from cache_manager import cached_dataframe
 
 logger = logging.getLogger(__name__)
 
+# Record fields the per-batch analysis reads
+BATCH_FIELDS = ('user_id', 'event_type', 'value')
+
+NS_PER_HOUR = 3_600_000_000_000
+
+# ---- Optional Numba kernel for the anomaly scan ----
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    njit = None
+    NUMBA_AVAILABLE = False
+
+if NUMBA_AVAILABLE:
+    # fastmath without 'nnan': a NaN value must still compare False, as it does in NumPy
+    @njit(cache=True, fastmath={'reassoc', 'contract', 'arcp'})
+    def _find_anomalies(ring, start, n, mean, std, thresh, out_idx):
+        """Fused |v - mean| > thresh*std scan over n ring slots from start; writes offsets, returns how many."""
+        limit = thresh * std
+        size = ring.size
+        k = 0
+        for j in range(n):
+            if abs(ring[(start + j) % size] - mean) > limit:
+                out_idx[k] = j
+                k += 1
+        return k
+
+class SPSCRingBuffer:
+    """Single-producer/single-consumer record queue with no locks on the steady path.
+    
+    The producer only advances ``tail`` and the consumer only advances ``head``;
+    under the GIL each index update is atomic and ordered after the slot write,
+    so neither side needs a lock. Only a consumer that finds the buffer empty
+    parks on an Event, which the producer sets after its next put. Speaks the
+    subset of the queue.Queue API the stream uses (put/get/get_nowait/qsize).
+    """
+    
+    def __init__(self, maxsize: int = 1000):
+        self.maxsize = maxsize
+        capacity = 1 << max(maxsize - 1, 1).bit_length()  # Next power of two
+        self._buffer = [None] * capacity
+        self._mask = capacity - 1
+        self._head = 0  # Consumer-owned
+        self._tail = 0  # Producer-owned
+        self._consumer_waiting = False
+        self._not_empty = threading.Event()
+    
+    def qsize(self) -> int:
+        return self._tail - self._head
+    
+    def put(self, item: Any):
+        """Append item; raises queue.Full rather than blocking the producer."""
+        tail = self._tail
+        if tail - self._head >= self.maxsize:
+            raise queue.Full
+        self._buffer[tail & self._mask] = item
+        self._tail = tail + 1
+        if self._consumer_waiting:
+            self._not_empty.set()
+    
+    def get_nowait(self) -> Any:
+        head = self._head
+        if head == self._tail:
+            raise queue.Empty
+        slot = head & self._mask
+        item = self._buffer[slot]
+        self._buffer[slot] = None  # Drop the reference for the GC
+        self._head = head + 1
+        return item
+    
+    def get(self, timeout: Optional[float] = None) -> Any:
+        """Next item, waiting up to timeout seconds; raises queue.Empty on timeout."""
+        if self._head != self._tail:
+            return self.get_nowait()
+        self._not_empty.clear()
+        self._consumer_waiting = True
+        try:
+            # Re-check after announcing the wait: a put that missed the flag is visible here
+            if self._head == self._tail:
+                self._not_empty.wait(timeout)
+        finally:
+            self._consumer_waiting = False
+        return self.get_nowait()
+
 class RealTimeDataStream:
     """Real-time data stream handler for e-commerce analytics."""
     
@@ -39,13 +123,21 @@ class RealTimeDataStream:
             stream_config: Configuration for data stream
         """
         self.config = stream_config
-        self.data_queue = queue.Queue(maxsize=stream_config.get('max_queue_size', 1000))
+        # Fields every record must carry (see _validate_record)
+        self._required_fields = frozenset(stream_config.get('required_fields', []))
+        # One producer (process_record's caller) and one consumer (the processing loop)
+        self.data_queue = SPSCRingBuffer(maxsize=stream_config.get('max_queue_size', 1000))
         self.is_running = False
         self.callbacks = []
+        # Immutable copy iterated per record; add_callback replaces it
+        self._callbacks_snapshot = ()
+        # Called with the seconds the callbacks took on each record
+        self.on_record_processed: Optional[Callable[[float], None]] = None
         self.metrics = {
             'total_records': 0,
             'processed_records': 0,
             'error_count': 0,
+            'dropped_records': 0,  # Valid records not queued because the batch queue was full
             'last_update': None,
             'processing_rate': 0
         }
@@ -53,6 +145,7 @@ class RealTimeDataStream:
     def add_callback(self, callback: Callable[[Dict[str, Any]], None]):
         """Add callback function for new data events."""
         self.callbacks.append(callback)
+        self._callbacks_snapshot = tuple(self.callbacks)
     
     def start_stream(self):
         """Start the real-time data stream."""
@@ -65,23 +158,34 @@ class RealTimeDataStream:
         logger.info("Real-time data stream stopped")
     
     def process_record(self, record: Dict[str, Any]):
-        """Process a single data record."""
+        """Process a single data record.
+        
+        Must only be called from one thread at a time: data_queue is a
+        single-producer ring, and concurrent producers would lose records.
+        """
         try:
             self.metrics['total_records'] += 1
             
             # Validate record
             if self._validate_record(record):
-                # Add to queue
-                self.data_queue.put(record)
+                # Queue for batch analysis; when the consumer lags, the batch view
+                # drops the record but the per-record modules below still see it
+                try:
+                    self.data_queue.put(record)
+                except queue.Full:
+                    self.metrics['dropped_records'] += 1
                 self.metrics['processed_records'] += 1
                 
                 # Notify callbacks
-                for callback in self.callbacks:
+                start_ns = time.perf_counter_ns()
+                for callback in self._callbacks_snapshot:
                     try:
                         callback(record)
                     except Exception as e:
                         logger.error(f"Callback error: {e}")
-                        
+                if self.on_record_processed is not None:
+                    self.on_record_processed((time.perf_counter_ns() - start_ns) / 1e9)
+                
             else:
                 self.metrics['error_count'] += 1
                 
@@ -91,8 +195,8 @@ class RealTimeDataStream:
     
     def _validate_record(self, record: Dict[str, Any]) -> bool:
         """Validate incoming data record."""
-        required_fields = self.config.get('required_fields', [])
-        return all(field in record for field in required_fields)
+        # Set comparison against the dict's key view runs in C, one hash lookup per field
+        return record.keys() >= self._required_fields
     
     def get_metrics(self) -> Dict[str, Any]:
         """Get current stream metrics."""
@@ -132,9 +236,12 @@ class RealTimeAnalytics:
             'performance_monitor': PerformanceMonitor()
         }
         
-        # Set up callbacks
+        # Set up callbacks; the performance monitor times the others rather than seeing records
+        performance_monitor = self.modules['performance_monitor']
         for module in self.modules.values():
-            self.data_stream.add_callback(module.process_record)
+            if module is not performance_monitor:
+                self.data_stream.add_callback(module.process_record)
+        self.data_stream.on_record_processed = performance_monitor.record_processing_time
     
     @handle_errors
     def start_analytics(self):
@@ -165,9 +272,6 @@ class RealTimeAnalytics:
                 # Update real-time metrics
                 self._update_real_time_metrics()
                 
-                # Sleep for processing interval
-                time.sleep(self.stream_config['processing_interval'])
-                
             except Exception as e:
                 logger.error(f"Error in processing loop: {e}")
                 time.sleep(1)  # Brief pause on error
@@ -175,68 +279,78 @@ class RealTimeAnalytics:
     def _process_batch_data(self):
         """Process batch of accumulated data."""
         batch_size = self.stream_config.get('batch_size', 100)
-        batch_data = []
+        data_queue = self.data_stream.data_queue
+        
+        # Block until the first record arrives (or the interval passes), then take
+        # whatever else is already queued, so a batch is processed as soon as it exists
+        try:
+            batch_data = [data_queue.get(timeout=self.stream_config['processing_interval'])]
+        except queue.Empty:
+            return
         
         # Collect batch data
-        for _ in range(batch_size):
+        while len(batch_data) < batch_size:
             try:
-                record = self.data_stream.data_queue.get_nowait()
-                batch_data.append(record)
+                batch_data.append(data_queue.get_nowait())
             except queue.Empty:
                 break
         
-        if batch_data:
-            # Process batch
-            self._analyze_batch(batch_data)
+        # Column lists of just the fields the batch analysis reads (no DataFrame build)
+        batch_columns = {field: [record.get(field) for record in batch_data] for field in BATCH_FIELDS}
+        self._analyze_batch(batch_columns, len(batch_data))
     
-    def _analyze_batch(self, batch_data: List[Dict[str, Any]]):
+    def _analyze_batch(self, batch_columns: Dict[str, List[Any]], record_count: int):
         """Analyze batch of data for insights."""
         try:
-            df = pd.DataFrame(batch_data)
-            
             # Real-time analysis
-            self._update_user_activity(df)
-            self._detect_purchase_patterns(df)
-            self._check_for_anomalies(df)
-            self._update_performance_metrics(df)
+            self._update_user_activity(batch_columns)
+            self._detect_purchase_patterns(batch_columns)
+            self._check_for_anomalies(batch_columns)
+            self._update_performance_metrics(record_count)
             
         except Exception as e:
             logger.error(f"Error analyzing batch: {e}")
     
-    def _update_user_activity(self, df: pd.DataFrame):
+    def _update_user_activity(self, batch_columns: Dict[str, List[Any]]):
         """Update user activity metrics."""
-        if 'user_id' in df.columns:
-            active_users = df['user_id'].nunique()
-            self.real_time_metrics['active_users'] = active_users
+        user_ids = {user_id for user_id in batch_columns['user_id'] if user_id is not None}
+        if user_ids:
+            self.real_time_metrics['active_users'] = len(user_ids)
             self.real_time_metrics['activity_timestamp'] = datetime.now()
     
-    def _detect_purchase_patterns(self, df: pd.DataFrame):
+    def _detect_purchase_patterns(self, batch_columns: Dict[str, List[Any]]):
         """Detect real-time purchase patterns."""
-        if 'event_type' in df.columns:
-            purchase_events = df[df['event_type'] == 'purchase']
-            if not purchase_events.empty:
-                self.real_time_metrics['purchases_last_interval'] = len(purchase_events)
-                self.real_time_metrics['purchase_timestamp'] = datetime.now()
+        purchase_count = batch_columns['event_type'].count('purchase')
+        if purchase_count:
+            self.real_time_metrics['purchases_last_interval'] = purchase_count
+            self.real_time_metrics['purchase_timestamp'] = datetime.now()
     
-    def _check_for_anomalies(self, df: pd.DataFrame):
+    def _check_for_anomalies(self, batch_columns: Dict[str, List[Any]]):
         """Check for real-time anomalies."""
         # Simple anomaly detection for real-time
-        if 'value' in df.columns:
-            values = df['value'].dropna()
-            if len(values) > 10:
-                mean_val = values.mean()
-                std_val = values.std()
-                
-                # Flag values beyond 3 standard deviations
-                anomalies = values[abs(values - mean_val) > 3 * std_val]
-                
-                if not anomalies.empty:
-                    self.real_time_metrics['anomalies_detected'] = len(anomalies)
-                    self.real_time_metrics['anomaly_timestamp'] = datetime.now()
+        values = np.fromiter((v for v in batch_columns['value'] if v is not None), dtype=np.float64)
+        values = values[~np.isnan(values)]
+        n = len(values)
+        if n > 10:
+            # Sample std from the deviations (one dot product); sum of squares minus
+            # total*mean cancels to zero for large values with a small spread
+            mean_val = float(values.sum()) / n
+            deviations = values - mean_val
+            std_val = np.sqrt(float(np.dot(deviations, deviations)) / (n - 1))
+            
+            # Flag values beyond 3 standard deviations
+            if NUMBA_AVAILABLE:
+                anomaly_count = _find_anomalies(values, 0, n, mean_val, std_val, 3.0, np.empty(n, dtype=np.int64))
+            else:
+                anomaly_count = int(np.count_nonzero(np.abs(deviations) > 3 * std_val))
+            
+            if anomaly_count:
+                self.real_time_metrics['anomalies_detected'] = anomaly_count
+                self.real_time_metrics['anomaly_timestamp'] = datetime.now()
     
-    def _update_performance_metrics(self, df: pd.DataFrame):
+    def _update_performance_metrics(self, record_count: int):
         """Update performance metrics."""
-        self.real_time_metrics['records_processed'] = len(df)
+        self.real_time_metrics['records_processed'] = record_count
         self.real_time_metrics['processing_timestamp'] = datetime.now()
     
     def _update_real_time_metrics(self):
@@ -265,43 +379,56 @@ class RealTimeAnalytics:
 class UserActivityTracker:
     """Track real-time user activity patterns."""
     
-    def __init__(self):
-        self.activity_data = {}
+    def __init__(self, initial_capacity: int = 1024):
+        # Per-user columns indexed by an interned position, so "active in the last
+        # N minutes" is one vectorized compare instead of a walk over per-user dicts
+        self.id_to_idx: Dict[Any, int] = {}
+        self.user_ids: List[Any] = []  # Position -> user_id
+        self.first_seen_ns = np.empty(initial_capacity, dtype=np.int64)
+        self.last_seen_ns = np.empty(initial_capacity, dtype=np.int64)
+        self.activity_count = np.zeros(initial_capacity, dtype=np.int32)
         self.session_tracker = {}
     
+    def _grow(self):
+        """Double the per-user arrays (amortized O(1) per new user)."""
+        capacity = self.last_seen_ns.size * 2
+        for name in ('first_seen_ns', 'last_seen_ns', 'activity_count'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:old.size] = old
+            setattr(self, name, new)
+    
     def process_record(self, record: Dict[str, Any]):
         """Process user activity record."""
         user_id = record.get('user_id')
         if user_id:
-            # Update activity data
-            current_time = datetime.now()
+            # Update activity data (epoch ns: no datetime object per record)
+            current_ns = time.time_ns()
             
-            if user_id not in self.activity_data:
-                self.activity_data[user_id] = {
-                    'first_seen': current_time,
-                    'last_seen': current_time,
-                    'activity_count': 0,
-                    'sessions': []
-                }
+            idx = self.id_to_idx.get(user_id)
+            if idx is None:
+                idx = len(self.user_ids)
+                if idx == self.last_seen_ns.size:
+                    self._grow()
+                self.id_to_idx[user_id] = idx
+                self.user_ids.append(user_id)
+                self.first_seen_ns[idx] = current_ns
             
-            self.activity_data[user_id]['last_seen'] = current_time
-            self.activity_data[user_id]['activity_count'] += 1
+            self.last_seen_ns[idx] = current_ns
+            self.activity_count[idx] += 1
     
     def get_active_users(self, minutes: int = 5) -> List[str]:
         """Get users active in the last N minutes."""
-        cutoff_time = datetime.now() - timedelta(minutes=minutes)
-        
-        active_users = []
-        for user_id, data in self.activity_data.items():
-            if data['last_seen'] > cutoff_time:
-                active_users.append(user_id)
+        cutoff_ns = time.time_ns() - minutes * 60_000_000_000
         
-        return active_users
+        active_idx = np.flatnonzero(self.last_seen_ns[:len(self.user_ids)] > cutoff_ns)
+        return [self.user_ids[i] for i in active_idx]
     
     def get_user_stats(self) -> Dict[str, Any]:
         """Get user activity statistics."""
-        total_users = len(self.activity_data)
-        active_users = len(self.get_active_users(5))
+        total_users = len(self.user_ids)
+        cutoff_ns = time.time_ns() - 5 * 60_000_000_000
+        active_users = int(np.count_nonzero(self.last_seen_ns[:total_users] > cutoff_ns))
         
         return {
             'total_users': total_users,
@@ -312,51 +439,85 @@ class UserActivityTracker:
 class PurchaseTracker:
     """Track real-time purchase patterns."""
     
-    def __init__(self):
-        self.purchase_data = []
-        self.revenue_tracker = {}
+    REVENUE_HOURS = 64  # Hourly revenue buckets kept (power of two)
+    
+    def __init__(self, max_history_size: int = 100_000):
+        self.max_history_size = max_history_size
+        # Column-per-field ring buffer: time filters are a searchsorted on int64
+        # timestamps and revenue is one NumPy reduction, with no per-purchase dicts
+        self.timestamp_ns = np.empty(max_history_size, dtype=np.int64)
+        self.amount = np.empty(max_history_size, dtype=np.float64)
+        self.user_id = np.empty(max_history_size, dtype=object)
+        self.product_id = np.empty(max_history_size, dtype=object)
+        self.head = 0  # Next slot to write
+        self.count = 0  # Filled slots
+        # Revenue per epoch hour for the last REVENUE_HOURS hours: slot = hour & mask,
+        # and a slot whose hour id is stale belongs to an older hour and is reset
+        self.revenue_by_hour = np.zeros(self.REVENUE_HOURS, dtype=np.float64)
+        self.hour_ids = np.full(self.REVENUE_HOURS, -1, dtype=np.int64)
     
     def process_record(self, record: Dict[str, Any]):
         """Process purchase record."""
         if record.get('event_type') == 'purchase':
-            self.purchase_data.append({
-                'timestamp': datetime.now(),
-                'user_id': record.get('user_id'),
-                'amount': record.get('amount', 0),
-                'product_id': record.get('product_id')
-            })
+            amount = record.get('amount', 0)
+            now_ns = time.time_ns()
+            slot = self.head
+            self.timestamp_ns[slot] = now_ns
+            self.amount[slot] = amount
+            self.user_id[slot] = record.get('user_id')
+            self.product_id[slot] = record.get('product_id')
+            self.head = (slot + 1) % self.max_history_size
+            self.count = min(self.count + 1, self.max_history_size)
             
             # Track revenue by time
-            current_hour = datetime.now().replace(minute=0, second=0, microsecond=0)
-            if current_hour not in self.revenue_tracker:
-                self.revenue_tracker[current_hour] = 0
-            
-            self.revenue_tracker[current_hour] += record.get('amount', 0)
+            hour = now_ns // NS_PER_HOUR
+            hour_slot = hour & (self.REVENUE_HOURS - 1)
+            if self.hour_ids[hour_slot] != hour:
+                self.hour_ids[hour_slot] = hour
+                self.revenue_by_hour[hour_slot] = 0.0
+            self.revenue_by_hour[hour_slot] += amount
+    
+    def _recent_slots(self, minutes: int) -> np.ndarray:
+        """Buffer slots (oldest first) of purchases newer than N minutes ago."""
+        cutoff_ns = time.time_ns() - minutes * 60 * 1_000_000_000
+        # Oldest-first, the buffer is two sorted runs: [head, count) then [0, head)
+        runs = [(0, self.count)] if self.count < self.max_history_size else \
+               [(self.head, self.max_history_size), (0, self.head)]
+        slots = []
+        for start, stop in runs:
+            first = start + np.searchsorted(self.timestamp_ns[start:stop], cutoff_ns, side='right')
+            slots.append(np.arange(first, stop))
+        return np.concatenate(slots)
     
     def get_recent_purchases(self, minutes: int = 60) -> List[Dict[str, Any]]:
         """Get purchases from the last N minutes."""
-        cutoff_time = datetime.now() - timedelta(minutes=minutes)
+        slots = self._recent_slots(minutes)
         
         recent_purchases = [
-            p for p in self.purchase_data 
-            if p['timestamp'] > cutoff_time
+            {
+                'timestamp': datetime.fromtimestamp(self.timestamp_ns[i] / 1e9),
+                'user_id': self.user_id[i],
+                'amount': float(self.amount[i]),
+                'product_id': self.product_id[i]
+            }
+            for i in slots
         ]
         
         return recent_purchases
     
     def get_revenue_stats(self) -> Dict[str, Any]:
         """Get revenue statistics."""
-        recent_purchases = self.get_recent_purchases(60)
+        recent_amounts = self.amount[self._recent_slots(60)]
         
-        if not recent_purchases:
+        if recent_amounts.size == 0:
             return {
                 'revenue_1hour': 0,
                 'purchase_count_1hour': 0,
                 'avg_purchase_value': 0
             }
         
-        total_revenue = sum(p['amount'] for p in recent_purchases)
-        purchase_count = len(recent_purchases)
+        total_revenue = float(recent_amounts.sum())
+        purchase_count = int(recent_amounts.size)
         
         return {
             'revenue_1hour': total_revenue,
@@ -368,42 +529,87 @@ class RealTimeAnomalyDetector:
     """Detect anomalies in real-time data streams."""
     
     def __init__(self):
-        self.value_history = []
         self.anomaly_threshold = 3.0  # Standard deviations
         self.max_history_size = 1000
+        # Ring buffer of the latest values plus a sliding-window Welford mean and
+        # M2 (sum of squared deviations), so mean and std cost O(1) per call instead
+        # of a rescan, without the cancellation of sumsq/n - mean^2 on large values
+        self.value_history = np.empty(self.max_history_size, dtype=np.float64)
+        self.head = 0  # Next slot to write
+        self.count = 0  # Filled slots
+        self.value_mean = 0.0
+        self.value_m2 = 0.0
+        self.total_seen = 0  # Values recorded since start
+        self.last_checked = 0  # total_seen at the last detect_anomalies scan
+        self._anomaly_offsets = np.empty(self.max_history_size, dtype=np.int64)
+        
+        if NUMBA_AVAILABLE:
+            # Compile (or load from cache) now rather than on the first live scan
+            _find_anomalies(np.zeros(2), 0, 2, 0.0, 1.0, self.anomaly_threshold, self._anomaly_offsets)
     
     def process_record(self, record: Dict[str, Any]):
         """Process record for anomaly detection."""
         value = record.get('value')
         if value is not None:
-            self.value_history.append(value)
+            value = float(value)
+            old_mean = self.value_mean
+            if self.count == self.max_history_size:
+                # Window full: value replaces the evicted one, count stays the same
+                evicted = float(self.value_history[self.head])
+                self.value_mean = old_mean + (value - evicted) / self.count
+                self.value_m2 += (value - evicted) * (value - self.value_mean + evicted - old_mean)
+            else:
+                self.count += 1
+                self.value_mean = old_mean + (value - old_mean) / self.count
+                self.value_m2 += (value - old_mean) * (value - self.value_mean)
             
-            # Keep history size manageable
-            if len(self.value_history) > self.max_history_size:
-                self.value_history = self.value_history[-self.max_history_size:]
+            self.value_history[self.head] = value
+            self.head = (self.head + 1) % self.max_history_size
+            self.total_seen += 1
+            
+            # Recompute once per lap so update rounding error can't accumulate
+            if self.head == 0:
+                self.value_mean = float(self.value_history.mean())
+                deviations = self.value_history - self.value_mean
+                self.value_m2 = float(np.dot(deviations, deviations))
     
     def detect_anomalies(self) -> List[Dict[str, Any]]:
-        """Detect anomalies in current data."""
-        if len(self.value_history) < 10:
+        """Detect anomalies among values recorded since the previous call.
+        
+        Each call consumes the values it scans: a second caller (or a second
+        call) only sees values recorded after the first, so there should be a
+        single consumer of these results.
+        """
+        if self.count < 10:
             return []
         
-        values = np.array(self.value_history)
-        mean_val = np.mean(values)
-        std_val = np.std(values)
+        new_count = min(self.total_seen - self.last_checked, self.count)
+        self.last_checked = self.total_seen
         
-        if std_val == 0:
+        mean_val = self.value_mean
+        std_val = np.sqrt(max(self.value_m2, 0.0) / self.count)
+        
+        if new_count == 0 or std_val == 0:
             return []
         
-        # Find anomalies
-        z_scores = abs((values - mean_val) / std_val)
-        anomaly_indices = np.where(z_scores > self.anomaly_threshold)[0]
+        # Z-score only the newest entries; index is the position in the (oldest-first) history
+        start = (self.head - new_count) % self.max_history_size
+        if NUMBA_AVAILABLE:
+            found = _find_anomalies(self.value_history, start, new_count, mean_val, std_val,
+                                    self.anomaly_threshold, self._anomaly_offsets)
+            anomaly_positions = self._anomaly_offsets[:found]
+        else:
+            values = self.value_history[(start + np.arange(new_count)) % self.max_history_size]
+            anomaly_positions = np.flatnonzero(np.abs(values - mean_val) > self.anomaly_threshold * std_val)
         
+        first_index = self.count - new_count
         anomalies = []
-        for idx in anomaly_indices:
+        for pos in anomaly_positions:
+            value = self.value_history[(start + pos) % self.max_history_size]
             anomalies.append({
-                'index': idx,
-                'value': values[idx],
-                'z_score': z_scores[idx],
+                'index': first_index + pos,
+                'value': value,
+                'z_score': abs(value - mean_val) / std_val,
                 'timestamp': datetime.now()
             })
         
@@ -412,43 +618,54 @@ class RealTimeAnomalyDetector:
 class PerformanceMonitor:
     """Monitor real-time performance metrics."""
     
-    def __init__(self):
-        self.performance_data = {
-            'processing_times': [],
-            'throughput': [],
-            'error_rates': []
-        }
-    
-    def process_record(self, record: Dict[str, Any]):
-        """Process performance record."""
-        # Track processing time
-        start_time = time.time()
-        # Simulate processing
-        time.sleep(0.001)  # 1ms processing time
-        end_time = time.time()
+    def __init__(self, window_size: int = 1000):
+        self.window_size = window_size
+        # Ring of the latest per-record times plus a running sum, so the average
+        # is O(1); the window max comes from a monotonic deque of (seq, time)
+        # whose front is always the largest time still inside the window
+        self.processing_times = np.empty(window_size, dtype=np.float64)
+        self.head = 0  # Next slot to write
+        self.count = 0  # Filled slots
+        self.time_sum = 0.0
+        self.total_seen = 0  # Records timed since start
+        self._max_candidates = deque()
+    
+    def record_processing_time(self, processing_time: float):
+        """Record how long the stream's modules took on one record (seconds)."""
+        if self.count == self.window_size:
+            self.time_sum -= float(self.processing_times[self.head])
+        else:
+            self.count += 1
+        self.processing_times[self.head] = processing_time
+        self.time_sum += processing_time
+        self.head = (self.head + 1) % self.window_size
         
-        processing_time = end_time - start_time
-        self.performance_data['processing_times'].append(processing_time)
+        seq = self.total_seen
+        self.total_seen += 1
+        candidates = self._max_candidates
+        while candidates and candidates[-1][1] <= processing_time:
+            candidates.pop()
+        candidates.append((seq, processing_time))
+        if candidates[0][0] <= seq - self.window_size:
+            candidates.popleft()
         
-        # Keep data size manageable
-        if len(self.performance_data['processing_times']) > 1000:
-            self.performance_data['processing_times'] = self.performance_data['processing_times'][-1000:]
+        # Re-sum once per lap so add/subtract rounding error can't accumulate
+        if self.head == 0:
+            self.time_sum = float(self.processing_times.sum())
     
     def get_performance_stats(self) -> Dict[str, Any]:
         """Get performance statistics."""
-        if not self.performance_data['processing_times']:
+        if not self.count:
             return {
                 'avg_processing_time': 0,
                 'max_processing_time': 0,
                 'throughput': 0
             }
         
-        processing_times = self.performance_data['processing_times']
-        
         return {
-            'avg_processing_time': np.mean(processing_times),
-            'max_processing_time': np.max(processing_times),
-            'throughput': len(processing_times) / 60 if processing_times else 0  # records per minute
+            'avg_processing_time': self.time_sum / self.count,
+            'max_processing_time': self._max_candidates[0][1],
+            'throughput': self.count / 60  # records per minute
         }
 
 # Global real-time analytics instance
@@ -2,7 +2,9 @@
 Utility functions for error handling, validation, and common operations.
 """
 import logging
+import sys
 import traceback
+import numpy as np
 import pandas as pd
 import streamlit as st
 from typing import Any, Dict, List, Optional, Union
@@ -48,6 +50,49 @@ def handle_errors(func):
             raise
     return wrapper
 
+def estimate_memory_usage(df: pd.DataFrame, sample_size: int = 100) -> int:
+    """
+    Estimate a DataFrame's memory footprint in bytes.
+    
+    Uses the shallow per-column usage and, for object columns, extrapolates the
+    size of the referenced Python objects from the first ``sample_size`` values
+    instead of walking every object like ``memory_usage(deep=True)``.
+    
+    Args:
+        df: DataFrame to measure
+        sample_size: Number of leading values sampled per object column
+        
+    Returns:
+        Estimated size in bytes
+    """
+    total = int(df.memory_usage(deep=False).sum())
+    if len(df) == 0:
+        return total
+    for col in df.select_dtypes(include="object").columns:
+        sample = df[col].head(sample_size)
+        total += int(sample.map(sys.getsizeof).mean() * len(df))
+    return total
+
+def count_missing(df: pd.DataFrame) -> int:
+    """
+    Count missing cells without building a boolean DataFrame.
+    
+    Float columns are counted straight from their numpy values, plain numpy
+    integer and boolean columns cannot hold missing values, and everything
+    else (object, string, nullable extension dtypes) falls back to ``isna``.
+    """
+    missing = 0
+    for _, series in df.items():
+        dtype = series.dtype
+        if isinstance(dtype, np.dtype):
+            if dtype.kind == "f":
+                missing += np.count_nonzero(np.isnan(series.to_numpy()))
+                continue
+            if dtype.kind in "iub":
+                continue
+        missing += np.count_nonzero(series.isna().to_numpy())
+    return int(missing)
+
 def validate_dataframe(df: pd.DataFrame, required_columns: List[str] = None) -> Dict[str, Any]:
     """
     Validate a DataFrame and return validation results.
@@ -96,7 +141,7 @@ def validate_dataframe(df: pd.DataFrame, required_columns: List[str] = None) ->
     validation_results["stats"] = {
         "rows": len(df),
         "columns": len(df.columns),
-        "memory_usage": df.memory_usage(deep=True).sum() / 1024 / 1024,  # MB
+        "memory_usage": estimate_memory_usage(df) / 1024 / 1024,  # MB
         "duplicate_rows": df.duplicated().sum(),
         "numeric_columns": len(df.select_dtypes(include=['number']).columns),
         "categorical_columns": len(df.select_dtypes(include=['object', 'category']).columns)
@@ -88,7 +88,25 @@ class TestCacheManager:
         # All values should be gone
         assert cache_manager.get({"key1": "data"}) is None
         assert cache_manager.get({"key2": "data"}) is None
+
+    def test_clear_removes_orphaned_files(self, cache_manager, temp_cache_dir):
+        """Test that clearing also removes payloads missing from the index."""
+        (temp_cache_dir / "orphan.cache").write_bytes(b"stale")
+        (temp_cache_dir / "legacy.meta").write_bytes(b"stale")
+
+        assert cache_manager.clear() == 1
+        assert not (temp_cache_dir / "orphan.cache").exists()
+        assert not (temp_cache_dir / "legacy.meta").exists()
     
+    def test_set_leaves_no_temp_files(self, cache_manager, temp_cache_dir):
+        """Test that payloads are renamed into place after being written."""
+        assert cache_manager.set({"atomic": "data"}, list(range(1000)))
+        assert cache_manager.set({"atomic": "data"}, "replaced")
+        assert not list(temp_cache_dir.glob("*.tmp"))
+
+        cache_manager._forget(cache_manager._generate_key({"atomic": "data"}))
+        assert cache_manager.get({"atomic": "data"}) == "replaced"
+
     def test_stats(self, cache_manager):
         """Test cache statistics."""
         # Initial stats
@@ -122,6 +140,119 @@ class TestCacheManager:
         assert cache_manager.get({"short": "ttl"}) is None
         assert cache_manager.get({"long": "ttl"}) == "value2"
 
+    def test_legacy_key_hash(self, temp_cache_dir):
+        """Test that legacy mode keeps the original MD5 cache keys."""
+        import hashlib
+
+        legacy = CacheManager(cache_dir=temp_cache_dir, legacy_key_hash=True)
+        key_data = {"legacy": "key"}
+        expected = hashlib.md5(json.dumps(key_data, sort_keys=True, default=str).encode()).hexdigest()
+        assert legacy._generate_key(key_data) == expected
+
+    def test_canonical_keys(self, cache_manager):
+        """Test that equivalent key data maps to the same cache key."""
+        import numpy as np
+
+        key = cache_manager._generate_key
+        assert key({"a": 1, "b": [1, 2]}) == key({"b": (1, 2), "a": 1})
+        assert key({"a": 1}) != key({"a": "1"})
+
+        values = np.arange(100)
+        assert key(("arr", values)) == key(("arr", values.copy()))
+        assert key(("arr", values)) != key(("arr", values[::-1]))
+
+    def test_access_time_flush(self, cache_manager):
+        """Test that cache hits defer last-access writes until flushed."""
+        key_data = {"access": "data"}
+        cache_manager.set(key_data, "value")
+
+        key = cache_manager._generate_key(key_data)
+        before = cache_manager._load_meta(key).last_accessed
+
+        # A hit should not touch the stored metadata
+        time.sleep(0.01)
+        assert cache_manager.get(key_data) == "value"
+        assert cache_manager._load_meta(key).last_accessed == before
+
+        # Flushing writes the pending access time
+        assert cache_manager.flush_access_times() == 1
+        assert cache_manager._load_meta(key).last_accessed > before
+        assert cache_manager.flush_access_times() == 0
+
+    def test_memory_tier(self, cache_manager):
+        """Test that repeat hits are served from the in-process LRU."""
+        cache_manager.set({"memory": "data"}, "value")
+        assert cache_manager.get({"memory": "data"}) == "value"
+
+        # Remove the payload file; the value is still served from memory
+        key = cache_manager._generate_key({"memory": "data"})
+        cache_manager._get_cache_path(key).unlink()
+        assert cache_manager.get({"memory": "data"}) == "value"
+
+        # Overwriting invalidates the in-memory copy
+        cache_manager.set({"memory": "data"}, "new value")
+        assert cache_manager.get({"memory": "data"}) == "new value"
+
+    def test_memory_tier_skips_mutable_values(self, cache_manager):
+        """Test that mutable values are not shared between callers."""
+        import numpy as np
+        import pandas as pd
+
+        cache_manager.set({"mutable": "list"}, {"a": [1, 2]})
+        cache_manager.get({"mutable": "list"})["a"].append(99)
+        assert cache_manager.get({"mutable": "list"}) == {"a": [1, 2]}
+
+        df = pd.DataFrame({"x": [1, 2, 3]})
+        cache_manager.set({"mutable": "frame"}, df)
+        cache_manager.get({"mutable": "frame"})["y"] = 0
+        assert list(cache_manager.get({"mutable": "frame"}).columns) == ["x"]
+
+        arr = np.arange(5)
+        cache_manager.set({"mutable": "array"}, arr)
+        cache_manager.get({"mutable": "array"})[0] = 42
+        assert cache_manager.get({"mutable": "array"})[0] == 0
+
+    def test_cache_info(self, cache_manager):
+        """Test detailed cache information."""
+        cache_manager.set({"info": "data"}, "value", ttl=30)
+
+        info = cache_manager.get_cache_info()
+        assert info["total_files"] == 1
+        assert len(info["entries"]) == 1
+
+        entry = info["entries"][0]
+        assert entry["size_bytes"] > 0
+        assert entry["expires_at"] - entry["created_at"] == pytest.approx(30)
+        assert not entry["is_expired"]
+
+    def test_iter_entries(self, cache_manager):
+        """Test lazy, paginated iteration over cache entries."""
+        for i in range(5):
+            cache_manager.set({"entry": i}, i, ttl=10 + i)
+        cache_manager.set({"expired": "entry"}, "value", ttl=1)
+        time.sleep(1.1)
+
+        entries = list(cache_manager.iter_entries(batch_size=2))
+        assert len(entries) == 6
+        assert [e["expires_at"] for e in entries] == sorted(e["expires_at"] for e in entries)
+        assert len(list(cache_manager.iter_entries(limit=3, batch_size=2))) == 3
+
+        expired = list(cache_manager.iter_entries(expired_only=True))
+        assert len(expired) == 1 and expired[0]["is_expired"]
+        assert len(cache_manager.get_cache_info(limit=2)["entries"]) == 2
+
+    def test_bytes_fast_path(self, cache_manager):
+        """Test that raw byte payloads bypass pickle."""
+        payload = json.dumps({"summary": [1, 2, 3]}).encode()
+        assert cache_manager.set_bytes({"raw": "data"}, payload)
+
+        key = cache_manager._generate_key({"raw": "data"})
+        assert cache_manager._load_meta(key).codec == "raw"
+        assert cache_manager._get_cache_path(key).read_bytes() == payload
+
+        cache_manager._forget(key)
+        assert cache_manager.get_bytes({"raw": "data"}) == payload
+
 class TestCachedDecorator:
     """Test caching decorators."""
     
@@ -229,3 +360,76 @@ class TestDataFrameCache:
         
         # Different analysis type should not be cached
         assert dataframe_cache.get_analysis_cache(df, "sum_analysis") is None
+
+    def test_analysis_cache_detects_changed_values(self, dataframe_cache):
+        """Test that same-shaped DataFrames with different values get separate keys."""
+        import pandas as pd
+
+        df = pd.DataFrame({'a': range(1000), 'b': range(1000)})
+        changed = df.copy()
+        changed.iloc[-1, 0] = -1
+
+        assert dataframe_cache.set_analysis_cache(df, "sum_analysis", {"sum": 1})
+        assert dataframe_cache.get_analysis_cache(df.copy(), "sum_analysis") == {"sum": 1}
+        assert dataframe_cache.get_analysis_cache(changed, "sum_analysis") is None
+
+    def test_full_hash_covers_every_row(self, temp_cache_dir):
+        """Test that full hashing detects changes outside the sampled rows."""
+        import pandas as pd
+
+        dataframe_cache = DataFrameCache(CacheManager(cache_dir=temp_cache_dir), full_hash=True)
+        df = pd.DataFrame({'a': range(100_000), 'b': ['x'] * 100_000})
+        assert dataframe_cache.set_analysis_cache(df, "sum_analysis", {"sum": 1})
+        assert dataframe_cache.get_analysis_cache(df.copy(), "sum_analysis") == {"sum": 1}
+
+        for column, value in (('a', -1), ('b', 'y')):
+            changed = df.copy()
+            changed.loc[50_001, column] = value
+            assert dataframe_cache.get_analysis_cache(changed, "sum_analysis") is None
+
+class TestCachePayloads:
+    """Test round-tripping of array-backed payloads."""
+
+    @pytest.fixture
+    def cache_manager(self):
+        """Create cache manager instance."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            yield CacheManager(cache_dir=Path(temp_dir), default_ttl=60)
+
+    def test_dataframe_roundtrip(self, cache_manager):
+        """Test that DataFrames survive the out-of-band buffer layout."""
+        import numpy as np
+        import pandas as pd
+
+        df = pd.DataFrame({
+            'a': np.arange(10_000, dtype=np.float64),
+            'b': np.arange(10_000, dtype=np.int64),
+            'c': ['x', 'y'] * 5_000
+        })
+        assert cache_manager.set("frame", df)
+
+        restored = cache_manager.get("frame")
+        pd.testing.assert_frame_equal(restored, df)
+
+        # Restored data must stay writable
+        restored.loc[0, 'a'] = -1.0
+        assert restored.loc[0, 'a'] == -1.0
+
+    def test_ndarray_roundtrip(self, cache_manager):
+        """Test that plain arrays are stored in .npy layout and reloaded lazily."""
+        import numpy as np
+
+        values = np.random.default_rng(0).random((500, 20))
+        assert cache_manager.set("array", values)
+
+        key = cache_manager._generate_key("array")
+        assert cache_manager._load_meta(key).codec == "npy"
+
+        cache_manager._forget(key)
+        restored = cache_manager.get("array")
+        np.testing.assert_array_equal(restored, values)
+
+        # Copy-on-write: the caller may modify the result without touching the cache
+        restored[0, 0] = -1.0
+        cache_manager._forget(key)
+        assert cache_manager.get("array")[0, 0] == values[0, 0]
@@ -0,0 +1,48 @@
+"""
+Unit tests for the fast numeric summaries.
+"""
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from lib import fast_stats
+
+
+class TestFastStats:
+    """Test fast_stats against the pandas methods it replaces."""
+
+    @pytest.mark.parametrize("size", [1, 2, 100, fast_stats.NUMBA_MIN_ROWS + 1])
+    def test_describe_matches_pandas(self, size):
+        """Test describe() against Series.describe(), including the Numba path for large columns."""
+        rng = np.random.default_rng(size)
+        series = pd.Series(rng.normal(50, 10, size))
+        if size > 2:
+            series[::7] = np.nan
+
+        result = fast_stats.describe(series)
+        expected = series.describe().to_dict()
+        assert result.keys() == expected.keys()
+        assert result == pytest.approx(expected, rel=1e-9, nan_ok=True)
+
+    def test_summarize(self):
+        """Test counts, sum and extremes, including nullable dtypes and all-NaN input."""
+        series = pd.Series([3, None, 1, 7], dtype="Int64")
+        assert fast_stats.summarize(series) == {
+            "count": 3, "nan_count": 1, "sum": 11.0, "mean": 11 / 3, "min": 1.0, "max": 7.0
+        }
+
+        empty = fast_stats.summarize(np.array([np.nan, np.nan]))
+        assert empty["count"] == 0 and empty["nan_count"] == 2 and empty["sum"] == 0.0
+        assert np.isnan(empty["mean"]) and np.isnan(empty["max"])
+
+    def test_percentiles(self):
+        """Test percentiles against Series.quantile()."""
+        series = pd.Series([5.0, np.nan, 1.0, 3.0, 9.0, 2.0])
+        result = fast_stats.percentiles(series, (10, 50, 90))
+        np.testing.assert_allclose(result, series.quantile([0.1, 0.5, 0.9]).to_numpy())
+        assert np.isnan(fast_stats.percentiles([np.nan], (50,))).all()
@@ -0,0 +1,301 @@
+"""
+Unit tests for real-time analytics.
+"""
+import pytest
+import queue
+import threading
+import time
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from realtime_analytics import (
+    SPSCRingBuffer,
+    RealTimeDataStream,
+    RealTimeAnalytics,
+    UserActivityTracker,
+    PurchaseTracker,
+    RealTimeAnomalyDetector,
+    PerformanceMonitor,
+    NS_PER_HOUR
+)
+
+
+class FakeClock:
+    """Settable replacement for time.time_ns."""
+
+    def __init__(self, start_ns: int = 1_700_000_000 * 1_000_000_000):
+        self.now_ns = start_ns
+
+    def __call__(self) -> int:
+        return self.now_ns
+
+    def advance(self, seconds: float):
+        self.now_ns += int(seconds * 1_000_000_000)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Freeze time.time_ns at a controllable value."""
+    fake = FakeClock()
+    monkeypatch.setattr(time, "time_ns", fake)
+    return fake
+
+
+class TestSPSCRingBuffer:
+    """Test the single-producer/single-consumer record queue."""
+
+    def test_fifo_and_capacity(self):
+        """Test ordering, queue.Full at maxsize and queue.Empty when drained."""
+        buffer = SPSCRingBuffer(maxsize=3)
+        for i in range(3):
+            buffer.put(i)
+        with pytest.raises(queue.Full):
+            buffer.put(3)
+        assert buffer.qsize() == 3
+
+        assert [buffer.get_nowait() for _ in range(3)] == [0, 1, 2]
+        with pytest.raises(queue.Empty):
+            buffer.get_nowait()
+        with pytest.raises(queue.Empty):
+            buffer.get(timeout=0.01)
+
+    def test_wraparound(self):
+        """Test that indices wrapping past the slot count keep FIFO order."""
+        buffer = SPSCRingBuffer(maxsize=5)  # 8 slots
+        received = []
+        for i in range(50):
+            buffer.put(i)
+            if i % 3 == 2:
+                received.extend(buffer.get_nowait() for _ in range(buffer.qsize()))
+        received.extend(buffer.get_nowait() for _ in range(buffer.qsize()))
+        assert received == list(range(50))
+
+    def test_put_get_across_threads(self):
+        """Test that a producer and a blocking consumer thread exchange every item in order."""
+        buffer = SPSCRingBuffer(maxsize=64)
+        n_items = 20_000
+        received = []
+
+        def consume():
+            while len(received) < n_items:
+                try:
+                    received.append(buffer.get(timeout=5))
+                except queue.Empty:
+                    return
+
+        consumer = threading.Thread(target=consume)
+        consumer.start()
+        for i in range(n_items):
+            while True:
+                try:
+                    buffer.put(i)
+                    break
+                except queue.Full:
+                    time.sleep(0)
+        consumer.join(timeout=10)
+
+        assert not consumer.is_alive()
+        assert received == list(range(n_items))
+
+
+class TestRealTimeDataStream:
+    """Test record validation, queueing and callback dispatch."""
+
+    def test_validation(self):
+        """Test that records missing a required field are counted as errors."""
+        stream = RealTimeDataStream({'required_fields': ['user_id', 'event_type']})
+        stream.process_record({'user_id': 1, 'event_type': 'view', 'extra': True})
+        stream.process_record({'user_id': 1})
+
+        assert stream.metrics['processed_records'] == 1
+        assert stream.metrics['error_count'] == 1
+        assert stream.data_queue.qsize() == 1
+
+    def test_callback_isolation(self):
+        """Test that a failing callback doesn't stop the others."""
+        stream = RealTimeDataStream({'required_fields': []})
+        seen = []
+        stream.add_callback(lambda record: seen.append('first'))
+        stream.add_callback(lambda record: 1 / 0)
+        stream.add_callback(lambda record: seen.append('third'))
+        stream.process_record({})
+
+        assert seen == ['first', 'third']
+
+    def test_full_queue_drops_but_notifies(self):
+        """Test that overflow is counted as drops while callbacks still see every record."""
+        stream = RealTimeDataStream({'required_fields': [], 'max_queue_size': 4})
+        seen = []
+        stream.add_callback(seen.append)
+        for i in range(10):
+            stream.process_record({'i': i})
+
+        assert len(seen) == 10
+        assert stream.metrics['dropped_records'] == 6
+        assert stream.metrics['processed_records'] == 10
+        assert stream.metrics['error_count'] == 0
+
+    def test_performance_monitor_times_callbacks(self):
+        """Test that the analytics engine feeds per-record callback durations to the monitor."""
+        analytics = RealTimeAnalytics()
+        for i in range(20):
+            analytics.data_stream.process_record(
+                {'user_id': i + 1, 'event_type': 'view', 'timestamp': 0, 'value': 1.0}
+            )
+
+        monitor = analytics.modules['performance_monitor']
+        assert monitor.count == 20
+        stats = monitor.get_performance_stats()
+        assert 0 < stats['avg_processing_time'] <= stats['max_processing_time'] < 1
+
+
+class TestBatchAnomalies:
+    """Test the batch anomaly check against the pandas computation it replaced."""
+
+    @staticmethod
+    def expected_count(values):
+        series = pd.Series(values)
+        return int((abs(series - series.mean()) > 3 * series.std()).sum())
+
+    @pytest.mark.parametrize("offset", [0.0, 1.7e9])
+    def test_anomaly_count(self, offset):
+        """Test the count with and without a large offset (small spread around 1.7e9)."""
+        rng = np.random.default_rng(3)
+        values = list(offset + rng.uniform(-1.5, 1.5, 100))  # std ~0.87, nothing past 3 std
+
+        analytics = RealTimeAnalytics()
+        analytics._check_for_anomalies({'value': values + [None]})
+        assert self.expected_count(values) == 0
+        assert 'anomalies_detected' not in analytics.real_time_metrics
+
+        values[40] = offset + 10.0
+        analytics._check_for_anomalies({'value': values})
+        assert analytics.real_time_metrics['anomalies_detected'] == self.expected_count(values) == 1
+
+
+class TestUserActivityTracker:
+    """Test per-user activity columns."""
+
+    def test_active_users_and_growth(self, clock):
+        """Test activity windows and counts across an array resize."""
+        tracker = UserActivityTracker(initial_capacity=2)
+        for user_id in (1, 2, 3, 4, 5):
+            tracker.process_record({'user_id': user_id})
+        clock.advance(10 * 60)
+        tracker.process_record({'user_id': 2})
+        tracker.process_record({'user_id': 6})
+
+        assert sorted(tracker.get_active_users(minutes=5)) == [2, 6]
+        assert sorted(tracker.get_active_users(minutes=15)) == [1, 2, 3, 4, 5, 6]
+        assert tracker.activity_count[tracker.id_to_idx[2]] == 2
+        assert tracker.get_user_stats() == {
+            'total_users': 6,
+            'active_users_5min': 2,
+            'activity_rate': 2 / 6
+        }
+
+
+class TestPurchaseTracker:
+    """Test the purchase ring buffer and hourly revenue buckets."""
+
+    def test_recent_purchases_after_wraparound(self, clock):
+        """Test that only the newest purchases survive and time filters span the wrap point."""
+        tracker = PurchaseTracker(max_history_size=5)
+        for i in range(8):
+            tracker.process_record({'event_type': 'purchase', 'amount': float(i),
+                                    'user_id': i, 'product_id': f'p{i}'})
+            clock.advance(60)
+        tracker.process_record({'event_type': 'view', 'amount': 100.0})
+
+        recent = tracker.get_recent_purchases(minutes=60)
+        assert [p['amount'] for p in recent] == [3.0, 4.0, 5.0, 6.0, 7.0]
+        assert [p['product_id'] for p in recent] == ['p3', 'p4', 'p5', 'p6', 'p7']
+
+        # Purchases at t-5..t-1 minutes; a 3.5 minute window keeps the last three
+        assert [p['amount'] for p in tracker.get_recent_purchases(minutes=3.5)] == [5.0, 6.0, 7.0]
+
+        stats = tracker.get_revenue_stats()
+        assert stats == {'revenue_1hour': 25.0, 'purchase_count_1hour': 5, 'avg_purchase_value': 5.0}
+
+    def test_revenue_by_hour_slot_reuse(self, clock):
+        """Test that an hour's slot is reset when a later hour maps onto it."""
+        clock.now_ns = 1000 * NS_PER_HOUR  # Start of an hour
+        tracker = PurchaseTracker()
+        hour = 1000
+        slot = hour & (tracker.REVENUE_HOURS - 1)
+
+        tracker.process_record({'event_type': 'purchase', 'amount': 10.0})
+        tracker.process_record({'event_type': 'purchase', 'amount': 5.0})
+        assert tracker.revenue_by_hour[slot] == 15.0
+        assert tracker.hour_ids[slot] == hour
+
+        clock.advance(3600)
+        tracker.process_record({'event_type': 'purchase', 'amount': 7.0})
+        assert tracker.revenue_by_hour[(hour + 1) & (tracker.REVENUE_HOURS - 1)] == 7.0
+        assert tracker.revenue_by_hour[slot] == 15.0
+
+        # REVENUE_HOURS hours later the same slot is reused for the new hour
+        clock.now_ns = (hour + tracker.REVENUE_HOURS) * NS_PER_HOUR
+        tracker.process_record({'event_type': 'purchase', 'amount': 2.0})
+        assert tracker.hour_ids[slot] == hour + tracker.REVENUE_HOURS
+        assert tracker.revenue_by_hour[slot] == 2.0
+
+
+class TestRealTimeAnomalyDetector:
+    """Test the windowed anomaly detector against a direct NumPy computation."""
+
+    def test_window_stats_after_eviction(self):
+        """Test that mean and std track the last max_history_size values across laps."""
+        detector = RealTimeAnomalyDetector()
+        rng = np.random.default_rng(0)
+        values = 1e6 + rng.normal(0, 0.01, 2_700)  # Large offset, small spread
+        for value in values:
+            detector.process_record({'value': value})
+
+        window = values[-detector.max_history_size:]
+        assert detector.count == detector.max_history_size
+        assert detector.value_mean == pytest.approx(window.mean(), rel=1e-12)
+        assert np.sqrt(detector.value_m2 / detector.count) == pytest.approx(window.std(), rel=1e-6)
+
+    def test_detects_only_new_values(self):
+        """Test that each call scans values recorded since the previous call."""
+        detector = RealTimeAnomalyDetector()
+        rng = np.random.default_rng(1)
+        for value in rng.normal(100, 1, 1_200):
+            detector.process_record({'value': value})
+        detector.detect_anomalies()  # Consume the warm-up values
+
+        for value in (100.0, 150.0, 99.0):
+            detector.process_record({'value': value})
+        anomalies = detector.detect_anomalies()
+
+        window = detector.value_history  # Full ring, order doesn't matter for mean/std
+        expected_z = abs(150.0 - window.mean()) / window.std()
+        assert [a['value'] for a in anomalies] == [150.0]
+        assert anomalies[0]['index'] == detector.count - 2
+        assert anomalies[0]['z_score'] == pytest.approx(expected_z)
+        assert detector.detect_anomalies() == []
+
+
+class TestPerformanceMonitor:
+    """Test the windowed processing-time statistics."""
+
+    def test_window_avg_and_max(self):
+        """Test avg and max against the last window_size samples, including an evicted maximum."""
+        monitor = PerformanceMonitor(window_size=50)
+        assert monitor.get_performance_stats()['max_processing_time'] == 0
+
+        rng = np.random.default_rng(2)
+        samples = rng.random(173)
+        samples[10] = 5.0  # Evicted long before the end
+        for sample in samples:
+            monitor.record_processing_time(float(sample))
+            window = samples[:monitor.total_seen][-50:]
+            stats = monitor.get_performance_stats()
+            assert stats['avg_processing_time'] == pytest.approx(window.mean())
+            assert stats['max_processing_time'] == window.max()
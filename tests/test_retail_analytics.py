@@ -0,0 +1,135 @@
+"""
+Unit tests for retail analytics module.
+"""
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from industry_modules.retail_analytics import RetailAnalytics
+
+
+class TestRetailAnalytics:
+    """Test retail analytics against plain pandas computations of the same metrics."""
+
+    @pytest.fixture
+    def sample_data(self):
+        """Create sample retail data for testing."""
+        rng = np.random.default_rng(0)
+        n = 2000
+        return pd.DataFrame({
+            'user_id': np.arange(1, n + 1),
+            'product_id': rng.choice([f'P{i}' for i in range(60)], n),
+            'quantity': rng.integers(0, 5, n),
+            'total_purchases': rng.choice([0, 1, 2, 3, 5, 6, 12, 20, 21, 40], n),
+            'signup_date': pd.date_range('2021-01-01', periods=n, freq='13h').astype(str),
+            'browsing_time_minutes': rng.exponential(30, n),
+            'device_type': rng.choice(['Mobile', 'Desktop', 'Tablet'], n),
+            'preferred_category': rng.choice(['Electronics', 'Books', 'Home', 'Clothing'], n),
+            'customer_lifetime_value': rng.lognormal(5, 1, n),
+            'customer_segment': rng.choice(['VIP', 'Regular', 'New'], n)
+        })
+
+    @pytest.fixture
+    def analytics(self):
+        """Create analytics instance."""
+        return RetailAnalytics()
+
+    def test_inventory_turnover(self, analytics, sample_data):
+        """Test turnover metrics and slow-moving products."""
+        result = analytics.analyze_inventory_turnover(sample_data)
+
+        product_metrics = sample_data.groupby('product_id').agg(
+            {'quantity': ['sum', 'count', 'mean'], 'total_purchases': 'sum'}
+        ).round(2)
+        turnover_rate = product_metrics[('quantity', 'sum')] / product_metrics[('quantity', 'count')]
+        overall = result['turnover_metrics']['overall_metrics']
+        assert overall['avg_turnover_rate'] == pytest.approx(turnover_rate.mean())
+        assert overall['total_products'] == len(product_metrics)
+        assert overall['high_turnover_products'] == int((turnover_rate > 2.0).sum())
+        assert overall['low_turnover_products'] == int((turnover_rate < 0.5).sum())
+
+        product_level = result['turnover_metrics']['product_level']
+        assert product_level['P7'][('quantity', 'sum')] == product_metrics.loc['P7', ('quantity', 'sum')]
+        assert product_level['P7'][('quantity', 'mean')] == pytest.approx(product_metrics.loc['P7', ('quantity', 'mean')])
+
+        # Tie order among equal totals isn't part of the contract
+        product_sales = sample_data.groupby('product_id')['quantity'].sum()
+        slow_moving = product_sales[product_sales <= product_sales.quantile(0.2)]
+        reported = result['slow_moving_products']
+        assert [p['total_sales'] for p in reported] == sorted(slow_moving.tolist())
+        assert {p['product_id'] for p in reported} == set(slow_moving.index)
+
+        season = pd.to_datetime(sample_data['signup_date']).dt.month.map({
+            12: 'Winter', 1: 'Winter', 2: 'Winter', 3: 'Spring', 4: 'Spring', 5: 'Spring',
+            6: 'Summer', 7: 'Summer', 8: 'Summer', 9: 'Fall', 10: 'Fall', 11: 'Fall'
+        })
+        seasonal_sales = sample_data.groupby(season)['quantity'].sum()
+        seasonal = result['seasonal_patterns']
+        assert seasonal['seasonal_distribution'] == seasonal_sales.to_dict()
+        assert seasonal['peak_season'] == seasonal_sales.idxmax()
+
+    def test_customer_journey(self, analytics, sample_data):
+        """Test lifecycle stages, funnel and touchpoints."""
+        result = analytics.analyze_customer_journey(sample_data)
+        purchases = sample_data['total_purchases']
+
+        stages = pd.cut(purchases, [-np.inf, 0, 1, 5, 20, np.inf],
+                        labels=['Prospect', 'New Customer', 'Developing', 'Established', 'VIP'])
+        distribution = result['lifecycle_stages']['stage_distribution']
+        assert distribution == {stage: count for stage, count in stages.value_counts().items() if count}
+
+        funnel = result['funnel_analysis']['funnel_metrics']
+        assert funnel == {
+            'total_visitors': len(sample_data),
+            'registered_users': len(sample_data),
+            'first_time_buyers': int((purchases == 1).sum()),
+            'repeat_buyers': int((purchases > 1).sum()),
+            'vip_customers': int((purchases > 20).sum())
+        }
+        rates = result['funnel_analysis']['conversion_rates']
+        assert rates['repeat_purchase_rate'] == pytest.approx(funnel['repeat_buyers'] / funnel['first_time_buyers'])
+        assert rates['vip_conversion_rate'] == pytest.approx(funnel['vip_customers'] / funnel['repeat_buyers'])
+
+        browsing = sample_data['browsing_time_minutes']
+        touchpoints = result['touchpoints']
+        assert touchpoints['device_preferences'] == sample_data['device_type'].value_counts().to_dict()
+        assert touchpoints['engagement_metrics'] == pytest.approx({
+            'avg_browsing_time': browsing.mean(),
+            'high_engagement_threshold': browsing.quantile(0.8),
+            'low_engagement_threshold': browsing.quantile(0.2)
+        })
+
+    def test_product_performance(self, analytics, sample_data):
+        """Test category scores and the segment/category basket."""
+        result = analytics.analyze_product_performance(sample_data)
+
+        category_metrics = sample_data.groupby('preferred_category').agg(
+            {'total_purchases': 'mean', 'customer_lifetime_value': 'mean', 'user_id': 'count'}
+        ).round(2)
+        category_metrics.columns = ['avg_purchases', 'avg_clv', 'customer_count']
+        score = (category_metrics['avg_purchases'] * 0.4 + category_metrics['avg_clv'] * 0.4
+                 + category_metrics['customer_count'] * 0.2)
+
+        performance = result['category_performance']
+        assert performance['top_performing_category'] == score.idxmax()
+        assert performance['bottom_performing_category'] == score.idxmin()
+        for category, metrics in performance['category_metrics'].items():
+            assert metrics['avg_clv'] == pytest.approx(category_metrics.loc[category, 'avg_clv'])
+            assert metrics['customer_count'] == category_metrics.loc[category, 'customer_count']
+            assert metrics['performance_score'] == pytest.approx(score[category])
+
+        basket = sample_data.groupby(['customer_segment', 'preferred_category']).size().unstack(fill_value=0)
+        assert result['basket_analysis']['segment_category_preferences'] == basket.to_dict('index')
+
+    def test_input_frame_unchanged(self, analytics, sample_data):
+        """Test that analysis doesn't add or convert columns on the caller's frame."""
+        original = sample_data.copy()
+        analytics.analyze_inventory_turnover(sample_data)
+        analytics.analyze_customer_journey(sample_data)
+        analytics.analyze_product_performance(sample_data)
+        pd.testing.assert_frame_equal(sample_data, original)
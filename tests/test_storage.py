@@ -0,0 +1,114 @@
+"""
+Unit tests for run and crawl storage.
+"""
+import pytest
+import gzip
+import json
+import math
+import numpy as np
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from lib import storage
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    """Storage module writing runs and crawls under a temporary directory."""
+    runs = tmp_path / "runs"
+    crawls = tmp_path / "crawls"
+    runs.mkdir()
+    crawls.mkdir()
+    monkeypatch.setattr(storage, "RUNS", runs)
+    monkeypatch.setattr(storage, "CRAWLS", crawls)
+    return storage
+
+
+class TestRuns:
+    """Test saving, listing and loading analysis runs."""
+
+    def test_round_trip_and_index(self, store):
+        """Test that a saved run loads back and is listed from the index."""
+        results = {"key_metrics": {"total_customers": 3}, "values": [1.5, 2.5]}
+        path = Path(store.save_run(results))
+
+        assert path.suffix == ".json"
+        run_id = path.name[:-len(".json")]
+        assert store.load_run(run_id) == results
+        assert store.list_runs() == [
+            {"id": run_id, "path": str(path), "summary": {"total_customers": 3}}
+        ]
+        assert store.load_run("run-missing") is None
+
+    def test_gzip_round_trip(self, store, monkeypatch):
+        """Test that payloads over GZIP_MIN_BYTES are written as .json.gz and read back."""
+        monkeypatch.setattr(store, "GZIP_MIN_BYTES", 100)
+        results = {"dataset_info": {"rows": 500}, "values": list(range(500))}
+        path = Path(store.save_run(results))
+
+        assert path.name.endswith(".json.gz")
+        assert json.loads(gzip.decompress(path.read_bytes())) == results
+        run_id = path.name[:-len(".json.gz")]
+        assert store.load_run(run_id) == results
+        assert store.list_runs()[0]["summary"] == {"rows": 500}
+
+    def test_non_finite_floats(self, store):
+        """Test that NaN/inf are saved as strings in strict JSON rather than dropped to null."""
+        results = {"key_metrics": {"corr": float("nan"), "ratio": np.float32("inf")},
+                   "values": np.array([1.0, -np.inf])}
+        path = Path(store.save_run(results))
+
+        def reject(token):
+            raise ValueError(token)
+
+        saved = json.loads(path.read_text(), parse_constant=reject)
+        assert saved == {"key_metrics": {"corr": "NaN", "ratio": "Infinity"},
+                         "values": [1.0, "-Infinity"]}
+        assert store.list_runs()[0]["summary"] == {"corr": "NaN", "ratio": "Infinity"}
+
+    def test_listing_without_index(self, store):
+        """Test that files saved before the index existed are summarized from their contents."""
+        (store.RUNS / "run-20200101-000000.json").write_text(json.dumps({"key_metrics": {"a": 1}}))
+        (store.RUNS / "run-20200102-000000.json").write_text("not json")
+
+        runs = store.list_runs()
+        assert [run["id"] for run in runs] == ["run-20200102-000000", "run-20200101-000000"]
+        assert runs[0]["summary"] == {}
+        assert runs[1]["summary"] == {"a": 1}
+
+    def test_loads_nan_literals(self, store):
+        """Test that files and index lines written by json.dumps with NaN/Infinity tokens still load."""
+        run_id = "run-20200101-000000"
+        (store.RUNS / f"{run_id}.json").write_text('{"key_metrics": {"avg": NaN, "max": Infinity}}')
+        (store.RUNS / store.INDEX_NAME).write_text(
+            json.dumps({"id": run_id, "summary": {"summary": {"avg": float("nan")}}}) + "\n"
+        )
+
+        data = store.load_run(run_id)
+        assert math.isnan(data["key_metrics"]["avg"])
+        assert data["key_metrics"]["max"] == math.inf
+        assert math.isnan(store.list_runs()[0]["summary"]["avg"])
+
+
+class TestCrawls:
+    """Test crawl storage and the cached-crawl lookup."""
+
+    def test_find_crawl_ttl(self, store):
+        """Test find_crawl matching on requested_url and honouring max_age."""
+        stale = {"url": "https://example.com/home", "requested_url": "https://example.com",
+                 "title": "Old", "link_count": 2}
+        (store.CRAWLS / "crawl-20200101-000000.json").write_text(json.dumps(stale))
+
+        assert store.find_crawl("https://example.com") == stale
+        assert store.find_crawl("https://example.com", max_age=3600) is None
+        assert store.find_crawl("https://example.com/home") is None
+        assert store.find_crawl("https://other.example") is None
+
+        fresh = {**stale, "title": "New"}
+        path = Path(store.save_crawl(fresh))
+        assert store.find_crawl("https://example.com", max_age=3600) == fresh
+        assert store.load_crawl(path.name[:-len(".json")]) == fresh
+        assert [crawl["title"] for crawl in store.list_crawls()] == ["New", "Old"]
@@ -12,6 +12,8 @@ sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
 from utils import (
     validate_dataframe, 
+    estimate_memory_usage,
+    count_missing,
     load_and_validate_csv, 
     format_file_size,
     create_cache_key,
@@ -77,6 +79,30 @@ class TestUtilityFunctions:
         assert format_file_size(1024 * 1024) == "1.00 MB"
         assert format_file_size(1024 * 1024 * 1024) == "1.00 GB"
     
+    def test_estimate_memory_usage(self):
+        """Test that the sampled estimate tracks the deep measurement."""
+        df = pd.DataFrame({
+            'num': np.arange(10_000, dtype=np.float64),
+            'text': pd.Series(['customer_segment_value'] * 10_000, dtype=object)
+        })
+        
+        deep = df.memory_usage(deep=True).sum()
+        assert estimate_memory_usage(df) == pytest.approx(deep, rel=0.05)
+        assert estimate_memory_usage(df.iloc[:0]) == df.iloc[:0].memory_usage(deep=False).sum()
+    
+    def test_count_missing(self):
+        """Test missing-cell counting across dtypes."""
+        df = pd.DataFrame({
+            'f': [1.0, np.nan, 3.0, np.nan],
+            'g': np.array([np.nan, 2.0, 3.0, 4.0], dtype=np.float32),
+            'i': [1, 2, 3, 4],
+            'n': pd.array([1, None, 3, 4], dtype="Int64"),
+            's': ['a', None, 'c', 'd']
+        })
+        
+        assert count_missing(df) == df.isnull().sum().sum() == 5
+        assert count_missing(df.iloc[:0]) == 0
+    
     def test_create_cache_key(self):
         """Test cache key creation."""
         key1 = create_cache_key("test", arg1="value1")